@@ -0,0 +1,173 @@
+"""
+Comandos de administración
+
+Uso: python -m backend.app.cli <comando> [opciones]
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import date, datetime
+
+from backend.app.core.database import SessionLocal
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+def importar(args) -> int:
+    """Importa equipos y planes desde un CSV o XLSX"""
+    from backend.app.services.importacion_service import ImportacionService
+    
+    db = SessionLocal()
+    try:
+        with open(args.archivo, "rb") as archivo:
+            filas = ImportacionService.leer_filas(archivo, args.archivo)
+            resultado = ImportacionService.importar(db, filas, upsert=args.upsert, chunk=args.chunk)
+    finally:
+        db.close()
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    return 1 if resultado["total_errores"] else 0
+
+def recalcular_gramos(args) -> int:
+    """Llena o valida cantidad_gramos de toda la flota desde modelo_rodamiento"""
+    from backend.app.services.rodamiento_service import RodamientoService
+    
+    db = SessionLocal()
+    try:
+        resultado = RodamientoService.recalcular_flota(db, modo=args.modo, tolerancia=args.tolerancia)
+    finally:
+        db.close()
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    return 1 if args.modo == "validar" and resultado["total_discrepancias"] else 0
+
+def migrar(args) -> int:
+    """Aplica las migraciones pendientes del esquema"""
+    from backend.app.core.database import engine_directo
+    from backend.app.core.migraciones import VERSION_ACTUAL, aplicar_migraciones, version_esquema
+    
+    if args.estado:
+        with engine_directo.connect() as conn:
+            print(f"Versión aplicada: {version_esquema(conn)} / última: {VERSION_ACTUAL}")
+        return 0
+    aplicar_migraciones(engine_directo)
+    return 0
+
+def particiones(args) -> int:
+    """Lista, crea por adelantado o retira (retención) las particiones mensuales del historial"""
+    from backend.app.core.database import engine
+    from backend.app.services.particion_service import ParticionService, inicio_mes, sumar_meses
+    
+    if args.accion_particiones == "listar":
+        with engine.connect() as conn:
+            for p in ParticionService.listar(conn):
+                print(f"{p['nombre']:<32} {p['mes']:%Y-%m}  ~{p['filas_estimadas']} filas")
+        return 0
+    if args.accion_particiones == "crear":
+        hasta = sumar_meses(inicio_mes(datetime.utcnow()), args.meses) if args.meses is not None else None
+        with engine.begin() as conn:
+            creadas = ParticionService.asegurar_particiones(conn, hasta=hasta)
+        print(f"Particiones creadas: {', '.join(creadas) or 'ninguna'}")
+        return 0
+    resultado = ParticionService.aplicar_retencion(meses=args.meses, accion=args.accion, simular=args.simular)
+    print(json.dumps(resultado, ensure_ascii=False, indent=2, default=str))
+    return 0
+
+def reconstruir_consumo(args) -> int:
+    """Recalcula el agregado consumo_diario desde el historial"""
+    from backend.app.services.consumo_service import ConsumoService
+    
+    db = SessionLocal()
+    try:
+        filas = ConsumoService.reconstruir(db, desde=args.desde)
+    finally:
+        db.close()
+    print(f"consumo_diario: {filas} filas")
+    return 0
+
+def purgar_idempotencia(args) -> int:
+    """Elimina las claves de idempotencia vencidas"""
+    from backend.app.services.idempotencia_service import IdempotenciaService
+    
+    db = SessionLocal()
+    try:
+        borradas = IdempotenciaService.purgar(db)
+    finally:
+        db.close()
+    print(f"Claves de idempotencia eliminadas: {borradas}")
+    return 0
+
+def explicar(args) -> int:
+    """Reporta el EXPLAIN de cada consulta de los servicios; falla si alguna hace Seq Scan"""
+    from backend.app.services.explain_service import ExplainService
+    
+    db = SessionLocal()
+    try:
+        reporte = ExplainService.revisar(db, analyze=args.analyze, forzar_indices=not args.sin_forzar)
+    finally:
+        db.close()
+    
+    if args.json:
+        print(json.dumps(reporte, ensure_ascii=False, indent=2))
+    else:
+        for r in reporte:
+            if r["seq_scans"]:
+                marca = "SEQ SCAN " + ", ".join(r["seq_scans"])
+            elif r["seq_scans_permitidos"]:
+                marca = "ok (Seq Scan buscado: " + ", ".join(r["seq_scans_permitidos"]) + ")"
+            else:
+                marca = "ok"
+            print(f"{r['consulta']:<26} {marca}")
+            for nodo in r["nodos"]:
+                print(f"    {nodo}")
+    return 1 if any(r["seq_scans"] for r in reporte) else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.app.cli")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    
+    p = comandos.add_parser("importar", help="Importar equipos desde CSV/XLSX")
+    p.add_argument("archivo")
+    p.add_argument("--upsert", action="store_true", help="Actualizar equipos existentes por nombre")
+    p.add_argument("--chunk", type=int, default=1000, help="Filas por transacción")
+    p.set_defaults(func=importar)
+    
+    p = comandos.add_parser("recalcular-gramos", help="Cantidad SKF de la flota desde modelo_rodamiento")
+    p.add_argument("--modo", choices=["completar", "validar", "sobrescribir"], default="completar")
+    p.add_argument("--tolerancia", type=float, default=0.1, help="Desvío relativo aceptado al validar")
+    p.set_defaults(func=recalcular_gramos)
+    
+    p = comandos.add_parser("migrar", help="Aplicar migraciones pendientes del esquema")
+    p.add_argument("--estado", action="store_true", help="Solo mostrar la versión aplicada")
+    p.set_defaults(func=migrar)
+    
+    p = comandos.add_parser("particiones", help="Particiones mensuales del historial de lubricación")
+    acciones = p.add_subparsers(dest="accion_particiones", required=True)
+    acciones.add_parser("listar", help="Particiones actuales y filas estimadas")
+    a = acciones.add_parser("crear", help="Crear las particiones de los próximos meses")
+    a.add_argument("--meses", type=int, help="Meses por adelantado (por defecto HISTORIAL_PARTICIONES_ADELANTE)")
+    a = acciones.add_parser("retencion", help="Resumir y retirar las particiones vencidas")
+    a.add_argument("--meses", type=int, help="Meses a conservar (por defecto HISTORIAL_RETENCION_MESES)")
+    a.add_argument("--accion", choices=["detach", "archivar", "eliminar"], help="Por defecto HISTORIAL_RETENCION_ACCION")
+    a.add_argument("--simular", action="store_true", help="Solo listar las particiones que se retirarían")
+    p.set_defaults(func=particiones)
+    
+    p = comandos.add_parser("reconstruir-consumo", help="Recalcular consumo_diario desde el historial")
+    p.add_argument("--desde", type=date.fromisoformat, help="Solo desde esta fecha (AAAA-MM-DD); por defecto todo")
+    p.set_defaults(func=reconstruir_consumo)
+    
+    p = comandos.add_parser("purgar-idempotencia", help="Eliminar las claves de idempotencia vencidas")
+    p.set_defaults(func=purgar_idempotencia)
+    
+    p = comandos.add_parser("explicar", help="EXPLAIN de las consultas de los servicios")
+    p.add_argument("--analyze", action="store_true", help="Usar EXPLAIN ANALYZE")
+    p.add_argument("--sin-forzar", action="store_true", help="No desactivar enable_seqscan")
+    p.add_argument("--json", action="store_true", help="Salida en JSON")
+    p.set_defaults(func=explicar)
+    
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Caché en memoria del proceso
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from starlette.requests import Request
+from starlette.responses import Response
+from backend.app.core.config import settings
+
+class TTLCache:
+    """Caché acotado con expiración por tiempo y desalojo LRU"""
+    
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Retorna el valor vigente o None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expira, value = item
+            if expira < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _etag(cuerpo: bytes) -> str:
+    return '"' + hashlib.sha1(cuerpo).hexdigest() + '"'
+
+class ResponseCache:
+    """
+    Caché LRU de respuestas serializadas, invalidado por un contador de versión por planta.
+    Las escrituras llaman invalidar(planta); una entrada guardada con una versión anterior
+    deja de servirse. invalidar() sin plantas sube una época global que forma parte de toda
+    versión, así que alcanza también a plantas que este proceso nunca invalidó. Los cambios de otros procesos llegan por LISTEN/NOTIFY; el TTL acota lo
+    que puede quedar desactualizado si esa escucha se cae.
+    """
+    
+    def __init__(self, ttl_seconds: float, max_entries: int = 512):
+        self._entradas = TTLCache(ttl_seconds, max_entries)
+        self._epoca = 0
+        self._epoca_en = float("-inf")
+        self._versiones = {}
+        self._invalidaciones = {}
+        self._lock = threading.Lock()
+    
+    def version(self, planta: str = None) -> tuple:
+        """(época global, versión de la planta)"""
+        # planta=None (todas las plantas) usa la versión global, que sube con cualquier cambio
+        return self._epoca, self._versiones.get(planta, 0)
+    
+    def invalidar(self, *plantas: str):
+        """Invalida las respuestas de las plantas dadas (sin argumentos: todas)"""
+        with self._lock:
+            ahora = time.monotonic()
+            if not plantas:
+                self._epoca += 1
+                self._epoca_en = ahora
+                return
+            # Acepta PlantaEnum o str: las claves son el valor plano ("TREN_1")
+            for planta in {getattr(p, "value", p) for p in plantas} | {None}:
+                self._versiones[planta] = self._versiones.get(planta, 0) + 1
+                self._invalidaciones[planta] = ahora
+    
+    def invalidada_hace(self, planta: str = None) -> float:
+        """Segundos desde la última invalidación de la planta o de todas (inf si nunca)"""
+        return time.monotonic() - max(self._invalidaciones.get(planta, float("-inf")), self._epoca_en)
+    
+    def suscribir_cambios(self, despachador):
+        """Invalida también ante los cambios de otros procesos (eventos de core/notificaciones.py)"""
+        despachador.suscribir(lambda evento: self.invalidar(*filter(None, [evento["p"]])))
+    
+    def get(self, clave, planta: str = None):
+        """Retorna (etag, cuerpo, headers) si la entrada sigue vigente para la versión actual"""
+        entrada = self._entradas.get(clave)
+        if entrada is None or entrada[0] != self.version(planta):
+            return None
+        return entrada[1:]
+    
+    def set(self, clave, version: tuple, cuerpo: bytes, headers: dict = None) -> str:
+        etag = _etag(cuerpo)
+        self._entradas.set(clave, (version, etag, cuerpo, headers or {}))
+        return etag
+
+
+cache_respuestas = ResponseCache(
+    ttl_seconds=settings.RESPONSE_CACHE_TTL,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+)
+
+async def responder_con_cache(request: Request, planta: Optional[str], producir) -> Response:
+    """
+    Sirve una lectura desde cache_respuestas con ETag fuerte.
+    `producir` es una corrutina que retorna (cuerpo_json_bytes, headers) y solo se ejecuta
+    si no hay entrada vigente. If-None-Match con el ETag vigente responde 304 sin tocar la BD.
+    """
+    clave = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    entrada = cache_respuestas.get(clave, planta)
+    if entrada is None:
+        # La versión se lee antes de consultar: si una escritura llega durante la consulta,
+        # la entrada nace desactualizada y no se sirve
+        version = cache_respuestas.version(planta)
+        cuerpo, headers = await producir()
+        if (
+            getattr(request.state, "replica", False)
+            and cache_respuestas.invalidada_hace(planta) < settings.REPLICA_PRIMARIO_SEGUNDOS
+        ):
+            # Leída de una réplica justo después de un cambio: puede no incluirlo todavía y
+            # guardada con la versión nueva se serviría atrasada hasta el TTL
+            etag = _etag(cuerpo)
+        else:
+            etag = cache_respuestas.set(clave, version, cuerpo, headers)
+    else:
+        etag, cuerpo, headers = entrada
+    
+    headers = {**headers, "ETag": etag, "Cache-Control": "private, no-cache"}
+    candidatos = [t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")]
+    if etag in candidatos:
+        return Response(status_code=304, headers=headers)
+    return Response(content=cuerpo, media_type="application/json", headers=headers)
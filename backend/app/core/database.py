@@ -1,34 +1,79 @@
 """
 Configuración de la base de datos PostgreSQL con SQLAlchemy
 """
-from sqlalchemy import create_engine
+import itertools
+import uuid
+from fastapi import Request
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 from .config import settings
+from .metricas import AsyncQueuePoolMedido, QueuePoolMedido, colector_pool, instrumentar_engine
+from .notificaciones import despachar_al_confirmar
+from .presupuesto import vigilar_cargas_perezosas
+from .replicas import leer_del_primario, replica_urls
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Crear engine con SSL y parámetros para mejor conectividad en Render
+# SSL y keepalives para mejor conectividad en Render (psycopg2 no prepara sentencias del
+# lado del servidor, así que vale igual detrás de PgBouncer/Supavisor)
 connect_args = {
-    "connect_timeout": 10,
+    "connect_timeout": settings.DB_CONNECT_TIMEOUT,
     "keepalives": 1,
     "keepalives_idle": 30,
     "keepalives_interval": 10,
     "keepalives_count": 5,
-    "sslmode": "require",
+    "sslmode": settings.DB_SSLMODE,
 }
 
+def _connect_args_async() -> dict:
+    """
+    connect_args de asyncpg. Con DB_POOLER_TRANSACCIONAL cada transacción puede caer en
+    otra conexión física: sin caché de sentencias (de asyncpg ni de SQLAlchemy) y con nombres
+    únicos para las que asyncpg prepara igualmente, que así no chocan entre clientes.
+    """
+    if settings.DB_POOLER_TRANSACCIONAL:
+        cache = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4().hex}__",
+        }
+    else:
+        cache = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return {"timeout": settings.DB_CONNECT_TIMEOUT, "ssl": settings.DB_SSLMODE, **cache}
+
+def _opciones_pool(pool_size: int, max_overflow: int) -> dict:
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
 engine = create_engine(
     settings.DATABASE_URL,
     echo=False,
-    pool_size=5,
-    max_overflow=10,
-    pool_pre_ping=True,
-    pool_recycle=3600,
+    poolclass=QueuePoolMedido,
     connect_args=connect_args,
+    **_opciones_pool(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW),
 )
 
+# Conexiones de sesión fuera del pooler (LISTEN/NOTIFY, migraciones): DATABASE_DIRECT_URL
+# sin pool propio, o el mismo engine si la aplicación ya conecta directo
+if settings.DATABASE_DIRECT_URL:
+    engine_directo = create_engine(
+        settings.DATABASE_DIRECT_URL, echo=False, poolclass=NullPool, connect_args=connect_args
+    )
+else:
+    engine_directo = engine
+
 # Crear sesión
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -36,6 +81,67 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+def _async_url(url: str):
+    """Misma base de datos con el driver asyncpg (sslmode va en connect_args, no en la URL)"""
+    url = make_url(url)
+    return url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+
+# Engine asíncrono (asyncpg) para las rutas de lectura `async def`
+async_engine = create_async_engine(
+    _async_url(settings.DATABASE_URL),
+    echo=False,
+    poolclass=AsyncQueuePoolMedido,
+    connect_args=_connect_args_async(),
+    **_opciones_pool(settings.ASYNC_POOL_SIZE, settings.ASYNC_MAX_OVERFLOW),
+)
+
+# Consultas, tiempo de BD por petición y estado de los pools para /metrics
+instrumentar_engine(engine, "sync")
+instrumentar_engine(async_engine.sync_engine, "async")
+colector_pool.registrar("sync", engine)
+colector_pool.registrar("async", async_engine.sync_engine)
+# Las AsyncSession delegan en Session, así que esto cubre ambos caminos
+vigilar_cargas_perezosas(Session)
+# Los eventos de notificar() se despachan en este proceso al confirmar la transacción
+despachar_al_confirmar(Session)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Réplicas de lectura (DATABASE_REPLICA_URLS): un engine sync y uno asyncpg por réplica.
+# Las rutas de solo lectura las reparten en rotación (get_db_lectura/get_async_db_lectura)
+replicas = []
+engines_replica = []
+for i, url in enumerate(replica_urls()):
+    replica = create_engine(
+        url,
+        echo=False,
+        poolclass=QueuePoolMedido,
+        connect_args=connect_args,
+        **_opciones_pool(settings.REPLICA_POOL_SIZE, settings.REPLICA_MAX_OVERFLOW),
+    )
+    replica_async = create_async_engine(
+        _async_url(url),
+        echo=False,
+        poolclass=AsyncQueuePoolMedido,
+        connect_args=_connect_args_async(),
+        **_opciones_pool(settings.REPLICA_POOL_SIZE, settings.REPLICA_MAX_OVERFLOW),
+    )
+    instrumentar_engine(replica, "replica")
+    instrumentar_engine(replica_async.sync_engine, "replica_async")
+    colector_pool.registrar(f"replica{i}", replica)
+    colector_pool.registrar(f"replica{i}_async", replica_async.sync_engine)
+    engines_replica.append((replica, replica_async))
+    replicas.append((
+        sessionmaker(autocommit=False, autoflush=False, bind=replica),
+        async_sessionmaker(replica_async, class_=AsyncSession, autoflush=False, expire_on_commit=False),
+    ))
+_turno_replica = itertools.count()
+
 # Base para los modelos
 Base = declarative_base()
 
@@ -49,13 +155,49 @@ def get_db() -> Session:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncSession:
+    """
+    Dependencia para obtener sesión asíncrona de base de datos
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def sesiones_lectura(request: Request) -> tuple:
+    """
+    (sessionmaker, async_sessionmaker) para una lectura: la réplica de turno, o el primario
+    si no hay réplicas o el cliente escribió hace poco (core/replicas.py)
+    """
+    if not replicas or leer_del_primario(request):
+        return SessionLocal, AsyncSessionLocal
+    # Marca para responder_con_cache: lo leído de una réplica puede venir atrasado
+    request.state.replica = True
+    return replicas[next(_turno_replica) % len(replicas)]
+
+def get_db_lectura(request: Request) -> Session:
+    """
+    Dependencia para endpoints de solo lectura: sesión en una réplica si corresponde
+    """
+    db = sesiones_lectura(request)[0]()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db_lectura(request: Request) -> AsyncSession:
+    """
+    Dependencia asíncrona para endpoints de solo lectura: sesión en una réplica si corresponde
+    """
+    async with sesiones_lectura(request)[1]() as db:
+        yield db
+
 def init_db():
     """
-    Inicializa la base de datos creando todas las tablas
+    Lleva el esquema de la base de datos a la última versión (ver core/migraciones.py)
     """
+    from .migraciones import aplicar_migraciones
     try:
-        Base.metadata.create_all(bind=engine)
+        aplicar_migraciones(engine_directo)
         logger.info("Base de datos inicializada correctamente")
     except Exception as e:
         logger.error(f"Error al inicializar la base de datos: {str(e)}")
-        raise
\ No newline at end of file
+        raise
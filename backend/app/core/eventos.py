@@ -0,0 +1,83 @@
+"""
+Hub de eventos en el proceso para los clientes conectados por SSE (GET /api/eventos)
+
+Cada conexión tiene su asyncio.Queue en el loop de su petición. publicar() puede llamarse
+desde cualquier hilo (el del despachador de core/notificaciones.py): entrega el mensaje ya
+formateado con loop.call_soon_threadsafe a las conexiones de esa planta. Una conexión
+que no consume y llena su cola recibe un evento "recarga" en lugar de los pendientes.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+def formatear(nombre: str, datos: bytes, id_evento: int = None) -> bytes:
+    """Mensaje text/event-stream; `datos` es JSON en una sola línea"""
+    cabecera = f"event: {nombre}\n" + (f"id: {id_evento}\n" if id_evento is not None else "")
+    return cabecera.encode() + b"data: " + datos + b"\n\n"
+
+MENSAJE_RECARGA = formatear("recarga", b"{}")
+
+class HubEventos:
+    
+    def __init__(self, max_cola: int = 100):
+        self.max_cola = max_cola
+        self._conexiones: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Queue, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._secuencia = itertools.count(1)
+    
+    @asynccontextmanager
+    async def conectar(self, planta: str = None):
+        """Registra una conexión (planta None = todas) y entrega su cola de mensajes"""
+        cola = asyncio.Queue(maxsize=self.max_cola)
+        clave = next(self._ids)
+        with self._lock:
+            self._conexiones[clave] = (asyncio.get_running_loop(), cola, planta)
+        try:
+            yield cola
+        finally:
+            with self._lock:
+                self._conexiones.pop(clave, None)
+    
+    @property
+    def conexiones(self) -> int:
+        return len(self._conexiones)
+    
+    def plantas_conectadas(self) -> Set[Optional[str]]:
+        """Plantas con al menos una conexión (None si alguna escucha todas)"""
+        with self._lock:
+            return {planta for _, _, planta in self._conexiones.values()}
+    
+    def publicar(self, planta: Optional[str], nombre: str, datos: bytes):
+        """Envía el evento a las conexiones de `planta` (None: las que escuchan todas)"""
+        mensaje = formatear(nombre, datos, next(self._secuencia))
+        with self._lock:
+            destinos = [(loop, cola) for loop, cola, p in self._conexiones.values() if p == planta]
+        for loop, cola in destinos:
+            try:
+                loop.call_soon_threadsafe(self._encolar, cola, mensaje)
+            except RuntimeError:
+                # El loop de esa conexión ya cerró
+                pass
+    
+    def publicar_a_todas(self, nombre: str, datos: bytes):
+        for planta in self.plantas_conectadas():
+            self.publicar(planta, nombre, datos)
+    
+    @staticmethod
+    def _encolar(cola: asyncio.Queue, mensaje: bytes):
+        if cola.full():
+            # Cliente lento: descarta lo pendiente y le pide que recargue todo
+            while not cola.empty():
+                cola.get_nowait()
+            mensaje = MENSAJE_RECARGA
+        cola.put_nowait(mensaje)
+
+hub_eventos = HubEventos(max_cola=settings.SSE_MAX_COLA)
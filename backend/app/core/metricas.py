@@ -0,0 +1,254 @@
+"""
+Métricas de la aplicación en formato Prometheus
+
+- MetricasMiddleware: latencia, tamaño de petición/respuesta y código de estado por ruta,
+  más las consultas y el tiempo de base de datos de cada petición.
+- instrumentar_engine: eventos de SQLAlchemy que alimentan esos contadores por petición.
+- QueuePoolMedido / AsyncQueuePoolMedido: miden la espera para obtener una conexión del pool;
+  ColectorPool exporta ocupación y overflow de cada pool al momento del scrape.
+"""
+import logging
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_BYTES = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LATENCIA_HTTP = Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP",
+    ["method", "route", "status"], buckets=BUCKETS_LATENCIA,
+)
+PETICIONES_HTTP = Counter(
+    "http_requests_total", "Peticiones HTTP atendidas", ["method", "route", "status"],
+)
+TAMANO_PETICION = Histogram(
+    "http_request_size_bytes", "Tamaño del cuerpo de la petición", ["method", "route"], buckets=BUCKETS_BYTES,
+)
+TAMANO_RESPUESTA = Histogram(
+    "http_response_size_bytes", "Tamaño del cuerpo de la respuesta", ["method", "route"], buckets=BUCKETS_BYTES,
+)
+CONSULTAS_POR_PETICION = Histogram(
+    "db_queries_per_request", "Consultas SQL emitidas por petición", ["route"], buckets=BUCKETS_CONSULTAS,
+)
+TIEMPO_DB_POR_PETICION = Histogram(
+    "db_time_per_request_seconds", "Tiempo en la base de datos por petición", ["route"], buckets=BUCKETS_LATENCIA,
+)
+DURACION_CONSULTA = Histogram(
+    "db_query_duration_seconds", "Duración de cada consulta SQL", ["engine"], buckets=BUCKETS_LATENCIA,
+)
+ESPERA_POOL = Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool", ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+TIMEOUTS_POOL = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts que agotaron pool_timeout", ["pool"],
+)
+
+@dataclass
+class ActividadDB:
+    """Consultas emitidas durante una petición"""
+    consultas: int = 0
+    tiempo: float = 0.0
+    # (duración, sql) solo si el log de peticiones lentas o el presupuesto de consultas lo piden
+    sentencias: List[Tuple[float, str]] = field(default_factory=list)
+    registrar_sql: bool = False
+    # Relaciones cargadas de forma perezosa ("PlanLubricacion.equipo"), ver core/presupuesto.py
+    cargas_perezosas: List[str] = field(default_factory=list)
+    # Bloques escritos por endpoints con presupuesto por bloque (contar_bloque)
+    bloques: int = 0
+
+# Los hilos del threadpool y los greenlets de SQLAlchemy async heredan el contexto de la
+# petición, así que todas las consultas de una petición suman sobre el mismo objeto
+_actividad: ContextVar[Optional[ActividadDB]] = ContextVar("actividad_db", default=None)
+
+def actividad_actual() -> Optional[ActividadDB]:
+    return _actividad.get()
+
+def iniciar_actividad(registrar_sql: bool = False) -> Tuple[ActividadDB, Optional[Token]]:
+    """
+    Retorna la actividad en curso o abre una nueva. El token solo es distinto de None
+    si se abrió aquí: quien lo recibe debe cerrarla con terminar_actividad(token).
+    """
+    actividad = _actividad.get()
+    if actividad is not None:
+        actividad.registrar_sql = actividad.registrar_sql or registrar_sql
+        return actividad, None
+    actividad = ActividadDB(registrar_sql=registrar_sql)
+    return actividad, _actividad.set(actividad)
+
+def terminar_actividad(token: Optional[Token]):
+    if token is not None:
+        _actividad.reset(token)
+
+def instrumentar_engine(engine: Engine, nombre: str):
+    """Registra los eventos que miden cada consulta del engine (sync o async.sync_engine)"""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        duracion = time.perf_counter() - conn.info["metricas_inicio"].pop()
+        DURACION_CONSULTA.labels(nombre).observe(duracion)
+        actividad = _actividad.get()
+        if actividad is not None:
+            actividad.consultas += 1
+            actividad.tiempo += duracion
+            if actividad.registrar_sql:
+                actividad.sentencias.append((duracion, statement))
+    
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        # La consulta falló: after_cursor_execute no se ejecutará
+        inicios = contexto.connection.info.get("metricas_inicio") if contexto.connection is not None else None
+        if inicios:
+            inicios.pop()
+
+class QueuePoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout por una conexión libre"""
+    ETIQUETA = "sync"
+    
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            TIMEOUTS_POOL.labels(self.ETIQUETA).inc()
+            raise
+        finally:
+            ESPERA_POOL.labels(self.ETIQUETA).observe(time.perf_counter() - inicio)
+
+class AsyncQueuePoolMedido(QueuePoolMedido, AsyncAdaptedQueuePool):
+    ETIQUETA = "async"
+
+class ColectorPool:
+    """Exporta el estado de los pools registrados en cada scrape"""
+    
+    def __init__(self):
+        self.engines = {}
+    
+    def registrar(self, nombre: str, engine: Engine):
+        self.engines[nombre] = engine
+    
+    def collect(self):
+        tamano = GaugeMetricFamily("db_pool_size", "Conexiones base del pool", labels=["pool"])
+        en_uso = GaugeMetricFamily("db_pool_checked_out", "Conexiones prestadas", labels=["pool"])
+        libres = GaugeMetricFamily("db_pool_checked_in", "Conexiones libres en el pool", labels=["pool"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Conexiones abiertas por encima de pool_size", labels=["pool"])
+        for nombre, engine in self.engines.items():
+            pool = engine.pool
+            if not isinstance(pool, QueuePool):
+                continue
+            tamano.add_metric([nombre], pool.size())
+            en_uso.add_metric([nombre], pool.checkedout())
+            libres.add_metric([nombre], pool.checkedin())
+            # overflow() es negativo mientras el pool no llegó a pool_size
+            overflow.add_metric([nombre], max(pool.overflow(), 0))
+        yield from (tamano, en_uso, libres, overflow)
+    
+    def estado(self) -> dict:
+        """Ocupación actual de cada pool (para /api/health/ready)"""
+        pools = {}
+        for nombre, engine in self.engines.items():
+            pool = engine.pool
+            if not isinstance(pool, QueuePool):
+                continue
+            maximo = pool.size() + max(pool._max_overflow, 0)
+            pools[nombre] = {
+                "tamano": pool.size(),
+                "en_uso": pool.checkedout(),
+                "libres": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "maximo": maximo,
+                "utilizacion": round(pool.checkedout() / maximo, 3) if maximo else 0.0,
+            }
+        return pools
+
+colector_pool = ColectorPool()
+REGISTRY.register(colector_pool)
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI: mide cada petición HTTP hasta el último fragmento de la respuesta
+    (incluye el streaming de las exportaciones) y la actividad de base de datos asociada.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        umbral_lento = settings.METRICAS_SLOW_REQUEST_MS
+        actividad, token = iniciar_actividad(registrar_sql=umbral_lento > 0)
+        estado = {"status": 500, "bytes_peticion": 0, "bytes_respuesta": 0}
+        
+        async def receive_medido():
+            mensaje = await receive()
+            if mensaje["type"] == "http.request":
+                estado["bytes_peticion"] += len(mensaje.get("body", b""))
+            return mensaje
+        
+        async def send_medido(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["status"] = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                estado["bytes_respuesta"] += len(mensaje.get("body", b""))
+            await send(mensaje)
+        
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive_medido, send_medido)
+        finally:
+            duracion = time.perf_counter() - inicio
+            terminar_actividad(token)
+            self._registrar(scope, estado, duracion, actividad, umbral_lento)
+    
+    @staticmethod
+    def _ruta(scope) -> str:
+        # Plantilla de la ruta ("/api/equipos/{equipo_id}") para acotar la cardinalidad
+        ruta = scope.get("route")
+        if ruta is not None:
+            return ruta.path
+        endpoint = scope.get("endpoint")
+        for candidata in getattr(scope.get("app"), "routes", ()):
+            if getattr(candidata, "endpoint", None) is endpoint and endpoint is not None:
+                return candidata.path
+        return "sin_ruta"
+    
+    def _registrar(self, scope, estado, duracion, actividad: ActividadDB, umbral_lento: float):
+        metodo = scope["method"]
+        ruta = self._ruta(scope)
+        status = str(estado["status"])
+        
+        LATENCIA_HTTP.labels(metodo, ruta, status).observe(duracion)
+        PETICIONES_HTTP.labels(metodo, ruta, status).inc()
+        TAMANO_PETICION.labels(metodo, ruta).observe(estado["bytes_peticion"])
+        TAMANO_RESPUESTA.labels(metodo, ruta).observe(estado["bytes_respuesta"])
+        CONSULTAS_POR_PETICION.labels(ruta).observe(actividad.consultas)
+        TIEMPO_DB_POR_PETICION.labels(ruta).observe(actividad.tiempo)
+        
+        if umbral_lento > 0 and duracion * 1000 >= umbral_lento:
+            sentencias = "\n".join(
+                f"  [{d * 1000:.1f} ms] {' '.join(sql.split())}"
+                for d, sql in actividad.sentencias[:settings.METRICAS_SLOW_MAX_SQL]
+            )
+            logger.warning(
+                f"Petición lenta {metodo} {scope['path']} ({ruta}) {status}: {duracion * 1000:.1f} ms, "
+                f"{actividad.consultas} consultas, {actividad.tiempo * 1000:.1f} ms en BD\n{sentencias}"
+            )
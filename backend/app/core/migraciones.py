@@ -0,0 +1,210 @@
+"""
+Migraciones versionadas del esquema
+
+Cada migración se aplica una sola vez y queda registrada en schema_version.
+Un proceso con el esquema al día solo paga un SELECT; si hay pendientes, las
+aplica dentro de una transacción protegida por un advisory lock, de modo que
+varios workers arrancando a la vez no compiten por el DDL.
+
+Las migraciones nuevas se agregan al final de MIGRACIONES con la versión siguiente
+y deben ser idempotentes (IF NOT EXISTS): la 1 crea el esquema desde los modelos
+actuales, así que en una base nueva las posteriores encuentran sus objetos creados.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import ProgrammingError
+import logging
+
+from .database import Base
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock (cualquier bigint fijo propio de la aplicación)
+LOCK_MIGRACIONES = 7_316_001
+
+def _esquema_inicial(conn: Connection):
+    import backend.app.models  # noqa: F401  registra todas las tablas en Base.metadata
+    Base.metadata.create_all(bind=conn)
+
+def _columna_planta(conn: Connection):
+    conn.execute(text(
+        "ALTER TABLE equipos ADD COLUMN IF NOT EXISTS planta VARCHAR(10) NOT NULL DEFAULT 'TREN_1'"
+    ))
+
+def _indices_compuestos(conn: Connection):
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS ix_equipos_planta_estado_nombre "
+        "ON equipos (planta, estado, nombre, id)",
+        "CREATE INDEX IF NOT EXISTS ix_equipos_activos_nombre "
+        "ON equipos (nombre, id) WHERE estado = 'ACTIVO'",
+        "CREATE INDEX IF NOT EXISTS ix_planes_proxima_fecha_id "
+        "ON planes_lubricacion (proxima_fecha_lubricacion, id)",
+        "CREATE INDEX IF NOT EXISTS ix_planes_equipo_proxima "
+        "ON planes_lubricacion (equipo_id, proxima_fecha_lubricacion) "
+        "INCLUDE (id, tipo_lubricante, cantidad_gramos, frecuencia_dias, ultima_fecha_lubricacion)",
+        "CREATE INDEX IF NOT EXISTS ix_historial_plan_fecha "
+        "ON historial_lubricacion (plan_id, fecha_ejecucion DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_historial_fecha_id "
+        "ON historial_lubricacion (fecha_ejecucion DESC, id DESC)",
+    ):
+        conn.execute(text(sql))
+    for obsoleto in (
+        "ix_equipos_id",
+        "ix_equipos_planta",
+        "ix_planes_lubricacion_id",
+        "ix_planes_lubricacion_equipo_id",
+        "ix_historial_lubricacion_id",
+        "ix_historial_lubricacion_plan_id",
+        "ix_historial_lubricacion_fecha_ejecucion",
+    ):
+        conn.execute(text(f"DROP INDEX IF EXISTS {obsoleto}"))
+
+def _historial_particionado(conn: Connection):
+    """
+    Convierte historial_lubricacion en tabla particionada por mes (PK (id, fecha_ejecucion)).
+    Las filas existentes se copian a sus particiones; la secuencia de id se conserva.
+    Con millones de filas conviene correrla fuera del arranque (MIGRAR_AL_INICIAR=false).
+    """
+    from backend.app.models.historial_resumen import HistorialResumenMensual
+    from backend.app.services.particion_service import ParticionService
+    
+    particionada = conn.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = 'historial_lubricacion'::regclass"
+    )).scalar()
+    if not particionada:
+        for sql in (
+            "ALTER TABLE historial_lubricacion RENAME TO historial_lubricacion_anterior",
+            "ALTER TABLE historial_lubricacion_anterior "
+            "RENAME CONSTRAINT historial_lubricacion_pkey TO historial_lubricacion_anterior_pkey",
+            "DROP INDEX IF EXISTS ix_historial_plan_fecha",
+            "DROP INDEX IF EXISTS ix_historial_fecha_id",
+            "CREATE TABLE historial_lubricacion ("
+            " id INTEGER NOT NULL DEFAULT nextval('historial_lubricacion_id_seq'),"
+            " plan_id INTEGER NOT NULL REFERENCES planes_lubricacion (id) ON DELETE CASCADE,"
+            " fecha_ejecucion TIMESTAMP NOT NULL,"
+            " cantidad_aplicada FLOAT NOT NULL,"
+            " tecnico VARCHAR(100) NOT NULL,"
+            " observaciones TEXT,"
+            " created_at TIMESTAMP NOT NULL,"
+            " PRIMARY KEY (id, fecha_ejecucion)"
+            ") PARTITION BY RANGE (fecha_ejecucion)",
+            "ALTER SEQUENCE historial_lubricacion_id_seq OWNED BY historial_lubricacion.id",
+        ):
+            conn.execute(text(sql))
+        
+        desde, hasta = conn.execute(text(
+            "SELECT min(fecha_ejecucion), max(fecha_ejecucion) FROM historial_lubricacion_anterior"
+        )).one()
+        ParticionService.asegurar_particiones(conn, desde=desde)
+        if hasta is not None:
+            # Ejecuciones cargadas a futuro más allá de la ventana por adelantado
+            ParticionService.asegurar_particiones(conn, desde=desde, hasta=hasta)
+        copiadas = conn.execute(text(
+            "INSERT INTO historial_lubricacion "
+            "(id, plan_id, fecha_ejecucion, cantidad_aplicada, tecnico, observaciones, created_at) "
+            "SELECT id, plan_id, fecha_ejecucion, cantidad_aplicada, tecnico, observaciones, created_at "
+            "FROM historial_lubricacion_anterior"
+        )).rowcount
+        conn.execute(text("DROP TABLE historial_lubricacion_anterior"))
+        # Índices al final: crearlos sobre las particiones ya cargadas es más rápido
+        for sql in (
+            "CREATE INDEX IF NOT EXISTS ix_historial_plan_fecha "
+            "ON historial_lubricacion (plan_id, fecha_ejecucion DESC, id DESC)",
+            "CREATE INDEX IF NOT EXISTS ix_historial_fecha_id "
+            "ON historial_lubricacion (fecha_ejecucion DESC, id DESC)",
+        ):
+            conn.execute(text(sql))
+        logger.info(f"historial_lubricacion particionada: {copiadas} filas migradas")
+    
+    HistorialResumenMensual.__table__.create(bind=conn, checkfirst=True)
+    ParticionService.asegurar_particiones(conn)
+
+def _consumo_diario(conn: Connection):
+    """Crea el agregado consumo_diario y lo llena desde el historial existente"""
+    from sqlalchemy.orm import Session
+    from backend.app.models.consumo import ConsumoDiario
+    from backend.app.services.consumo_service import ConsumoService
+    
+    ConsumoDiario.__table__.create(bind=conn, checkfirst=True)
+    if conn.execute(text("SELECT NOT EXISTS (SELECT 1 FROM consumo_diario)")).scalar():
+        # La sesión se une a la transacción de la migración: su commit no la cierra
+        with Session(bind=conn) as db:
+            ConsumoService.reconstruir(db)
+
+def _indices_sync(conn: Connection):
+    """Índices por fecha de modificación para /api/sync (en la tabla particionada se propagan)"""
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS ix_equipos_updated_id ON equipos (updated_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_planes_updated_id ON planes_lubricacion (updated_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_historial_created_id ON historial_lubricacion (created_at, id)",
+    ):
+        conn.execute(text(sql))
+
+def _idempotencia_y_version(conn: Connection):
+    """Tabla claves_idempotencia y columna version de los planes"""
+    from backend.app.models.idempotencia import ClaveIdempotencia
+    
+    ClaveIdempotencia.__table__.create(bind=conn, checkfirst=True)
+    conn.execute(text(
+        "ALTER TABLE planes_lubricacion ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1"
+    ))
+
+def _id_cliente_historial(conn: Connection):
+    """Columna id_cliente del historial e índice único (id_cliente, fecha_ejecucion)"""
+    for sql in (
+        "ALTER TABLE historial_lubricacion ADD COLUMN IF NOT EXISTS id_cliente UUID",
+        # Las filas anteriores quedan en NULL: no chocan entre sí
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_historial_id_cliente "
+        "ON historial_lubricacion (id_cliente, fecha_ejecucion)",
+    ):
+        conn.execute(text(sql))
+
+MIGRACIONES = [
+    (1, "esquema_inicial", _esquema_inicial),
+    (2, "columna_planta", _columna_planta),
+    (3, "indices_compuestos", _indices_compuestos),
+    (4, "historial_particionado", _historial_particionado),
+    (5, "consumo_diario", _consumo_diario),
+    (6, "indices_sync", _indices_sync),
+    (7, "idempotencia_y_version", _idempotencia_y_version),
+    (8, "id_cliente_historial", _id_cliente_historial),
+]
+
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+def version_esquema(conn: Connection) -> int:
+    """Versión aplicada (0 si la tabla schema_version todavía no existe)"""
+    try:
+        with conn.begin_nested():
+            return conn.execute(text("SELECT max(version) FROM schema_version")).scalar() or 0
+    except ProgrammingError:
+        return 0
+
+def aplicar_migraciones(engine: Engine) -> int:
+    """Aplica las migraciones pendientes y retorna la versión final del esquema"""
+    with engine.begin() as conn:
+        if version_esquema(conn) >= VERSION_ACTUAL:
+            return VERSION_ACTUAL
+    
+    with engine.begin() as conn:
+        # Lock de transacción: se libera con el COMMIT y funciona detrás de PgBouncer
+        conn.execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": LOCK_MIGRACIONES})
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            " version INTEGER PRIMARY KEY,"
+            " nombre VARCHAR(100) NOT NULL,"
+            " aplicada_en TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'))"
+        ))
+        # Otro proceso pudo migrar mientras esperábamos el lock
+        actual = version_esquema(conn)
+        for version, nombre, migracion in MIGRACIONES:
+            if version <= actual:
+                continue
+            logger.info(f"Aplicando migración {version}: {nombre}")
+            migracion(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, nombre) VALUES (:v, :n)"),
+                {"v": version, "n": nombre},
+            )
+    logger.info(f"Esquema en versión {VERSION_ACTUAL}")
+    return VERSION_ACTUAL
@@ -0,0 +1,189 @@
+"""
+Notificaciones de cambios entre procesos (PostgreSQL LISTEN/NOTIFY)
+
+Las escrituras llaman notificar(db, tipo, planta, ids) dentro de su transacción: el
+pg_notify se entrega a los demás procesos solo si la transacción confirma, y el propio
+proceso recibe el evento al confirmar (evento after_commit de la sesión), sin esperar
+la vuelta por la base de datos.
+
+DespachadorCambios mantiene una conexión dedicada con LISTEN en un hilo y entrega cada
+evento, local o remoto, a los suscriptores desde un único hilo de trabajo. Al conectar o
+reconectar (pudo perder mensajes) y cada NOTIFY_RECARGA_SEGUNDOS publica un evento
+"recarga" para que los suscriptores se resincronicen por completo.
+
+Eventos: {"t": "planes" | "equipos" | "recarga", "p": planta o None, "ids": [...]}; la recarga
+periódica lleva además "periodica": True (no implica que se haya perdido nada).
+"""
+import json
+import logging
+import queue
+import select
+import threading
+import time
+import uuid
+from typing import Callable, List, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy import select as sql_select
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CANAL = "lubricacion_cambios"
+TIPOS = ("planes", "equipos", "recarga")
+
+# Un NOTIFY admite ~8000 bytes: con más ids se pide recargar la planta entera
+MAX_IDS_EVENTO = 500
+
+# Identifica los NOTIFY de este proceso (ya despachados localmente al confirmar)
+ORIGEN = uuid.uuid4().hex[:12]
+
+_CLAVE_PENDIENTES = "notificaciones_pendientes"
+
+def crear_evento(tipo: str, planta=None, ids=None) -> dict:
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de evento inválido: {tipo}")
+    ids = sorted(set(ids or ()))
+    if len(ids) > MAX_IDS_EVENTO:
+        tipo, ids = "recarga", []
+    return {"t": tipo, "p": getattr(planta, "value", planta), "ids": ids}
+
+def notificar(db, tipo: str, planta=None, ids=None):
+    """Emite pg_notify en la transacción de `db` y deja el evento para el despacho local"""
+    evento = crear_evento(tipo, planta, ids)
+    db.execute(sql_select(func.pg_notify(CANAL, json.dumps({**evento, "o": ORIGEN}, separators=(",", ":")))))
+    db.info.setdefault(_CLAVE_PENDIENTES, []).append(evento)
+
+def _al_confirmar(sesion):
+    for evento in sesion.info.pop(_CLAVE_PENDIENTES, ()):
+        despachador.publicar(evento)
+
+def _al_revertir(sesion, *args):
+    sesion.info.pop(_CLAVE_PENDIENTES, None)
+
+def despachar_al_confirmar(clase_sesion):
+    """Registra en la clase de sesión el despacho local de los eventos confirmados"""
+    event.listen(clase_sesion, "after_commit", _al_confirmar)
+    event.listen(clase_sesion, "after_rollback", _al_revertir)
+
+class DespachadorCambios:
+    
+    def __init__(self):
+        # Ganchos síncronos (baratos) al publicar y suscriptores del hilo de trabajo
+        self._al_publicar: List[Callable[[dict], None]] = []
+        self._suscriptores: List[Callable[[dict], None]] = []
+        self._cola: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._detener = threading.Event()
+        self._hilos: List[threading.Thread] = []
+        self.conectado = False
+    
+    def suscribir(self, callback: Callable[[dict], None], al_publicar: Callable[[dict], None] = None):
+        """
+        `callback` recibe cada evento en el hilo de trabajo del despachador.
+        `al_publicar`, si se da, corre en el hilo que publica (debe ser inmediato).
+        """
+        self._suscriptores.append(callback)
+        if al_publicar is not None:
+            self._al_publicar.append(al_publicar)
+    
+    def publicar(self, evento: dict):
+        for gancho in self._al_publicar:
+            gancho(evento)
+        self._cola.put(evento)
+    
+    @property
+    def activo(self) -> bool:
+        return any(h.is_alive() for h in self._hilos)
+    
+    def iniciar(self):
+        if self.activo:
+            return
+        self._detener.clear()
+        self._hilos = [
+            threading.Thread(target=self._trabajar, name="despachador-cambios", daemon=True),
+            threading.Thread(target=self._escuchar, name="listen-cambios", daemon=True),
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+    
+    def detener(self):
+        self._detener.set()
+        self._cola.put(None)
+        for hilo in self._hilos:
+            hilo.join(timeout=10)
+        self._hilos = []
+    
+    def _trabajar(self):
+        while True:
+            evento = self._cola.get()
+            if evento is None:
+                return
+            for callback in self._suscriptores:
+                try:
+                    callback(evento)
+                except Exception:
+                    logger.exception(f"Error al procesar evento {evento.get('t')}")
+    
+    def _conectar(self):
+        """
+        Conexión psycopg2 propia, fuera del pool, en autocommit y escuchando el canal. LISTEN
+        es estado de sesión: detrás de un pooler en modo transaction va por DATABASE_DIRECT_URL.
+        """
+        from .database import engine_directo
+        
+        raw = engine_directo.raw_connection()
+        raw.detach()
+        conexion = raw.driver_connection
+        conexion.autocommit = True
+        with conexion.cursor() as cursor:
+            cursor.execute(f"LISTEN {CANAL}")
+        return conexion
+    
+    def _escuchar(self):
+        espera = 1
+        while not self._detener.is_set():
+            conexion = None
+            try:
+                conexion = self._conectar()
+                self.conectado = True
+                espera = 1
+                logger.info(f"Escuchando cambios en el canal {CANAL}")
+                # Lo ocurrido mientras no escuchábamos se recupera con una recarga completa
+                self.publicar(crear_evento("recarga"))
+                ultima_recarga = time.monotonic()
+                
+                while not self._detener.is_set():
+                    listos, _, _ = select.select([conexion], [], [], 5)
+                    if listos:
+                        conexion.poll()
+                        while conexion.notifies:
+                            self._recibir(conexion.notifies.pop(0).payload)
+                    if time.monotonic() - ultima_recarga >= settings.NOTIFY_RECARGA_SEGUNDOS:
+                        self.publicar({**crear_evento("recarga"), "periodica": True})
+                        ultima_recarga = time.monotonic()
+            except Exception as e:
+                if not self._detener.is_set():
+                    logger.warning(f"Conexión LISTEN perdida ({str(e)}); reintento en {espera}s")
+            finally:
+                self.conectado = False
+                if conexion is not None:
+                    try:
+                        conexion.close()
+                    except Exception:
+                        pass
+            self._detener.wait(espera)
+            espera = min(espera * 2, 60)
+    
+    def _recibir(self, payload: str):
+        try:
+            datos = json.loads(payload)
+            if datos.pop("o", None) == ORIGEN:
+                return
+            evento = crear_evento(datos["t"], datos.get("p"), datos.get("ids"))
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Notificación inválida en {CANAL}: {payload[:200]}")
+            evento = crear_evento("recarga")
+        self.publicar(evento)
+
+despachador = DespachadorCambios()
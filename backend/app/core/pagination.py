@@ -0,0 +1,43 @@
+"""
+Paginación por cursor (keyset)
+"""
+import base64
+import json
+import math
+from datetime import datetime
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+def codificar_cursor(*valores) -> str:
+    """Codifica la clave de la última fila en un token opaco"""
+    serializables = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    raw = json.dumps(serializables, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str, cantidad: int) -> list:
+    """
+    Decodifica un token de cursor; lanza ValueError si es inválido. Solo admite valores
+    escalares (texto, número finito o booleano): un null o una lista en un token bien
+    formado no deben llegar a int() o fromisoformat() como TypeError.
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise ValueError("Cursor inválido")
+    for valor in valores:
+        if not isinstance(valor, (str, int, float)) or (isinstance(valor, float) and not math.isfinite(valor)):
+            raise ValueError("Cursor inválido")
+    return valores
+
+def recortar_pagina(filas: list, limit: int, clave) -> tuple:
+    """
+    Recorta una consulta hecha con limit + 1 filas (sin limit no hay paginación).
+    Retorna (filas, cursor_siguiente); el cursor es None en la última página.
+    """
+    if limit is None or len(filas) <= limit:
+        return filas, None
+    filas = filas[:limit]
+    return filas, codificar_cursor(*clave(filas[-1]))
@@ -0,0 +1,171 @@
+"""
+Presupuesto de consultas por endpoint (guardia contra N+1)
+
+Cada endpoint puede declarar cuántas consultas SQL le bastan con @presupuesto_consultas(n).
+Con PRESUPUESTO_CONSULTAS_MODO="log" o "error" (desarrollo), PresupuestoConsultasMiddleware
+compara las consultas de cada petición con su presupuesto; en modo "error" la petición que
+lo excede responde 500 con el detalle. En ambos casos se registran las sentencias y las
+relaciones cargadas de forma perezosa que las provocaron. Fuera de una petición (scripts,
+benchmarks) el mismo control está disponible como limitar_consultas(n).
+
+Los endpoints que escriben por bloques (importación, recálculo de la flota) declaran
+además por_bloque: el servicio llama a contar_bloque() por cada bloque escrito y el
+presupuesto de la petición pasa a ser n + por_bloque * bloques.
+"""
+import json
+import logging
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState
+
+from .config import settings
+from .metricas import ActividadDB, actividad_actual, iniciar_actividad, terminar_actividad
+
+logger = logging.getLogger(__name__)
+
+ATRIBUTO_PRESUPUESTO = "__presupuesto_consultas__"
+
+class PresupuestoExcedido(RuntimeError):
+    """Se emitieron más consultas que las presupuestadas"""
+    
+    def __init__(self, etiqueta: str, maximo: int, actividad: ActividadDB):
+        self.etiqueta = etiqueta
+        self.maximo = maximo
+        self.consultas = actividad.consultas
+        self.cargas_perezosas = list(actividad.cargas_perezosas)
+        self.sentencias = [" ".join(sql.split()) for _, sql in actividad.sentencias]
+        super().__init__(
+            f"{etiqueta}: {self.consultas} consultas (presupuesto {maximo})"
+            + (f"; cargas perezosas: {', '.join(self.cargas_perezosas)}" if self.cargas_perezosas else "")
+        )
+    
+    def detalle(self) -> dict:
+        return {
+            "error": "Presupuesto de consultas excedido",
+            "endpoint": self.etiqueta,
+            "presupuesto": self.maximo,
+            "consultas": self.consultas,
+            "cargas_perezosas": self.cargas_perezosas,
+            "sentencias": self.sentencias,
+        }
+
+def presupuesto_consultas(maximo: int, por_bloque: int = 0):
+    """
+    Declara el máximo de consultas de un endpoint. Va debajo del decorador de la ruta:
+    
+        @router.get("/{equipo_id}")
+        @presupuesto_consultas(1)
+        async def obtener_equipo(...): ...
+    """
+    def decorador(funcion):
+        setattr(funcion, ATRIBUTO_PRESUPUESTO, (maximo, por_bloque))
+        return funcion
+    return decorador
+
+def presupuesto_de(endpoint, bloques: int = 1) -> Optional[int]:
+    """Presupuesto del endpoint tras escribir `bloques` bloques (uno, como los benchmarks)"""
+    declarado = getattr(endpoint, ATRIBUTO_PRESUPUESTO, None)
+    if declarado is None:
+        return None
+    maximo, por_bloque = declarado
+    return maximo + por_bloque * bloques
+
+def contar_bloque(cantidad: int = 1):
+    """Suma bloques escritos a la petición en curso (presupuestos con por_bloque)"""
+    actividad = actividad_actual()
+    if actividad is not None:
+        actividad.bloques += cantidad
+
+def _registrar_carga_perezosa(estado: ORMExecuteState):
+    if not estado.is_relationship_load or estado.lazy_loaded_from is None:
+        return
+    actividad = actividad_actual()
+    # loader_strategy_path termina en la relación que se está cargando
+    relacion = estado.loader_strategy_path[-1] if estado.loader_strategy_path else None
+    nombre = f"{estado.lazy_loaded_from.class_.__name__}.{getattr(relacion, 'key', '?')}"
+    if actividad is not None:
+        actividad.cargas_perezosas.append(nombre)
+    if settings.PRESUPUESTO_CONSULTAS_MODO != "off":
+        logger.warning(f"Carga perezosa de {nombre}")
+
+def vigilar_cargas_perezosas(clase_sesion):
+    """Registra do_orm_execute en la clase de sesión (también la usan las AsyncSession)"""
+    event.listen(clase_sesion, "do_orm_execute", _registrar_carga_perezosa)
+
+@contextmanager
+def limitar_consultas(maximo: int, etiqueta: str = "bloque"):
+    """Lanza PresupuestoExcedido si el bloque emite más de `maximo` consultas"""
+    actividad, token = iniciar_actividad(registrar_sql=True)
+    inicial = actividad.consultas
+    try:
+        yield actividad
+    finally:
+        terminar_actividad(token)
+    # Solo cuenta lo emitido dentro del bloque aunque la actividad venga de afuera
+    if actividad.consultas - inicial > maximo:
+        parcial = ActividadDB(
+            consultas=actividad.consultas - inicial,
+            sentencias=actividad.sentencias[-(actividad.consultas - inicial):],
+            cargas_perezosas=actividad.cargas_perezosas,
+        )
+        raise PresupuestoExcedido(etiqueta, maximo, parcial)
+
+class PresupuestoConsultasMiddleware:
+    """
+    Middleware ASGI de desarrollo: aplica el presupuesto declarado por el endpoint.
+    Si la respuesta todavía no empezó se reemplaza por un 500 (modo "error"); en las
+    respuestas en streaming que lo exceden después de empezar solo queda el log.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        modo = settings.PRESUPUESTO_CONSULTAS_MODO
+        if scope["type"] != "http" or modo == "off":
+            return await self.app(scope, receive, send)
+        
+        actividad, token = iniciar_actividad(registrar_sql=True)
+        inicial, bloques_iniciales = actividad.consultas, actividad.bloques
+        estado = {"reemplazada": False}
+        
+        def revisar() -> Optional[PresupuestoExcedido]:
+            maximo = presupuesto_de(scope.get("endpoint"), actividad.bloques - bloques_iniciales)
+            usadas = actividad.consultas - inicial
+            if maximo is None or usadas <= maximo:
+                return None
+            parcial = ActividadDB(
+                consultas=usadas,
+                sentencias=actividad.sentencias[-usadas:],
+                cargas_perezosas=actividad.cargas_perezosas,
+            )
+            error = PresupuestoExcedido(f"{scope['method']} {scope['path']}", maximo, parcial)
+            logger.error(str(error) + "\n" + "\n".join(f"  {s}" for s in error.sentencias))
+            return error
+        
+        async def send_controlado(mensaje):
+            if estado["reemplazada"]:
+                return
+            if mensaje["type"] == "http.response.start" and modo == "error":
+                error = revisar()
+                if error is not None:
+                    estado["reemplazada"] = True
+                    cuerpo = json.dumps(error.detalle(), ensure_ascii=False).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode())],
+                    })
+                    await send({"type": "http.response.body", "body": cuerpo})
+                    return
+            await send(mensaje)
+        
+        try:
+            await self.app(scope, receive, send_controlado)
+        finally:
+            terminar_actividad(token)
+        # Incluye lo consultado durante un streaming ya iniciado
+        if not estado["reemplazada"]:
+            revisar()
@@ -0,0 +1,53 @@
+"""
+Lectura desde réplicas con lectura de las propias escrituras
+
+Tras una escritura (método distinto de GET/HEAD/OPTIONS con estado < 400) la respuesta
+lleva la cookie COOKIE_PRIMARIO con la hora hasta la que ese cliente lee del primario;
+pasada la ventana (REPLICA_PRIMARIO_SEGUNDOS, mayor que el retraso normal de las réplicas)
+vuelve a las réplicas. Los demás clientes pueden ver el cambio con ese retraso.
+"""
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+
+from .config import settings
+
+COOKIE_PRIMARIO = "leer_primario_hasta"
+
+METODOS_LECTURA = ("GET", "HEAD", "OPTIONS")
+
+def replica_urls() -> list:
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+def leer_del_primario(request: Request) -> bool:
+    """True si el cliente escribió hace menos de REPLICA_PRIMARIO_SEGUNDOS"""
+    valor = request.cookies.get(COOKIE_PRIMARIO)
+    if not valor:
+        return False
+    try:
+        return float(valor) > time.time()
+    except ValueError:
+        return False
+
+class PrimarioTrasEscrituraMiddleware:
+    """Middleware ASGI: marca con COOKIE_PRIMARIO las respuestas de escrituras confirmadas"""
+    
+    def __init__(self, app, segundos: int):
+        self.app = app
+        self.segundos = segundos
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in METODOS_LECTURA:
+            return await self.app(scope, receive, send)
+        
+        async def send_marcado(mensaje):
+            if mensaje["type"] == "http.response.start" and mensaje["status"] < 400:
+                hasta = time.time() + self.segundos
+                MutableHeaders(scope=mensaje).append(
+                    "set-cookie",
+                    f"{COOKIE_PRIMARIO}={hasta:.3f}; Max-Age={self.segundos}; Path=/api; HttpOnly; SameSite=Lax",
+                )
+            await send(mensaje)
+        
+        await self.app(scope, receive, send_marcado)
@@ -0,0 +1,43 @@
+"""
+Respuestas JSON y compresión
+
+- respuesta_json: valida y serializa con pydantic-core en una pasada (sin jsonable_encoder
+  ni json.dumps), igual que las lecturas cacheadas de core/cache.py.
+- CompresionMiddleware: GZipMiddleware que deja pasar sin tocar lo que ya viene comprimido
+  (exportaciones .gz) y los streams de eventos, que no pueden esperar al buffer de gzip.
+"""
+from typing import Optional
+
+from pydantic import TypeAdapter
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.responses import Response
+
+# Tipos que nunca se recomprimen
+SIN_COMPRIMIR = ("application/gzip", "application/zip", "text/event-stream", "image/")
+
+def respuesta_json(adaptador: TypeAdapter, datos, headers: Optional[dict] = None, status_code: int = 200) -> Response:
+    """Response con el JSON de `datos` según el TypeAdapter (acepta objetos ORM si el schema lo permite)"""
+    cuerpo = adaptador.dump_json(adaptador.validate_python(datos, from_attributes=True))
+    return Response(content=cuerpo, status_code=status_code, media_type="application/json", headers=headers)
+
+class _RespondedorGZip(GZipResponder):
+    
+    async def send_with_gzip(self, message):
+        if message["type"] == "http.response.start":
+            tipo = Headers(raw=message["headers"]).get("content-type", "")
+            if tipo.startswith(SIN_COMPRIMIR):
+                # Mismo camino que una respuesta con Content-Encoding: se reenvía intacta
+                self.initial_message = message
+                self.content_encoding_set = True
+                return
+        await super().send_with_gzip(message)
+
+class CompresionMiddleware(GZipMiddleware):
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _RespondedorGZip(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -5,12 +5,19 @@ import sys
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
 
+from backend.app.core.cache import cache_respuestas
 from backend.app.core.config import settings
-from backend.app.core.database import init_db, engine
-from backend.app.routes import health
-from sqlalchemy import text
+from backend.app.core.database import init_db, async_engine, engines_replica
+from backend.app.core.metricas import MetricasMiddleware
+from backend.app.core.notificaciones import despachador
+from backend.app.core.presupuesto import PresupuestoConsultasMiddleware, presupuesto_consultas
+from backend.app.core.replicas import PrimarioTrasEscrituraMiddleware
+from backend.app.core.respuestas import CompresionMiddleware
+from backend.app.routes import health, metricas
+from backend.app.schemas.comunes import InfoAPI
 
 # Configurar logging
 logging.basicConfig(
@@ -26,9 +33,17 @@ app = FastAPI(
     version=settings.API_VERSION,
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    # Las rutas con response_model serializan con pydantic-core y orjson en lugar de json
+    default_response_class=ORJSONResponse,
 )
 
+# Compresión gzip de respuestas grandes (la más interna: /metrics mide los bytes enviados)
+if settings.GZIP_MINIMO_BYTES > 0:
+    app.add_middleware(
+        CompresionMiddleware, minimum_size=settings.GZIP_MINIMO_BYTES, compresslevel=settings.GZIP_NIVEL
+    )
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -41,26 +56,44 @@ app.add_middleware(
     max_age=600,
 )
 
+# Réplicas de lectura: tras escribir, el mismo cliente lee del primario unos segundos
+if engines_replica:
+    app.add_middleware(PrimarioTrasEscrituraMiddleware, segundos=settings.REPLICA_PRIMARIO_SEGUNDOS)
+
+# Latencia, tamaños, estados y actividad de BD por ruta (servidas en /metrics)
+if settings.METRICAS_HABILITADAS:
+    app.add_middleware(MetricasMiddleware)
+
+# Guardia N+1 de desarrollo: compara las consultas de cada petición con @presupuesto_consultas
+if settings.PRESUPUESTO_CONSULTAS_MODO != "off":
+    app.add_middleware(PresupuestoConsultasMiddleware)
+
 # Eventos de inicio y cierre
 @app.on_event("startup")
 async def startup_event():
-    """Inicializar base de datos al iniciar"""
+    """Aplicar migraciones pendientes al iniciar (salvo que se gestionen aparte)"""
     logger.info("Inicializando aplicación...")
+    if not settings.MIGRAR_AL_INICIAR:
+        logger.info("Migraciones gestionadas fuera del arranque (MIGRAR_AL_INICIAR=false)")
+    else:
+        _migrar()
+    
+    # Eventos de cambios (LISTEN/NOTIFY): invalidan la caché, mantienen el índice de
+    # vencimientos y se difunden a los clientes SSE (/api/eventos)
+    cache_respuestas.suscribir_cambios(despachador)
+    if settings.INDICE_VENCIMIENTOS_HABILITADO:
+        from backend.app.services.vencimientos_service import indice_vencimientos
+        indice_vencimientos.registrar()
+    from backend.app.services.eventos_service import EventosService
+    EventosService.registrar(despachador)
+    despachador.iniciar()
+
+def _migrar():
+    # Solo el chequeo de versión si el esquema está al día. Las particiones del historial se
+    # crean al escribir (ParticionService.asegurar_meses) o por adelantado con
+    # "cli particiones crear" desde una tarea programada, no en cada arranque
     try:
         init_db()
-        # Migrate: add planta column if it doesn't exist
-        with engine.connect() as conn:
-            result = conn.execute(text(
-                "SELECT column_name FROM information_schema.columns "
-                "WHERE table_name='equipos' AND column_name='planta'"
-            ))
-            if result.fetchone() is None:
-                conn.execute(text(
-                    "ALTER TABLE equipos ADD COLUMN planta VARCHAR(10) NOT NULL DEFAULT 'TREN_1'"
-                ))
-                conn.commit()
-                logger.info("Columna 'planta' agregada a la tabla equipos")
-        logger.info("Base de datos inicializada correctamente")
     except Exception as e:
         logger.error(f"Error al inicializar base de datos: {str(e)}")
 
@@ -68,18 +101,30 @@ async def startup_event():
 async def shutdown_event():
     """Evento de cierre"""
     logger.info("Cerrando aplicación...")
+    despachador.detener()
+    await async_engine.dispose()
+    for _, replica_async in engines_replica:
+        await replica_async.dispose()
 
 # Incluir routers
 app.include_router(health.router)
+if settings.METRICAS_HABILITADAS:
+    app.include_router(metricas.router)
 try:
-    from backend.app.routes import equipos, lubricacion
+    from backend.app.routes import equipos, lubricacion, dashboard, pronostico, consumo, eventos, sync
     app.include_router(equipos.router)
     app.include_router(lubricacion.router)
+    app.include_router(dashboard.router)
+    app.include_router(pronostico.router)
+    app.include_router(consumo.router)
+    app.include_router(eventos.router)
+    app.include_router(sync.router)
 except Exception as e:
-    logger.error("Error cargando rutas de equipos/lubricacion", exc_info=True)
+    logger.error("Error cargando rutas de equipos/lubricacion/dashboard/pronostico/consumo/eventos/sync", exc_info=True)
 
 # Root endpoint
-@app.get("/")
+@app.get("/", response_model=InfoAPI)
+@presupuesto_consultas(0)
 async def root():
     """Endpoint raíz"""
     return {
@@ -92,10 +137,13 @@ async def root():
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     logger.error(f"Error no manejado: {str(exc)}")
-    return {
-        "error": "Error interno del servidor",
-        "detail": str(exc)
-    }
+    return ORJSONResponse(
+        status_code=500,
+        content={
+            "error": "Error interno del servidor",
+            "detail": str(exc)
+        },
+    )
 
 if __name__ == "__main__":
     import uvicorn
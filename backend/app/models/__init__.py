@@ -4,6 +4,9 @@ Importar todos los modelos
 from .equipo import Equipo
 from .plan_lubricacion import PlanLubricacion
 from .historial import Historial
+from .historial_resumen import HistorialResumenMensual
+from .consumo import ConsumoDiario
+from .idempotencia import ClaveIdempotencia
 from .usuario import Usuario
 
-__all__ = ["Equipo", "PlanLubricacion", "Historial", "Usuario"]
\ No newline at end of file
+__all__ = ["Equipo", "PlanLubricacion", "Historial", "HistorialResumenMensual", "ConsumoDiario", "ClaveIdempotencia", "Usuario"]
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Modelo: Consumo diario de lubricante (agregado del historial)
+"""
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
+from backend.app.core.database import Base
+
+class ConsumoDiario(Base):
+    """
+    Gramos aplicados y ejecuciones por planta, día, equipo y lubricante.
+    Se mantiene en la misma transacción que cada ejecución registrada; los reportes de
+    consumo la leen a ella y nunca suman el historial crudo.
+    """
+    __tablename__ = "consumo_diario"
+    
+    # La PK empieza por dia: cubre los rangos de fechas con o sin planta (solo hay dos)
+    dia = Column(Date, primary_key=True)
+    # Texto plano ("TREN_1"): la planta del equipo al momento de la ejecución
+    planta = Column(String(10), primary_key=True)
+    equipo_id = Column(Integer, ForeignKey("equipos.id", ondelete="CASCADE"), primary_key=True)
+    tipo_lubricante = Column(String(100), primary_key=True)
+    ejecuciones = Column(Integer, nullable=False, default=0)
+    gramos = Column(Float, nullable=False, default=0)
+    
+    __table_args__ = (
+        # Consumo de un equipo en un rango de fechas
+        Index("ix_consumo_equipo_dia", equipo_id, dia),
+    )
+    
+    def __repr__(self):
+        return f"<ConsumoDiario {self.dia} equipo={self.equipo_id} {self.gramos} g>"
@@ -1,7 +1,7 @@
 """
 Modelo: Equipos
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -24,9 +24,9 @@ class PlantaEnum(str, enum.Enum):
 class Equipo(Base):
     __tablename__ = "equipos"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     nombre = Column(String(150), unique=True, nullable=False, index=True)
-    planta = Column(Enum(PlantaEnum), default=PlantaEnum.TREN_1, nullable=False, index=True)
+    planta = Column(Enum(PlantaEnum), default=PlantaEnum.TREN_1, nullable=False)
     componente = Column(String(150), nullable=True)
     criticidad = Column(Enum(CriticidadEnum), default=CriticidadEnum.BAJA, nullable=False)
     ubicacion = Column(String(200), nullable=True)
@@ -41,5 +41,14 @@ class Equipo(Base):
     # Relaciones
     planes = relationship("PlanLubricacion", back_populates="equipo", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Listados por planta y estado ordenados por nombre
+        Index("ix_equipos_planta_estado_nombre", planta, estado, nombre, id),
+        # Listado de equipos activos de todas las plantas
+        Index("ix_equipos_activos_nombre", nombre, id, postgresql_where=(estado == "ACTIVO")),
+        # Sincronización incremental (/api/sync)
+        Index("ix_equipos_updated_id", updated_at, id),
+    )
+    
     def __repr__(self):
         return f"<Equipo {self.nombre}>"
\ No newline at end of file
@@ -1,24 +1,43 @@
 """
 Modelo: Historial de Lubricación
 """
-from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey, Text, Index
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import uuid
 from backend.app.core.database import Base
 
 class Historial(Base):
     __tablename__ = "historial_lubricacion"
     
-    id = Column(Integer, primary_key=True, index=True)
-    plan_id = Column(Integer, ForeignKey("planes_lubricacion.id", ondelete="CASCADE"), nullable=False, index=True)
-    fecha_ejecucion = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Tabla particionada por mes de fecha_ejecucion: la clave de partición debe ser parte de la PK
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    plan_id = Column(Integer, ForeignKey("planes_lubricacion.id", ondelete="CASCADE"), nullable=False)
+    fecha_ejecucion = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
     cantidad_aplicada = Column(Float, nullable=False)
     tecnico = Column(String(100), nullable=False)
     observaciones = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Identificador de la ejecución generado por el dispositivo (si no lo envía, el servidor):
+    # un lote reenviado tras perder la respuesta no vuelve a insertar sus filas
+    id_cliente = Column(UUID(as_uuid=True), default=uuid.uuid4, nullable=True)
     
     # Relaciones
     plan = relationship("PlanLubricacion", back_populates="historial")
     
+    __table_args__ = (
+        # Historial de un plan/equipo ordenado por fecha (paginación por cursor)
+        Index("ix_historial_plan_fecha", plan_id, fecha_ejecucion.desc(), id.desc()),
+        # Historial global ordenado por fecha (paginación por cursor)
+        Index("ix_historial_fecha_id", fecha_ejecucion.desc(), id.desc()),
+        # Sincronización incremental (/api/sync): filas insertadas desde un instante
+        Index("ix_historial_created_id", created_at, id),
+        # Deduplicación de reintentos (ON CONFLICT DO NOTHING); incluye la clave de partición
+        Index("ux_historial_id_cliente", id_cliente, fecha_ejecucion, unique=True),
+        # Particiones mensuales (ver services/particion_service.py)
+        {"postgresql_partition_by": "RANGE (fecha_ejecucion)"},
+    )
+    
     def __repr__(self):
         return f"<Historial {self.id}>"
\ No newline at end of file
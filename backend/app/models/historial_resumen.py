@@ -0,0 +1,20 @@
+"""
+Modelo: Resumen mensual del historial (particiones retiradas)
+"""
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey
+from backend.app.core.database import Base
+
+class HistorialResumenMensual(Base):
+    __tablename__ = "historial_resumen_mensual"
+    
+    # Primer día del mes resumido
+    mes = Column(Date, primary_key=True)
+    plan_id = Column(Integer, ForeignKey("planes_lubricacion.id", ondelete="CASCADE"), primary_key=True)
+    ejecuciones = Column(Integer, nullable=False)
+    cantidad_total = Column(Float, nullable=False)
+    tecnicos = Column(Integer, nullable=False)
+    primera_ejecucion = Column(DateTime, nullable=False)
+    ultima_ejecucion = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<HistorialResumenMensual {self.mes} plan={self.plan_id}>"
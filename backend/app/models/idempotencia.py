@@ -0,0 +1,32 @@
+"""
+Modelo: Claves de idempotencia de las escrituras (cabecera Idempotency-Key)
+"""
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Index
+from datetime import datetime
+from backend.app.core.database import Base
+
+class ClaveIdempotencia(Base):
+    """
+    Respuesta guardada de una escritura hecha con Idempotency-Key. La fila se inserta y
+    completa en la misma transacción que la escritura: un reintento concurrente espera
+    a que esa transacción termine y luego repite la respuesta guardada.
+    """
+    __tablename__ = "claves_idempotencia"
+    
+    clave = Column(String(200), primary_key=True)
+    # Plantilla de la ruta ("/api/lubricacion/ejecutar/{plan_id}"): la misma clave puede usarse en otra
+    ruta = Column(String(200), primary_key=True)
+    # SHA-256 del cuerpo: la misma clave con otro cuerpo es un error del cliente
+    huella = Column(String(64), nullable=False)
+    estado_http = Column(Integer, nullable=True)
+    respuesta = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expira_en = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        # Purga de claves vencidas
+        Index("ix_claves_idempotencia_expira", expira_en),
+    )
+    
+    def __repr__(self):
+        return f"<ClaveIdempotencia {self.ruta} {self.clave}>"
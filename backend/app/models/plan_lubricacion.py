@@ -1,7 +1,7 @@
 """
 Modelo: Planes de Lubricación
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.app.core.database import Base
@@ -9,13 +9,15 @@ from backend.app.core.database import Base
 class PlanLubricacion(Base):
     __tablename__ = "planes_lubricacion"
     
-    id = Column(Integer, primary_key=True, index=True)
-    equipo_id = Column(Integer, ForeignKey("equipos.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    equipo_id = Column(Integer, ForeignKey("equipos.id", ondelete="CASCADE"), nullable=False)
     tipo_lubricante = Column(String(100), nullable=True)
     cantidad_gramos = Column(Float, nullable=True)
     frecuencia_dias = Column(Integer, default=30, nullable=False)
     ultima_fecha_lubricacion = Column(DateTime, default=datetime.utcnow, nullable=False)
     proxima_fecha_lubricacion = Column(DateTime, nullable=False)
+    # Sube con cada cambio del plan (ejecuciones incluidas) en el mismo UPDATE que lo modifica
+    version = Column(Integer, default=1, server_default="1", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
@@ -23,5 +25,19 @@ class PlanLubricacion(Base):
     equipo = relationship("Equipo", back_populates="planes")
     historial = relationship("Historial", back_populates="plan", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Planes por fecha de vencimiento (paginación por cursor, todas las plantas)
+        Index("ix_planes_proxima_fecha_id", proxima_fecha_lubricacion, id),
+        # Planes de los equipos de una planta por vencimiento; INCLUDE permite index-only scans
+        Index(
+            "ix_planes_equipo_proxima",
+            equipo_id,
+            proxima_fecha_lubricacion,
+            postgresql_include=["id", "tipo_lubricante", "cantidad_gramos", "frecuencia_dias", "ultima_fecha_lubricacion"],
+        ),
+        # Sincronización incremental (/api/sync)
+        Index("ix_planes_updated_id", updated_at, id),
+    )
+    
     def __repr__(self):
         return f"<PlanLubricacion {self.id}>"
\ No newline at end of file
@@ -1,6 +1,6 @@
 """
 Rutas de la aplicación
 """
-from . import health, equipos, lubricacion
+from . import health, equipos, lubricacion, dashboard, metricas, pronostico, consumo, eventos, sync
 
-__all__ = ["health", "equipos", "lubricacion"]
\ No newline at end of file
+__all__ = ["health", "equipos", "lubricacion", "dashboard", "metricas", "pronostico", "consumo", "eventos", "sync"]
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+Rutas: Consumo de lubricante (solo leen el agregado consumo_diario)
+"""
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from backend.app.core.database import get_async_db_lectura
+from backend.app.core.presupuesto import presupuesto_consultas
+from backend.app.core.cache import responder_con_cache
+from backend.app.services.consumo_service import AsyncConsumoService
+from backend.app.schemas.consumo import ConsumoEquipo, ConsumoResumen
+
+router = APIRouter(
+    prefix="/api/consumo",
+    tags=["consumo"],
+)
+
+_resumen = TypeAdapter(ConsumoResumen)
+_lista_equipos = TypeAdapter(list[ConsumoEquipo])
+
+@router.get("", response_model=ConsumoResumen)
+@presupuesto_consultas(1)
+async def consumo_por_periodo(
+    request: Request,
+    planta: str = Query(None),
+    equipo_id: int = Query(None),
+    tipo_lubricante: str = Query(None),
+    desde: Optional[date] = Query(None),
+    hasta: Optional[date] = Query(None),
+    agrupacion: str = Query("mes", pattern="^(dia|semana|mes|anio)$"),
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    """Gramos y ejecuciones por periodo, planta y lubricante (por defecto, últimos 365 días)"""
+    async def producir():
+        try:
+            resumen = await AsyncConsumoService.obtener_series(
+                db, desde=desde, hasta=hasta, agrupacion=agrupacion,
+                planta=planta, equipo_id=equipo_id, tipo_lubricante=tipo_lubricante,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _resumen.dump_json(_resumen.validate_python(resumen)), {}
+    
+    return await responder_con_cache(request, planta, producir)
+
+@router.get("/equipos", response_model=list[ConsumoEquipo])
+@presupuesto_consultas(1)
+async def consumo_por_equipo(
+    request: Request,
+    planta: str = Query(None),
+    tipo_lubricante: str = Query(None),
+    desde: Optional[date] = Query(None),
+    hasta: Optional[date] = Query(None),
+    limit: int = Query(50, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    """Equipos con mayor consumo de grasa en el rango"""
+    async def producir():
+        try:
+            filas = await AsyncConsumoService.obtener_equipos(
+                db, desde=desde, hasta=hasta, planta=planta, tipo_lubricante=tipo_lubricante, limit=limit,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _lista_equipos.dump_json(_lista_equipos.validate_python(filas)), {}
+    
+    return await responder_con_cache(request, planta, producir)
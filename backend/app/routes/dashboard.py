@@ -0,0 +1,24 @@
+"""
+Rutas: Dashboard
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.core.database import get_async_db_lectura
+from backend.app.core.presupuesto import presupuesto_consultas
+from backend.app.services.dashboard_service import AsyncDashboardService
+from backend.app.schemas.dashboard import DashboardResumen
+
+router = APIRouter(
+    prefix="/api/dashboard",
+    tags=["dashboard"],
+)
+
+@router.get("/resumen", response_model=DashboardResumen)
+@presupuesto_consultas(1)
+async def obtener_resumen(
+    planta: str = Query(None),
+    dias_historial: int = Query(30, ge=1, le=3650),
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    """KPIs del dashboard calculados en la base de datos"""
+    return await AsyncDashboardService.obtener_resumen(db, planta=planta, dias_historial=dias_historial)
@@ -1,11 +1,23 @@
 """
 Rutas: Equipos
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from backend.app.core.database import get_db
-from backend.app.services.equipo_service import EquipoService
+from typing import Optional
+from backend.app.core.database import get_async_db_lectura, get_db
+from backend.app.core.presupuesto import presupuesto_consultas
+from backend.app.core.cache import responder_con_cache
+from backend.app.core.pagination import CURSOR_HEADER
+from backend.app.core.respuestas import respuesta_json
+from backend.app.services.equipo_service import AsyncEquipoService, EquipoService
+from backend.app.services.lubricacion_service import AsyncLubricacionService
+from backend.app.services.importacion_service import ImportacionService
 from backend.app.schemas.equipo import EquipoCreate, EquipoUpdate, EquipoResponse
+from backend.app.schemas.historial import HistorialResponse
+from backend.app.schemas.importacion import ImportacionResultado
+from backend.app.schemas.comunes import FechaUTC, Mensaje
 
 router = APIRouter(
     prefix="/api/equipos",
@@ -13,26 +25,56 @@ router = APIRouter(
     responses={404: {"description": "No encontrado"}}
 )
 
+_lista_equipos = TypeAdapter(list[EquipoResponse])
+_lista_historial = TypeAdapter(list[HistorialResponse])
+
 @router.get("", response_model=list[EquipoResponse])
-def listar_equipos(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100),
+@presupuesto_consultas(1)
+async def listar_equipos(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000),
     planta: str = Query(None),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    """Listar equipos activos (paginado por cursor), opcionalmente filtrados por planta"""
+    async def producir():
+        try:
+            equipos, siguiente = await AsyncEquipoService.obtener_equipos(
+                db, limit=limit, planta=planta, cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        cuerpo = _lista_equipos.dump_json(_lista_equipos.validate_python(equipos, from_attributes=True))
+        return cuerpo, {CURSOR_HEADER: siguiente} if siguiente else {}
+    
+    return await responder_con_cache(request, planta, producir)
+
+@router.post("/importar", response_model=ImportacionResultado)
+@presupuesto_consultas(0, por_bloque=4)
+def importar_equipos(
+    archivo: UploadFile = File(...),
+    upsert: bool = Query(False),
     db: Session = Depends(get_db)
 ):
-    """Listar todos los equipos activos, opcionalmente filtrados por planta"""
-    equipos = EquipoService.obtener_equipos(db, skip=skip, limit=limit, planta=planta)
-    return equipos
+    """Importar equipos y sus planes desde un CSV o XLSX (encabezados = campos de EquipoCreate)"""
+    try:
+        filas = ImportacionService.leer_filas(archivo.file, archivo.filename or "")
+        return ImportacionService.importar(db, filas, upsert=upsert)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{equipo_id}", response_model=EquipoResponse)
-def obtener_equipo(equipo_id: int, db: Session = Depends(get_db)):
+@presupuesto_consultas(1)
+async def obtener_equipo(equipo_id: int, db: AsyncSession = Depends(get_async_db_lectura)):
     """Obtener equipo por ID"""
-    equipo = EquipoService.obtener_equipo_por_id(db, equipo_id)
+    equipo = await AsyncEquipoService.obtener_equipo_por_id(db, equipo_id)
     if not equipo:
         raise HTTPException(status_code=404, detail="Equipo no encontrado")
     return equipo
 
 @router.post("", response_model=EquipoResponse, status_code=201)
+@presupuesto_consultas(4)
 def crear_equipo(equipo: EquipoCreate, db: Session = Depends(get_db)):
     """Crear nuevo equipo"""
     try:
@@ -41,6 +83,7 @@ def crear_equipo(equipo: EquipoCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{equipo_id}", response_model=EquipoResponse)
+@presupuesto_consultas(5)
 def actualizar_equipo(
     equipo_id: int,
     equipo: EquipoUpdate,
@@ -52,23 +95,33 @@ def actualizar_equipo(
         raise HTTPException(status_code=404, detail="Equipo no encontrado")
     return resultado
 
-@router.delete("/{equipo_id}")
+@router.delete("/{equipo_id}", response_model=Mensaje)
+@presupuesto_consultas(4)
 def eliminar_equipo(equipo_id: int, db: Session = Depends(get_db)):
     """Eliminar (desactivar) equipo"""
     if not EquipoService.eliminar_equipo(db, equipo_id):
         raise HTTPException(status_code=404, detail="Equipo no encontrado")
     return {"message": "Equipo desactivado"}
 
-@router.get("/{equipo_id}/historial")
-def obtener_historial_equipo(equipo_id: int, db: Session = Depends(get_db)):
-    """Obtener historial de lubricación de un equipo"""
-    equipo = EquipoService.obtener_equipo_por_id(db, equipo_id)
+@router.get("/{equipo_id}/historial", response_model=list[HistorialResponse])
+@presupuesto_consultas(2)
+async def obtener_historial_equipo(
+    equipo_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    desde: Optional[FechaUTC] = Query(None),
+    hasta: Optional[FechaUTC] = Query(None),
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    """Obtener historial de lubricación de un equipo (paginado por cursor)"""
+    equipo = await AsyncEquipoService.obtener_equipo_por_id(db, equipo_id)
     if not equipo:
         raise HTTPException(status_code=404, detail="Equipo no encontrado")
     
-    from backend.app.services.lubricacion_service import LubricacionService
-    historial = LubricacionService.obtener_historial(db, limit=100)
-    
-    # Filtrar por equipos del plan
-    equipo_historial = [h for h in historial if h.plan.equipo_id == equipo_id]
-    return equipo_historial
\ No newline at end of file
+    try:
+        historial, siguiente = await AsyncLubricacionService.obtener_historial_equipo(
+            db, equipo_id, limit=limit, cursor=cursor, desde=desde, hasta=hasta
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_json(_lista_historial, historial, {CURSOR_HEADER: siguiente} if siguiente else None)
@@ -0,0 +1,39 @@
+"""
+Rutas: Eventos de cambios por planta (Server-Sent Events)
+"""
+import asyncio
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from backend.app.core.config import settings
+from backend.app.core.eventos import formatear, hub_eventos
+from backend.app.core.presupuesto import presupuesto_consultas
+
+router = APIRouter(
+    prefix="/api/eventos",
+    tags=["eventos"],
+)
+
+@router.get("")
+@presupuesto_consultas(0)
+async def eventos_de_cambios(planta: str = Query(None)):
+    """
+    Flujo text/event-stream con los cambios de planes de la planta (todas si se omite).
+    Eventos: "conectado" al abrir, "cambio" (CambioPlanes) y "recarga" cuando el cliente
+    debe volver a pedir el listado completo. Al reconectar conviene recargar: los eventos
+    perdidos mientras tanto no se reenvían.
+    """
+    async def flujo():
+        async with hub_eventos.conectar(planta) as cola:
+            yield b"retry: 5000\n\n" + formatear("conectado", b"{}")
+            while True:
+                try:
+                    yield await asyncio.wait_for(cola.get(), timeout=settings.SSE_HEARTBEAT_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies
+                    yield b": ping\n\n"
+    
+    return StreamingResponse(
+        flujo(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
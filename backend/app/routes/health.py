@@ -1,32 +1,33 @@
 """
 Rutas: Health Check
 """
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from backend.app.core.database import get_db
-from datetime import datetime
+from fastapi import APIRouter, Response
+from backend.app.core.presupuesto import presupuesto_consultas
+from backend.app.schemas.comunes import HealthResponse, LivenessResponse, ReadinessResponse
+from backend.app.services.health_service import HealthService
 
 router = APIRouter(
     prefix="/api/health",
     tags=["health"],
 )
 
-@router.get("")
-def health_check(db: Session = Depends(get_db)):
-    """Health check endpoint"""
-    try:
-        # Verificar conexión a BD
-        db.execute("SELECT 1")
-        
-        return {
-            "status": "healthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "database": "connected"
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "database": "disconnected",
-            "error": str(e)
-        }
\ No newline at end of file
+@router.get("", response_model=HealthResponse)
+@presupuesto_consultas(1)
+def health_check():
+    """Health check endpoint (estado de la BD según el ping cacheado de /ready)"""
+    return HealthService.resumen()
+
+@router.get("/live", response_model=LivenessResponse)
+@presupuesto_consultas(0)
+async def liveness():
+    """Liveness: el proceso atiende peticiones (sin consultar la base de datos)"""
+    return HealthService.vivo()
+
+@router.get("/ready", response_model=ReadinessResponse)
+@presupuesto_consultas(1)
+def readiness(response: Response):
+    """Readiness: 503 si la base no responde; incluye latencia del ping y ocupación de los pools"""
+    estado = HealthService.listo()
+    if estado["status"] != "ready":
+        response.status_code = 503
+    return estado
@@ -1,12 +1,34 @@
 """
 Rutas: Lubricación
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime
-from backend.app.core.database import get_db
-from backend.app.services.lubricacion_service import LubricacionService
-from backend.app.schemas.historial import HistorialCreate, HistorialResponse
+from typing import Optional
+from backend.app.core.config import settings
+from backend.app.core.database import get_async_db_lectura, get_db, sesiones_lectura
+from backend.app.core.presupuesto import presupuesto_consultas
+from backend.app.core.cache import responder_con_cache
+from backend.app.core.pagination import CURSOR_HEADER
+from backend.app.core.respuestas import respuesta_json
+from backend.app.services.lubricacion_service import AsyncLubricacionService, LubricacionService
+from backend.app.services.exportacion_service import ExportacionService
+from backend.app.services.idempotencia_service import (
+    CABECERA as CABECERA_IDEMPOTENCIA, CABECERA_REPETIDA, ClaveReutilizada, SolicitudIdempotente, SolicitudRepetida,
+)
+from backend.app.services.particion_service import FueraDeRetencion
+from backend.app.services.rodamiento_service import RodamientoService
+from backend.app.services.vencimientos_service import indice_vencimientos
+from backend.app.schemas.historial import (
+    HistorialCreate, HistorialResponse, EjecucionLoteCreate, EjecucionLoteResponse,
+)
+from backend.app.schemas.comunes import FechaUTC
+from backend.app.schemas.plan import PlanResumen
+from backend.app.schemas.rodamiento import (
+    CalculoSKFItem, CalculoSKFResponse, CalculoSKFResultado, RecalculoFlotaResultado,
+)
 
 router = APIRouter(
     prefix="/api/lubricacion",
@@ -14,101 +36,226 @@ router = APIRouter(
     responses={404: {"description": "No encontrado"}}
 )
 
-@router.get("/planes/todos")
-def obtener_todos_los_planes(
+_lista_planes = TypeAdapter(list[PlanResumen])
+_lista_historial = TypeAdapter(list[HistorialResponse])
+
+@router.get("/planes/todos", response_model=list[PlanResumen])
+@presupuesto_consultas(1)
+async def obtener_todos_los_planes(
+    request: Request,
     planta: str = Query(None),
     search: str = Query(None),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db_lectura)
 ):
     """Obtener todos los planes de lubricación (para ejecución manual)"""
-    planes = LubricacionService.obtener_todos_planes(db, planta=planta)
-    
-    resultado = []
-    for plan in planes:
-        dias_restantes = (plan.proxima_fecha_lubricacion - datetime.utcnow()).days
-        nombre = plan.equipo.nombre
-        if search and search.lower() not in nombre.lower():
-            continue
-        resultado.append({
-            "id": plan.id,
-            "equipo_id": plan.equipo_id,
-            "equipo_nombre": nombre,
-            "equipo_planta": plan.equipo.planta,
-            "criticidad": plan.equipo.criticidad,
-            "tipo_lubricante": plan.tipo_lubricante,
-            "cantidad_gramos": plan.cantidad_gramos,
-            "frecuencia_dias": plan.frecuencia_dias,
-            "proxima_fecha": plan.proxima_fecha_lubricacion,
-            "ultima_fecha": plan.ultima_fecha_lubricacion,
-            "dias_restantes": dias_restantes,
-            "estado": "🔴 VENCIDO" if dias_restantes < 0 else "🟡 HOY/MAÑANA" if dias_restantes <= 1 else "🟢 AL DÍA"
-        })
+    async def producir():
+        try:
+            planes, siguiente = await AsyncLubricacionService.obtener_todos_planes(
+                db, planta=planta, search=search, limit=limit, cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        cuerpo = _lista_planes.dump_json(_lista_planes.validate_python(planes, from_attributes=True))
+        return cuerpo, {CURSOR_HEADER: siguiente} if siguiente else {}
     
-    return sorted(resultado, key=lambda x: x["equipo_nombre"])
+    return await responder_con_cache(request, planta, producir)
 
-@router.get("/planes/proximos")
-def obtener_planes_proximos(
+@router.get("/planes/proximos", response_model=list[PlanResumen])
+@presupuesto_consultas(1)
+async def obtener_planes_proximos(
+    request: Request,
     dias: int = Query(7, ge=1, le=30),
     planta: str = Query(None),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db_lectura)
 ):
-    """Obtener planes próximos a vencer"""
-    planes = LubricacionService.obtener_planes_proximos(db, dias=dias, planta=planta)
-    
-    resultado = []
-    for plan in planes:
-        dias_restantes = (plan.proxima_fecha_lubricacion - datetime.utcnow()).days
-        resultado.append({
-            "id": plan.id,
-            "equipo_id": plan.equipo_id,
-            "equipo_nombre": plan.equipo.nombre,
-            "equipo_planta": plan.equipo.planta,
-            "criticidad": plan.equipo.criticidad,
-            "tipo_lubricante": plan.tipo_lubricante,
-            "cantidad_gramos": plan.cantidad_gramos,
-            "proxima_fecha": plan.proxima_fecha_lubricacion,
-            "dias_restantes": dias_restantes,
-            "estado": "🔴 VENCIDO" if dias_restantes < 0 else "🟡 HOY/MAÑANA" if dias_restantes <= 1 else "🟢 PRÓXIMOS"
-        })
+    """Obtener planes próximos a vencer (del índice en memoria si está al día)"""
+    async def producir():
+        try:
+            if indice_vencimientos.disponible(planta):
+                planes, siguiente = indice_vencimientos.proximos(dias=dias, planta=planta, limit=limit, cursor=cursor)
+            else:
+                planes, siguiente = await AsyncLubricacionService.obtener_planes_proximos(
+                    db, dias=dias, planta=planta, limit=limit, cursor=cursor
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        cuerpo = _lista_planes.dump_json(_lista_planes.validate_python(planes, from_attributes=True))
+        return cuerpo, {CURSOR_HEADER: siguiente} if siguiente else {}
     
-    return sorted(resultado, key=lambda x: x["proxima_fecha"])
+    return await responder_con_cache(request, planta, producir)
+
+def _respuesta_repetida(e: SolicitudRepetida) -> Response:
+    """Respuesta guardada de la solicitud original, marcada como repetida"""
+    return Response(
+        content=e.respuesta,
+        status_code=e.estado_http,
+        media_type="application/json",
+        headers={CABECERA_REPETIDA: "true"},
+    )
+
+def registrar_lote(request: Request, ejecuciones: list, idempotency_key: Optional[str], db: Session):
+    """
+    Cuerpo común de /api/lubricacion/ejecutar/lote y /api/sync/ejecuciones. Con
+    Idempotency-Key, un reintento del mismo lote devuelve la respuesta original.
+    """
+    idempotencia = None
+    if idempotency_key is not None:
+        try:
+            idempotencia = SolicitudIdempotente.crear(
+                idempotency_key,
+                request.scope["route"].path,
+                "\n".join(e.model_dump_json() for e in ejecuciones).encode(),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return LubricacionService.registrar_ejecuciones_lote(db, ejecuciones, idempotencia)
+    except SolicitudRepetida as e:
+        return _respuesta_repetida(e)
+    except ClaveReutilizada as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/ejecutar/lote", response_model=EjecucionLoteResponse)
+@presupuesto_consultas(11)
+def ejecutar_lubricacion_lote(
+    request: Request,
+    ejecuciones: list[EjecucionLoteCreate],
+    idempotency_key: Optional[str] = Header(None, alias=CABECERA_IDEMPOTENCIA),
+    db: Session = Depends(get_db)
+):
+    """
+    Registrar muchas ejecuciones de lubricación en una sola transacción. Las que traen
+    id_cliente ya registrado vuelven como repetidas; con Idempotency-Key, un reintento
+    con la misma clave y el mismo cuerpo devuelve la respuesta original.
+    """
+    return registrar_lote(request, ejecuciones, idempotency_key, db)
 
 @router.post("/ejecutar/{plan_id}", response_model=HistorialResponse)
+@presupuesto_consultas(6)
 def ejecutar_lubricacion(
+    request: Request,
     plan_id: int,
     ejecucion: HistorialCreate,
+    idempotency_key: Optional[str] = Header(None, alias=CABECERA_IDEMPOTENCIA),
     db: Session = Depends(get_db)
 ):
-    """Registrar ejecución de lubricación"""
+    """
+    Registrar ejecución de lubricación. Con Idempotency-Key, un reintento con la misma
+    clave y el mismo cuerpo devuelve la respuesta original sin registrar otra ejecución.
+    """
+    ejecucion.plan_id = plan_id
+    idempotencia = None
+    if idempotency_key is not None:
+        try:
+            idempotencia = SolicitudIdempotente.crear(
+                idempotency_key, request.scope["route"].path, ejecucion.model_dump_json().encode()
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        ejecucion.plan_id = plan_id
-        return LubricacionService.registrar_ejecucion(db, ejecucion)
+        return LubricacionService.registrar_ejecucion(db, ejecucion, idempotencia)
+    except SolicitudRepetida as e:
+        return _respuesta_repetida(e)
+    except (ClaveReutilizada, FueraDeRetencion) as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/historial")
-def obtener_historial(
+@router.get("/historial", response_model=list[HistorialResponse])
+@presupuesto_consultas(1)
+async def obtener_historial(
     plan_id: int = Query(None),
     planta: str = Query(None),
-    limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    desde: Optional[FechaUTC] = Query(None),
+    hasta: Optional[FechaUTC] = Query(None),
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    """Obtener historial de lubricaciones (paginado por cursor, opcionalmente acotado por fecha)"""
+    try:
+        historial, siguiente = await AsyncLubricacionService.obtener_historial(
+            db, plan_id=plan_id, planta=planta, limit=limit, cursor=cursor, desde=desde, hasta=hasta
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_json(_lista_historial, historial, {CURSOR_HEADER: siguiente} if siguiente else None)
+
+@router.get("/historial/exportar")
+@presupuesto_consultas(1)
+def exportar_historial(
+    request: Request,
+    planta: str = Query(None),
+    desde: Optional[FechaUTC] = Query(None),
+    hasta: Optional[FechaUTC] = Query(None),
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = Query(False),
 ):
-    """Obtener historial de lubricaciones"""
-    historial = LubricacionService.obtener_historial(db, plan_id=plan_id, planta=planta, limit=limit)
-    return historial
+    """Exportar historial completo (con equipo y plan) como CSV o NDJSON en streaming"""
+    nombre = f"historial_{planta or 'todas'}.{formato}"
+    media_type = "text/csv" if formato == "csv" else "application/x-ndjson"
+    if gzip:
+        nombre += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        ExportacionService.exportar_historial(
+            planta, desde, hasta, formato, comprimir=gzip, sesiones=sesiones_lectura(request)[0]
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
 
-@router.get("/calcular-skf")
+@router.get("/calcular-skf", response_model=CalculoSKFResponse)
+@presupuesto_consultas(0)
 def calcular_skf(
-    diametro_mm: float = Query(..., gt=0),
-    ancho_mm: float = Query(..., gt=0)
+    diametro_mm: Optional[float] = Query(None, gt=0),
+    ancho_mm: Optional[float] = Query(None, gt=0),
+    designacion: Optional[str] = Query(None, max_length=100),
 ):
-    """Calcular cantidad de grasa según fórmula SKF"""
+    """Calcular cantidad de grasa según fórmula SKF (con D y B o con la designación del rodamiento)"""
+    if diametro_mm is None or ancho_mm is None:
+        resultado = RodamientoService.calcular_lote([
+            CalculoSKFItem(designacion=designacion, diametro_mm=diametro_mm, ancho_mm=ancho_mm)
+        ])[0]
+        if resultado["error"]:
+            raise HTTPException(status_code=400, detail=resultado["error"])
+        diametro_mm, ancho_mm = resultado["diametro_mm"], resultado["ancho_mm"]
     cantidad = LubricacionService.calcular_cantidad_skf(diametro_mm, ancho_mm)
     return {
         "diametro_mm": diametro_mm,
         "ancho_mm": ancho_mm,
         "cantidad_gramos": round(cantidad, 2),
         "formula": "G = 0.005 × D × B"
-    }
\ No newline at end of file
+    }
+
+@router.post("/calcular-skf/lote", response_model=list[CalculoSKFResultado])
+@presupuesto_consultas(0)
+def calcular_skf_lote(items: list[CalculoSKFItem]):
+    """Calcular la cantidad SKF de muchos rodamientos (por designación de catálogo o D/B)"""
+    if len(items) > settings.SKF_LOTE_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote supera el máximo de {settings.SKF_LOTE_MAX} rodamientos"
+        )
+    return RodamientoService.calcular_lote(items)
+
+@router.post("/recalcular-cantidades", response_model=RecalculoFlotaResultado)
+@presupuesto_consultas(3, por_bloque=2)
+def recalcular_cantidades(
+    modo: str = Query("completar", pattern="^(completar|validar|sobrescribir)$"),
+    tolerancia: float = Query(0.1, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Llenar o validar cantidad_gramos de toda la flota desde modelo_rodamiento"""
+    try:
+        return RodamientoService.recalcular_flota(db, modo=modo, tolerancia=tolerancia)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,12 @@
+"""
+Rutas: Métricas Prometheus
+"""
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+router = APIRouter(tags=["metricas"])
+
+@router.get("/metrics", include_in_schema=False)
+def metricas():
+    """Métricas de la aplicación en formato de texto de Prometheus"""
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,72 @@
+"""
+Rutas: Pronóstico de carga de trabajo y demanda de grasa
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from backend.app.core.database import get_async_db_lectura
+from backend.app.core.presupuesto import presupuesto_consultas
+from backend.app.core.cache import responder_con_cache
+from backend.app.core.pagination import CURSOR_HEADER
+from backend.app.services.pronostico_service import AsyncPronosticoService, PronosticoService
+from backend.app.schemas.pronostico import OcurrenciaPlan, PronosticoDemanda
+
+router = APIRouter(
+    prefix="/api/pronostico",
+    tags=["pronostico"],
+)
+
+_demanda = TypeAdapter(PronosticoDemanda)
+_lista_ocurrencias = TypeAdapter(list[OcurrenciaPlan])
+
+@router.get("/demanda", response_model=PronosticoDemanda)
+@presupuesto_consultas(1)
+async def pronosticar_demanda(
+    request: Request,
+    planta: str = Query(None),
+    dias: int = Query(90, ge=1, le=366),
+    agrupacion: str = Query("semana", pattern="^(dia|semana)$"),
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    """Tareas y gramos proyectados por día/semana, lubricante, planta y criticidad"""
+    async def producir():
+        planes = await AsyncPronosticoService.cargar_planes(db, planta=planta)
+        
+        def calcular():
+            ocurrencias = PronosticoService.expandir(planes, dias)
+            demanda = PronosticoService.agregar(planes, ocurrencias, dias, agrupacion)
+            return _demanda.dump_json(_demanda.validate_python(demanda))
+        
+        # La proyección es CPU pura: fuera del event loop
+        return await run_in_threadpool(calcular), {}
+    
+    return await responder_con_cache(request, planta, producir)
+
+@router.get("/calendario", response_model=list[OcurrenciaPlan])
+@presupuesto_consultas(1)
+async def calendario_vencimientos(
+    request: Request,
+    planta: str = Query(None),
+    dias: int = Query(30, ge=1, le=366),
+    limit: int = Query(500, ge=1, le=5000),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    """Cada vencimiento proyectado en el horizonte, por fecha (paginado por cursor)"""
+    async def producir():
+        planes = await AsyncPronosticoService.cargar_planes(db, planta=planta)
+        
+        def calcular():
+            ocurrencias = PronosticoService.expandir(planes, dias)
+            return PronosticoService.calendario(planes, ocurrencias, limit=limit, cursor=cursor)
+        
+        try:
+            filas, siguiente = await run_in_threadpool(calcular)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        cuerpo = _lista_ocurrencias.dump_json(_lista_ocurrencias.validate_python(filas))
+        return cuerpo, {CURSOR_HEADER: siguiente} if siguiente else {}
+    
+    return await responder_con_cache(request, planta, producir)
@@ -0,0 +1,56 @@
+"""
+Rutas: Sincronización incremental para dispositivos sin conexión
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional
+from backend.app.core.database import get_async_db, get_db
+from backend.app.core.presupuesto import presupuesto_consultas
+from backend.app.core.respuestas import respuesta_json
+from backend.app.routes.lubricacion import registrar_lote
+from backend.app.services.idempotencia_service import CABECERA as CABECERA_IDEMPOTENCIA
+from backend.app.services.sync_service import AsyncSyncService
+from backend.app.schemas.historial import EjecucionOfflineCreate, EjecucionLoteResponse
+from backend.app.schemas.sync import SyncRespuesta
+
+router = APIRouter(
+    prefix="/api/sync",
+    tags=["sync"],
+)
+
+_sync = TypeAdapter(SyncRespuesta)
+
+@router.get("", response_model=SyncRespuesta)
+@presupuesto_consultas(3)
+async def sincronizar(
+    since: Optional[str] = Query(None, description="Token de la sincronización anterior (vacío: carga inicial)"),
+    planta: str = Query(None),
+    # Primario, no réplica: una fila aún no replicada quedaría detrás del token y el
+    # dispositivo no la recibiría nunca
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Equipos, planes e historial modificados desde el token, más las bajas de equipos"""
+    try:
+        cambios = await AsyncSyncService.obtener_cambios(db, token=since, planta=planta)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_json(_sync, cambios)
+
+@router.post("/ejecuciones", response_model=EjecucionLoteResponse)
+@presupuesto_consultas(11)
+def subir_ejecuciones(
+    request: Request,
+    ejecuciones: list[EjecucionOfflineCreate],
+    idempotency_key: Optional[str] = Header(None, alias=CABECERA_IDEMPOTENCIA),
+    db: Session = Depends(get_db)
+):
+    """
+    Sube las ejecuciones encoladas sin conexión (con su fecha_ejecucion real) en una sola
+    transacción. Un plan nunca retrocede por una ejecución más antigua que su última.
+    Cada ejecución lleva el id_cliente que generó el dispositivo: reenviar la cola tras
+    perder la respuesta no duplica historial ni consumo (vuelven como repetidas). Con
+    Idempotency-Key, el reenvío del mismo lote devuelve además la respuesta original.
+    """
+    return registrar_lote(request, ejecuciones, idempotency_key, db)
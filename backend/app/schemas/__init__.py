@@ -1,14 +1,33 @@
 """
 Importar todos los schemas
 """
+from .comunes import Mensaje, InfoAPI, HealthResponse, LivenessResponse, EstadoPool, ReadinessResponse, ErrorInterno
 from .equipo import EquipoCreate, EquipoUpdate, EquipoResponse
-from .plan import PlanCreate, PlanUpdate, PlanResponse
-from .historial import HistorialCreate, HistorialResponse
+from .plan import PlanCreate, PlanUpdate, PlanResponse, PlanResumen
+from .historial import (
+    HistorialCreate, HistorialResponse, EjecucionLoteCreate, EjecucionOfflineCreate, EjecucionLoteItem, EjecucionLoteResponse,
+)
 from .usuario import UsuarioCreate, UsuarioResponse
+from .dashboard import DashboardResumen
+from .importacion import ImportacionError, ImportacionResultado
+from .pronostico import PronosticoSerie, PronosticoLubricante, PronosticoDemanda, OcurrenciaPlan
+from .consumo import ConsumoSerie, ConsumoLubricante, ConsumoResumen, ConsumoEquipo
+from .eventos import CambioPlanes
+from .sync import SyncRespuesta
+from .rodamiento import CalculoSKFItem, CalculoSKFResponse, CalculoSKFResultado, DiscrepanciaCantidad, RecalculoFlotaResultado
 
 __all__ = [
+    "Mensaje", "InfoAPI", "HealthResponse", "LivenessResponse", "EstadoPool", "ReadinessResponse", "ErrorInterno",
     "EquipoCreate", "EquipoUpdate", "EquipoResponse",
-    "PlanCreate", "PlanUpdate", "PlanResponse",
-    "HistorialCreate", "HistorialResponse",
+    "PlanCreate", "PlanUpdate", "PlanResponse", "PlanResumen",
+    "HistorialCreate", "HistorialResponse", "EjecucionLoteCreate", "EjecucionOfflineCreate",
+    "EjecucionLoteItem", "EjecucionLoteResponse",
     "UsuarioCreate", "UsuarioResponse",
+    "DashboardResumen",
+    "ImportacionError", "ImportacionResultado",
+    "PronosticoSerie", "PronosticoLubricante", "PronosticoDemanda", "OcurrenciaPlan",
+    "ConsumoSerie", "ConsumoLubricante", "ConsumoResumen", "ConsumoEquipo",
+    "CambioPlanes",
+    "SyncRespuesta",
+    "CalculoSKFItem", "CalculoSKFResponse", "CalculoSKFResultado", "DiscrepanciaCantidad", "RecalculoFlotaResultado",
 ]
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Schemas: Respuestas generales de la API
+"""
+from pydantic import AfterValidator, BaseModel
+from datetime import datetime, timezone
+from typing import Annotated, Dict, Optional
+
+def utc_sin_zona(fecha: Optional[datetime]) -> Optional[datetime]:
+    """
+    Las columnas de fecha son TIMESTAMP en UTC: una fecha con zona ("...Z", "-03:00") se pasa
+    a UTC sin zona. asyncpg rechaza comparar una columna sin zona con un valor con zona.
+    """
+    if fecha is not None and fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return fecha
+
+# Fecha recibida (p. ej. desde/hasta en la query) ya normalizada con utc_sin_zona
+FechaUTC = Annotated[datetime, AfterValidator(utc_sin_zona)]
+
+class Mensaje(BaseModel):
+    message: str
+
+class InfoAPI(BaseModel):
+    message: str
+    version: str
+    docs: str
+
+class HealthResponse(BaseModel):
+    status: str
+    timestamp: datetime
+    database: str
+    error: Optional[str] = None
+
+class LivenessResponse(BaseModel):
+    status: str
+    timestamp: datetime
+
+class EstadoPool(BaseModel):
+    tamano: int
+    en_uso: int
+    libres: int
+    overflow: int
+    maximo: int
+    utilizacion: float
+
+class ReadinessResponse(BaseModel):
+    status: str
+    timestamp: datetime
+    database: str
+    latencia_ms: Optional[float] = None
+    # Antigüedad del ping reutilizado (HEALTH_PING_TTL_SEGUNDOS)
+    ping_hace_segundos: float
+    error: Optional[str] = None
+    pools: Dict[str, EstadoPool]
+
+class ErrorInterno(BaseModel):
+    error: str
+    detail: str
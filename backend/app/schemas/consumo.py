@@ -0,0 +1,35 @@
+"""
+Schemas: Consumo de lubricante (agregado consumo_diario)
+"""
+from pydantic import BaseModel
+from datetime import date
+from typing import List
+
+class ConsumoSerie(BaseModel):
+    periodo: date
+    planta: str
+    tipo_lubricante: str
+    ejecuciones: int
+    gramos: float
+
+class ConsumoLubricante(BaseModel):
+    tipo_lubricante: str
+    ejecuciones: int
+    gramos: float
+    kilogramos: float
+
+class ConsumoResumen(BaseModel):
+    desde: date
+    hasta: date
+    agrupacion: str
+    total_ejecuciones: int
+    total_gramos: float
+    por_lubricante: List[ConsumoLubricante]
+    series: List[ConsumoSerie]
+
+class ConsumoEquipo(BaseModel):
+    equipo_id: int
+    equipo_nombre: str
+    planta: str
+    ejecuciones: int
+    gramos: float
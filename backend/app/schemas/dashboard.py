@@ -0,0 +1,28 @@
+"""
+Schemas: Dashboard
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class DashboardResumen(BaseModel):
+    """
+    total_ejecuciones y total_grasa_aplicada cubren dias_historial; tecnicos_unicos, los
+    últimos dias_tecnicos (dias_historial acotado a DASHBOARD_TECNICOS_DIAS).
+    """
+    planta: Optional[str] = None
+    total_equipos: int
+    equipos_activos: int
+    equipos_mantenimiento: int
+    criticidad_a: int
+    criticidad_b: int
+    criticidad_c: int
+    planes_vencidos: int
+    planes_hoy: int
+    planes_proximos: int
+    dias_historial: int
+    dias_tecnicos: int
+    total_ejecuciones: int
+    total_grasa_aplicada: float
+    tecnicos_unicos: int
+    generado_en: datetime
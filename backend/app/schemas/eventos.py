@@ -0,0 +1,17 @@
+"""
+Schemas: Eventos de cambios (SSE)
+"""
+from pydantic import BaseModel
+from typing import List, Optional
+from backend.app.schemas.plan import PlanResumen
+
+class CambioPlanes(BaseModel):
+    """
+    Delta para el listado de planes de una planta: el cliente quita los planes con id en
+    `ids` o equipo_id en `equipos` y luego agrega/reemplaza los de `planes`.
+    """
+    tipo: str
+    planta: Optional[str] = None
+    ids: List[int] = []
+    equipos: List[int] = []
+    planes: List[PlanResumen] = []
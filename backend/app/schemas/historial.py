@@ -1,9 +1,14 @@
 """
 Schemas: Historial de Lubricación
 """
-from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import datetime, timedelta
+from typing import Optional, List
+from uuid import UUID
+from backend.app.schemas.comunes import utc_sin_zona
+
+# Tolerancia para relojes de dispositivos adelantados; más allá es una fecha inválida
+MARGEN_FUTURO = timedelta(days=1)
 
 class HistorialBase(BaseModel):
     plan_id: int
@@ -13,12 +18,54 @@ class HistorialBase(BaseModel):
 class HistorialCreate(HistorialBase):
     observaciones: Optional[str] = None
     fecha_ejecucion: Optional[datetime] = None
+    
+    @field_validator("fecha_ejecucion")
+    @classmethod
+    def _utc_sin_zona(cls, fecha: Optional[datetime]) -> Optional[datetime]:
+        # En UTC sin zona para compararla con utcnow() y agruparla por el mismo día que el historial
+        fecha = utc_sin_zona(fecha)
+        if fecha is not None and fecha > datetime.utcnow() + MARGEN_FUTURO:
+            raise ValueError("fecha_ejecucion no puede ser posterior a mañana")
+        return fecha
+
+class EjecucionLoteCreate(HistorialCreate):
+    # Generado por el cliente: un reenvío con el mismo id y fecha no se registra dos veces
+    id_cliente: Optional[UUID] = None
+    
+    @model_validator(mode="after")
+    def _id_con_fecha(self) -> "EjecucionLoteCreate":
+        # La deduplicación es por (id_cliente, fecha_ejecucion): sin fecha, cada reenvío
+        # tomaría la hora del servidor y se registraría otra vez
+        if self.id_cliente is not None and self.fecha_ejecucion is None:
+            raise ValueError("id_cliente requiere fecha_ejecucion")
+        return self
+
+class EjecucionOfflineCreate(EjecucionLoteCreate):
+    """Ejecución encolada sin conexión: id y fecha real obligatorios para deduplicar reenvíos"""
+    id_cliente: UUID
+    fecha_ejecucion: datetime
 
 class HistorialResponse(HistorialBase):
     id: int
     fecha_ejecucion: datetime
     observaciones: Optional[str] = None
     created_at: datetime
+    id_cliente: Optional[UUID] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class EjecucionLoteItem(BaseModel):
+    indice: int
+    plan_id: int
+    ok: bool
+    historial_id: Optional[int] = None
+    # Ya estaba registrada (reenvío): historial_id es la fila existente
+    repetida: bool = False
+    error: Optional[str] = None
+
+class EjecucionLoteResponse(BaseModel):
+    registrados: int
+    repetidos: int = 0
+    errores: int
+    resultados: List[EjecucionLoteItem]
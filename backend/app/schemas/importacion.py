@@ -0,0 +1,17 @@
+"""
+Schemas: Importación masiva
+"""
+from pydantic import BaseModel
+from typing import Optional, List
+
+class ImportacionError(BaseModel):
+    fila: int
+    nombre: Optional[str] = None
+    error: str
+
+class ImportacionResultado(BaseModel):
+    procesadas: int
+    creados: int
+    actualizados: int
+    total_errores: int
+    errores: List[ImportacionError]
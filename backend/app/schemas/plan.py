@@ -4,6 +4,7 @@ Schemas: Planes de Lubricación
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
+from backend.app.schemas.equipo import CriticidadEnum, PlantaEnum
 
 class PlanBase(BaseModel):
     equipo_id: int
@@ -24,8 +25,27 @@ class PlanResponse(PlanBase):
     id: int
     ultima_fecha_lubricacion: datetime
     proxima_fecha_lubricacion: datetime
+    version: int = 1
     created_at: datetime
     updated_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PlanResumen(BaseModel):
+    """Fila plana plan + equipo para los listados de planes"""
+    id: int
+    equipo_id: int
+    equipo_nombre: str
+    equipo_planta: PlantaEnum
+    criticidad: CriticidadEnum
+    tipo_lubricante: Optional[str] = None
+    cantidad_gramos: Optional[float] = None
+    frecuencia_dias: int
+    proxima_fecha: datetime
+    ultima_fecha: datetime
+    dias_restantes: int
+    estado: str
+    
+    class Config:
+        from_attributes = True
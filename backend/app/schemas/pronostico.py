@@ -0,0 +1,40 @@
+"""
+Schemas: Pronóstico de carga de trabajo y demanda de grasa
+"""
+from pydantic import BaseModel
+from datetime import date
+from typing import List
+
+class PronosticoSerie(BaseModel):
+    periodo: date
+    tipo_lubricante: str
+    planta: str
+    criticidad: str
+    tareas: int
+    gramos: float
+
+class PronosticoLubricante(BaseModel):
+    tipo_lubricante: str
+    tareas: int
+    gramos: float
+    kilogramos: float
+
+class PronosticoDemanda(BaseModel):
+    desde: date
+    hasta: date
+    agrupacion: str
+    total_planes: int
+    total_tareas: int
+    total_gramos: float
+    por_lubricante: List[PronosticoLubricante]
+    series: List[PronosticoSerie]
+
+class OcurrenciaPlan(BaseModel):
+    fecha: date
+    plan_id: int
+    equipo_id: int
+    equipo_nombre: str
+    planta: str
+    criticidad: str
+    tipo_lubricante: str
+    cantidad_gramos: float
@@ -0,0 +1,44 @@
+"""
+Schemas: Rodamientos y cálculo SKF
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+class CalculoSKFItem(BaseModel):
+    designacion: Optional[str] = Field(None, max_length=100)
+    diametro_mm: Optional[float] = Field(None, gt=0)
+    ancho_mm: Optional[float] = Field(None, gt=0)
+
+class CalculoSKFResponse(BaseModel):
+    diametro_mm: float
+    ancho_mm: float
+    cantidad_gramos: float
+    formula: str
+
+class CalculoSKFResultado(BaseModel):
+    indice: int
+    designacion: Optional[str] = None
+    designacion_catalogo: Optional[str] = None
+    diametro_mm: Optional[float] = None
+    ancho_mm: Optional[float] = None
+    cantidad_gramos: Optional[float] = None
+    error: Optional[str] = None
+
+class DiscrepanciaCantidad(BaseModel):
+    equipo_id: int
+    equipo_nombre: str
+    modelo_rodamiento: Optional[str] = None
+    cantidad_actual: float
+    cantidad_calculada: float
+
+class RecalculoFlotaResultado(BaseModel):
+    modo: str
+    total_equipos: int
+    resueltos: int
+    sin_modelo: int
+    sin_catalogo: int
+    modelos_sin_catalogo: List[str]
+    equipos_actualizados: int
+    planes_actualizados: int
+    total_discrepancias: int
+    discrepancias: List[DiscrepanciaCantidad]
@@ -0,0 +1,22 @@
+"""
+Schemas: Sincronización incremental (dispositivos sin conexión)
+"""
+from pydantic import BaseModel
+from typing import List
+from backend.app.schemas.equipo import EquipoResponse
+from backend.app.schemas.plan import PlanResponse
+from backend.app.schemas.historial import HistorialResponse
+
+class SyncRespuesta(BaseModel):
+    """
+    Cambios desde el token recibido. `equipos_eliminados` son equipos desactivados (o que
+    ya no son de la planta pedida): el cliente los borra junto con sus planes. Con
+    completo=False quedan más cambios y se vuelve a llamar de inmediato con `token`.
+    Las filas pueden repetirse entre respuestas (ventana de solapamiento): aplicar por id.
+    """
+    token: str
+    completo: bool
+    equipos: List[EquipoResponse]
+    planes: List[PlanResponse]
+    historial: List[HistorialResponse]
+    equipos_eliminados: List[int]
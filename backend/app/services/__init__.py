@@ -1,7 +1,30 @@
 """
 Servicios de la aplicación
 """
-from .equipo_service import EquipoService
-from .lubricacion_service import LubricacionService
+from .equipo_service import EquipoService, AsyncEquipoService
+from .lubricacion_service import LubricacionService, AsyncLubricacionService
+from .dashboard_service import DashboardService, AsyncDashboardService
+from .importacion_service import ImportacionService
+from .exportacion_service import ExportacionService
+from .pronostico_service import PronosticoService, AsyncPronosticoService
+from .rodamiento_service import RodamientoService
+from .consumo_service import ConsumoService, AsyncConsumoService
+from .particion_service import ParticionService
+from .eventos_service import EventosService
+from .sync_service import SyncService, AsyncSyncService
+from .idempotencia_service import IdempotenciaService
+from .health_service import HealthService
 
-__all__ = ["EquipoService", "LubricacionService"]
\ No newline at end of file
+__all__ = [
+    "EquipoService", "LubricacionService", "DashboardService",
+    "AsyncEquipoService", "AsyncLubricacionService", "AsyncDashboardService",
+    "ImportacionService", "ExportacionService",
+    "PronosticoService", "AsyncPronosticoService",
+    "RodamientoService",
+    "ConsumoService", "AsyncConsumoService",
+    "ParticionService",
+    "EventosService",
+    "SyncService", "AsyncSyncService",
+    "IdempotenciaService",
+    "HealthService",
+]
\ No newline at end of file
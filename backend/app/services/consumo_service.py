@@ -0,0 +1,259 @@
+"""
+Servicio de Consumo de lubricante (agregado consumo_diario)
+"""
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import Date, Select, cast, delete, func, insert, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.app.models.consumo import ConsumoDiario
+from backend.app.models.equipo import Equipo
+from backend.app.models.historial import Historial
+from backend.app.models.plan_lubricacion import PlanLubricacion
+from backend.app.services.pronostico_service import SIN_LUBRICANTE
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Agrupación pública → unidad de date_trunc (las semanas de PostgreSQL empiezan el lunes)
+AGRUPACIONES = {"dia": "day", "semana": "week", "mes": "month", "anio": "year"}
+
+def _rango(desde: Optional[date], hasta: Optional[date]) -> tuple:
+    """Rango inclusivo; por defecto los últimos 365 días"""
+    hasta = hasta or datetime.utcnow().date()
+    desde = desde or hasta - timedelta(days=364)
+    if desde > hasta:
+        raise ValueError("desde debe ser anterior o igual a hasta")
+    return desde, hasta
+
+class ConsumoService:
+    
+    @staticmethod
+    def acumular(db: Session, ejecuciones: Iterable[tuple], bloque: int = 5000):
+        """
+        Suma ejecuciones a consumo_diario dentro de la transacción de quien registra.
+        Cada ejecución es (planta, fecha_ejecucion, equipo_id, tipo_lubricante, gramos).
+        Se agregan primero en memoria: un INSERT ... ON CONFLICT no puede tocar dos
+        veces la misma fila, y un lote suele repetir (día, equipo).
+        """
+        totales = {}
+        for planta, fecha, equipo_id, lubricante, gramos in ejecuciones:
+            clave = (fecha.date(), getattr(planta, "value", planta), equipo_id, lubricante or SIN_LUBRICANTE)
+            ejecuciones_previas, gramos_previos = totales.get(clave, (0, 0.0))
+            totales[clave] = (ejecuciones_previas + 1, gramos_previos + (gramos or 0.0))
+        
+        filas = [
+            {
+                "dia": dia, "planta": planta, "equipo_id": equipo_id, "tipo_lubricante": lubricante,
+                "ejecuciones": n, "gramos": g,
+            }
+            # En orden de clave: dos transacciones que suman a las mismas filas las bloquean
+            # en el mismo orden y no se traban entre sí
+            for (dia, planta, equipo_id, lubricante), (n, g) in sorted(totales.items())
+        ]
+        for inicio in range(0, len(filas), bloque):
+            sentencia = pg_insert(ConsumoDiario).values(filas[inicio:inicio + bloque])
+            db.execute(sentencia.on_conflict_do_update(
+                index_elements=[
+                    ConsumoDiario.dia, ConsumoDiario.planta, ConsumoDiario.equipo_id, ConsumoDiario.tipo_lubricante,
+                ],
+                set_={
+                    "ejecuciones": ConsumoDiario.ejecuciones + sentencia.excluded.ejecuciones,
+                    "gramos": ConsumoDiario.gramos + sentencia.excluded.gramos,
+                },
+            ))
+    
+    @staticmethod
+    def reconstruir(db: Session, desde: Optional[date] = None) -> int:
+        """
+        Recalcula consumo_diario desde el historial (todo, o solo desde `desde`).
+        Usa la planta y el lubricante actuales de cada equipo/plan. Los meses cuyas
+        particiones ya se retiraron no están en el historial: para conservarlos,
+        reconstruir con `desde` posterior al corte de retención.
+        """
+        try:
+            borrar = delete(ConsumoDiario)
+            if desde:
+                borrar = borrar.where(ConsumoDiario.dia >= desde)
+            db.execute(borrar)
+            
+            dia = cast(Historial.fecha_ejecucion, Date)
+            lubricante = func.coalesce(PlanLubricacion.tipo_lubricante, SIN_LUBRICANTE)
+            origen = (
+                select(
+                    dia, Equipo.planta, PlanLubricacion.equipo_id, lubricante,
+                    func.count(), func.sum(Historial.cantidad_aplicada),
+                )
+                .join(PlanLubricacion, Historial.plan_id == PlanLubricacion.id)
+                .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+                .group_by(dia, Equipo.planta, PlanLubricacion.equipo_id, lubricante)
+            )
+            if desde:
+                origen = origen.where(Historial.fecha_ejecucion >= datetime.combine(desde, datetime.min.time()))
+            filas = db.execute(
+                insert(ConsumoDiario).from_select(
+                    ["dia", "planta", "equipo_id", "tipo_lubricante", "ejecuciones", "gramos"], origen
+                )
+            ).rowcount
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error al reconstruir consumo diario: {str(e)}")
+            raise
+        logger.info(f"Consumo diario reconstruido: {filas} filas" + (f" desde {desde}" if desde else ""))
+        return filas
+    
+    @staticmethod
+    def _filtrar(query: Select, planta: str, equipo_id: int, tipo_lubricante: str, desde: date, hasta: date) -> Select:
+        query = query.where(ConsumoDiario.dia >= desde, ConsumoDiario.dia <= hasta)
+        if planta:
+            query = query.where(ConsumoDiario.planta == planta)
+        if equipo_id:
+            query = query.where(ConsumoDiario.equipo_id == equipo_id)
+        if tipo_lubricante:
+            query = query.where(ConsumoDiario.tipo_lubricante == tipo_lubricante)
+        return query
+    
+    @staticmethod
+    def consulta_series(
+        desde: date,
+        hasta: date,
+        agrupacion: str = "mes",
+        planta: str = None,
+        equipo_id: int = None,
+        tipo_lubricante: str = None,
+    ) -> Select:
+        """Ejecuciones y gramos por periodo, planta y lubricante"""
+        # Unidad como literal: un parámetro en SELECT y GROUP BY no cuenta como la misma expresión
+        unidad = literal_column(f"'{AGRUPACIONES[agrupacion]}'")
+        periodo = cast(func.date_trunc(unidad, ConsumoDiario.dia), Date).label("periodo")
+        query = select(
+            periodo,
+            ConsumoDiario.planta,
+            ConsumoDiario.tipo_lubricante,
+            func.sum(ConsumoDiario.ejecuciones).label("ejecuciones"),
+            func.sum(ConsumoDiario.gramos).label("gramos"),
+        )
+        query = ConsumoService._filtrar(query, planta, equipo_id, tipo_lubricante, desde, hasta)
+        return query.group_by(periodo, ConsumoDiario.planta, ConsumoDiario.tipo_lubricante).order_by(
+            periodo, ConsumoDiario.planta, ConsumoDiario.tipo_lubricante
+        )
+    
+    @staticmethod
+    def consulta_equipos(
+        desde: date,
+        hasta: date,
+        planta: str = None,
+        tipo_lubricante: str = None,
+        limit: int = 50,
+    ) -> Select:
+        """Equipos con mayor consumo en el rango"""
+        gramos = func.sum(ConsumoDiario.gramos)
+        query = select(
+            ConsumoDiario.equipo_id,
+            Equipo.nombre.label("equipo_nombre"),
+            ConsumoDiario.planta,
+            func.sum(ConsumoDiario.ejecuciones).label("ejecuciones"),
+            gramos.label("gramos"),
+        ).join(Equipo, ConsumoDiario.equipo_id == Equipo.id)
+        query = ConsumoService._filtrar(query, planta, None, tipo_lubricante, desde, hasta)
+        return (
+            query.group_by(ConsumoDiario.equipo_id, Equipo.nombre, ConsumoDiario.planta)
+            .order_by(gramos.desc(), ConsumoDiario.equipo_id)
+            .limit(limit)
+        )
+    
+    @staticmethod
+    def resumir(filas: list, desde: date, hasta: date, agrupacion: str) -> dict:
+        """Arma la respuesta de consumo_series con totales por lubricante"""
+        series = []
+        por_lubricante = {}
+        for periodo, planta, lubricante, ejecuciones, gramos in filas:
+            series.append({
+                "periodo": periodo,
+                "planta": planta,
+                "tipo_lubricante": lubricante,
+                "ejecuciones": int(ejecuciones),
+                "gramos": round(float(gramos), 2),
+            })
+            total = por_lubricante.setdefault(lubricante, [0, 0.0])
+            total[0] += int(ejecuciones)
+            total[1] += float(gramos)
+        
+        return {
+            "desde": desde,
+            "hasta": hasta,
+            "agrupacion": agrupacion,
+            "total_ejecuciones": sum(t[0] for t in por_lubricante.values()),
+            "total_gramos": round(sum(t[1] for t in por_lubricante.values()), 2),
+            "por_lubricante": [
+                {
+                    "tipo_lubricante": lubricante,
+                    "ejecuciones": n,
+                    "gramos": round(g, 2),
+                    "kilogramos": round(g / 1000, 3),
+                }
+                for lubricante, (n, g) in sorted(por_lubricante.items())
+            ],
+            "series": series,
+        }
+    
+    @staticmethod
+    def obtener_series(
+        db: Session,
+        desde: date = None,
+        hasta: date = None,
+        agrupacion: str = "mes",
+        planta: str = None,
+        equipo_id: int = None,
+        tipo_lubricante: str = None,
+    ) -> dict:
+        desde, hasta = _rango(desde, hasta)
+        query = ConsumoService.consulta_series(desde, hasta, agrupacion, planta, equipo_id, tipo_lubricante)
+        return ConsumoService.resumir(db.execute(query).all(), desde, hasta, agrupacion)
+    
+    @staticmethod
+    def obtener_equipos(
+        db: Session,
+        desde: date = None,
+        hasta: date = None,
+        planta: str = None,
+        tipo_lubricante: str = None,
+        limit: int = 50,
+    ) -> list:
+        desde, hasta = _rango(desde, hasta)
+        query = ConsumoService.consulta_equipos(desde, hasta, planta, tipo_lubricante, limit)
+        return [dict(f._mapping) for f in db.execute(query).all()]
+
+class AsyncConsumoService:
+    """Lecturas de ConsumoService sobre AsyncSession (mismas consultas)"""
+    
+    @staticmethod
+    async def obtener_series(
+        db: AsyncSession,
+        desde: date = None,
+        hasta: date = None,
+        agrupacion: str = "mes",
+        planta: str = None,
+        equipo_id: int = None,
+        tipo_lubricante: str = None,
+    ) -> dict:
+        desde, hasta = _rango(desde, hasta)
+        query = ConsumoService.consulta_series(desde, hasta, agrupacion, planta, equipo_id, tipo_lubricante)
+        return ConsumoService.resumir((await db.execute(query)).all(), desde, hasta, agrupacion)
+    
+    @staticmethod
+    async def obtener_equipos(
+        db: AsyncSession,
+        desde: date = None,
+        hasta: date = None,
+        planta: str = None,
+        tipo_lubricante: str = None,
+        limit: int = 50,
+    ) -> list:
+        desde, hasta = _rango(desde, hasta)
+        query = ConsumoService.consulta_equipos(desde, hasta, planta, tipo_lubricante, limit)
+        return [dict(f._mapping) for f in (await db.execute(query)).all()]
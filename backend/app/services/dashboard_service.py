@@ -0,0 +1,127 @@
+"""
+Servicio de Dashboard
+"""
+from sqlalchemy import Select, distinct, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from backend.app.core.cache import TTLCache
+from backend.app.core.config import settings
+from backend.app.models.consumo import ConsumoDiario
+from backend.app.models.equipo import Equipo
+from backend.app.models.plan_lubricacion import PlanLubricacion
+from backend.app.models.historial import Historial
+import logging
+
+logger = logging.getLogger(__name__)
+
+_cache_resumen = TTLCache(ttl_seconds=settings.DASHBOARD_CACHE_TTL)
+
+def dias_tecnicos(dias_historial: int) -> int:
+    """Ventana de tecnicos_unicos: el conteo distinto sale del historial crudo"""
+    return min(dias_historial, settings.DASHBOARD_TECNICOS_DIAS)
+
+class DashboardService:
+    
+    @staticmethod
+    def consulta_resumen(ahora: datetime, planta: str = None, dias_historial: int = 30) -> Select:
+        """
+        Cuatro agregados de una fila (equipos, planes, consumo, técnicos) combinados en un
+        solo SELECT. Ejecuciones y grasa salen de consumo_diario (días completos desde
+        ahora - dias_historial); solo tecnicos_unicos lee el historial, acotado a
+        dias_tecnicos() para no recorrer años de particiones.
+        """
+        vigente = Equipo.estado != "INACTIVO"
+        
+        equipos = select(
+            func.count().filter(vigente).label("total_equipos"),
+            func.count().filter(Equipo.estado == "ACTIVO").label("equipos_activos"),
+            func.count().filter(Equipo.estado == "MANTENIMIENTO").label("equipos_mantenimiento"),
+            func.count().filter(vigente, Equipo.criticidad == "A").label("criticidad_a"),
+            func.count().filter(vigente, Equipo.criticidad == "B").label("criticidad_b"),
+            func.count().filter(vigente, Equipo.criticidad == "C").label("criticidad_c"),
+        )
+        
+        proxima = PlanLubricacion.proxima_fecha_lubricacion
+        planes = (
+            select(
+                func.count().filter(proxima < ahora).label("planes_vencidos"),
+                func.count().filter(
+                    proxima >= ahora, proxima < ahora + timedelta(days=2)
+                ).label("planes_hoy"),
+                func.count().filter(proxima <= ahora + timedelta(days=30)).label("planes_proximos"),
+            )
+            .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+            .where(Equipo.estado == "ACTIVO")
+        )
+        
+        consumo = (
+            select(
+                func.coalesce(func.sum(ConsumoDiario.ejecuciones), 0).label("total_ejecuciones"),
+                func.coalesce(func.sum(ConsumoDiario.gramos), 0).label("total_grasa_aplicada"),
+            )
+            .where(ConsumoDiario.dia >= (ahora - timedelta(days=dias_historial)).date())
+        )
+        
+        tecnicos = (
+            select(func.count(distinct(Historial.tecnico)).label("tecnicos_unicos"))
+            .where(Historial.fecha_ejecucion >= ahora - timedelta(days=dias_tecnicos(dias_historial)))
+        )
+        
+        if planta:
+            equipos = equipos.where(Equipo.planta == planta)
+            planes = planes.where(Equipo.planta == planta)
+            consumo = consumo.where(ConsumoDiario.planta == planta)
+            tecnicos = (
+                tecnicos.join(PlanLubricacion, Historial.plan_id == PlanLubricacion.id)
+                .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+                .where(Equipo.planta == planta)
+            )
+        else:
+            equipos = equipos.select_from(Equipo)
+        
+        e, p, c, t = equipos.subquery(), planes.subquery(), consumo.subquery(), tecnicos.subquery()
+        return select(e, p, c, t).select_from(e.join(p, true()).join(c, true()).join(t, true()))
+    
+    @staticmethod
+    def _construir_resumen(fila, ahora: datetime, planta: str, dias_historial: int) -> dict:
+        resumen = {
+            **fila,
+            "planta": planta,
+            "dias_historial": dias_historial,
+            "dias_tecnicos": dias_tecnicos(dias_historial),
+            "total_grasa_aplicada": round(float(fila["total_grasa_aplicada"]), 2),
+            "generado_en": ahora,
+        }
+        _cache_resumen.set((planta, dias_historial), resumen)
+        return resumen
+    
+    @staticmethod
+    def obtener_resumen(db: Session, planta: str = None, dias_historial: int = 30) -> dict:
+        """
+        Calcula los KPIs del dashboard en una sola consulta agregada.
+        El resultado se cachea por (planta, dias_historial) durante DASHBOARD_CACHE_TTL segundos.
+        """
+        resumen = _cache_resumen.get((planta, dias_historial))
+        if resumen is not None:
+            return resumen
+        
+        ahora = datetime.utcnow()
+        query = DashboardService.consulta_resumen(ahora, planta, dias_historial)
+        fila = db.execute(query).mappings().one()
+        return DashboardService._construir_resumen(fila, ahora, planta, dias_historial)
+
+
+class AsyncDashboardService:
+    """DashboardService sobre AsyncSession (misma consulta y mismo caché)"""
+    
+    @staticmethod
+    async def obtener_resumen(db: AsyncSession, planta: str = None, dias_historial: int = 30) -> dict:
+        resumen = _cache_resumen.get((planta, dias_historial))
+        if resumen is not None:
+            return resumen
+        
+        ahora = datetime.utcnow()
+        query = DashboardService.consulta_resumen(ahora, planta, dias_historial)
+        fila = (await db.execute(query)).mappings().one()
+        return DashboardService._construir_resumen(fila, ahora, planta, dias_historial)
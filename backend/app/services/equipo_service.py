@@ -1,15 +1,23 @@
 """
 Servicio de Equipos
 """
+from sqlalchemy import Select, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from backend.app.models.equipo import Equipo
 from backend.app.models.plan_lubricacion import PlanLubricacion
 from backend.app.schemas.equipo import EquipoCreate, EquipoUpdate
+from backend.app.core.cache import cache_respuestas
+from backend.app.core.notificaciones import notificar
+from backend.app.core.pagination import decodificar_cursor, recortar_pagina
 import logging
 
 logger = logging.getLogger(__name__)
 
+def clave_equipo(equipo) -> tuple:
+    return equipo.nombre, equipo.id
+
 class EquipoService:
     
     @staticmethod
@@ -31,8 +39,10 @@ class EquipoService:
                 proxima_fecha_lubricacion=proxima_fecha
             )
             db.add(plan)
+            notificar(db, "equipos", equipo.planta, [equipo.id])
             db.commit()
             db.refresh(equipo)
+            cache_respuestas.invalidar(equipo.planta)
             
             logger.info(f"Equipo creado: {equipo.nombre}")
             return equipo
@@ -42,14 +52,28 @@ class EquipoService:
             raise
     
     @staticmethod
-    def obtener_equipos(db: Session, skip: int = 0, limit: int = 50, planta: str = None) -> list:
-        """Obtener lista de equipos activos, opcionalmente filtrados por planta"""
-        query = db.query(Equipo).filter(
-            Equipo.estado == "ACTIVO"
-        )
+    def consulta_equipos(limit: int = 50, planta: str = None, cursor: str = None) -> Select:
+        """Equipos activos ordenados por (nombre, id), pidiendo limit + 1 filas"""
+        query = select(Equipo).where(Equipo.estado == "ACTIVO")
         if planta:
-            query = query.filter(Equipo.planta == planta)
-        return query.offset(skip).limit(limit).all()
+            query = query.where(Equipo.planta == planta)
+        if cursor:
+            nombre, equipo_id = decodificar_cursor(cursor, 2)
+            try:
+                equipo_id = int(equipo_id)
+            except (TypeError, ValueError):
+                raise ValueError("Cursor inválido")
+            query = query.where(tuple_(Equipo.nombre, Equipo.id) > tuple_(str(nombre), equipo_id))
+        return query.order_by(Equipo.nombre, Equipo.id).limit(limit + 1)
+    
+    @staticmethod
+    def obtener_equipos(db: Session, limit: int = 50, planta: str = None, cursor: str = None) -> tuple:
+        """
+        Obtener equipos activos ordenados por (nombre, id), opcionalmente filtrados por planta.
+        Retorna (equipos, cursor_siguiente).
+        """
+        query = EquipoService.consulta_equipos(limit, planta, cursor)
+        return recortar_pagina(db.execute(query).scalars().all(), limit, clave_equipo)
     
     @staticmethod
     def obtener_equipo_por_id(db: Session, equipo_id: int) -> Equipo:
@@ -64,12 +88,25 @@ class EquipoService:
             if not equipo:
                 return None
             
+            planta_anterior, estado_anterior = equipo.planta, equipo.estado
             update_data = equipo_data.dict(exclude_unset=True)
             for key, value in update_data.items():
                 setattr(equipo, key, value)
             
+            if equipo.planta != planta_anterior or equipo.estado != estado_anterior:
+                # Sus planes aparecen o desaparecen para /api/sync de la planta: se marcan modificados
+                db.execute(
+                    update(PlanLubricacion)
+                    .where(PlanLubricacion.equipo_id == equipo.id)
+                    .values(updated_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+            
+            # Si cambió de planta el evento es de todas (planta None)
+            notificar(db, "equipos", equipo.planta if equipo.planta == planta_anterior else None, [equipo.id])
             db.commit()
             db.refresh(equipo)
+            cache_respuestas.invalidar(planta_anterior, equipo.planta)
             
             logger.info(f"Equipo actualizado: {equipo.nombre}")
             return equipo
@@ -87,11 +124,27 @@ class EquipoService:
                 return False
             
             equipo.estado = "INACTIVO"
+            notificar(db, "equipos", equipo.planta, [equipo.id])
             db.commit()
+            cache_respuestas.invalidar(equipo.planta)
             
             logger.info(f"Equipo desactivado: {equipo.nombre}")
             return True
         except Exception as e:
             db.rollback()
             logger.error(f"Error al eliminar equipo: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+class AsyncEquipoService:
+    """Lecturas de EquipoService sobre AsyncSession (mismas consultas)"""
+    
+    @staticmethod
+    async def obtener_equipos(
+        db: AsyncSession, limit: int = 50, planta: str = None, cursor: str = None
+    ) -> tuple:
+        query = EquipoService.consulta_equipos(limit, planta, cursor)
+        return recortar_pagina((await db.execute(query)).scalars().all(), limit, clave_equipo)
+    
+    @staticmethod
+    async def obtener_equipo_por_id(db: AsyncSession, equipo_id: int) -> Equipo:
+        return await db.get(Equipo, equipo_id)
@@ -0,0 +1,64 @@
+"""
+Servicio de Eventos: convierte los cambios de core/notificaciones.py en deltas para SSE
+
+Se suscribe al despachador de cambios; por cada evento lee una sola vez las filas de
+PlanResumen afectadas (no una por cliente) y publica en el hub un CambioPlanes por planta
+con conexiones. "recarga" (salvo la periódica) se reenvía para que el cliente recargue.
+"""
+from datetime import datetime
+from pydantic import TypeAdapter
+from sqlalchemy import Select
+
+from backend.app.core.database import SessionLocal
+from backend.app.core.eventos import hub_eventos
+from backend.app.models.plan_lubricacion import PlanLubricacion
+from backend.app.schemas.eventos import CambioPlanes
+from backend.app.services.lubricacion_service import LubricacionService
+import logging
+
+logger = logging.getLogger(__name__)
+
+_cambio = TypeAdapter(CambioPlanes)
+
+def _planta(valor):
+    return getattr(valor, "value", valor)
+
+class EventosService:
+    
+    @staticmethod
+    def registrar(despachador):
+        """Suscribe la difusión SSE a los eventos de cambios"""
+        despachador.suscribir(EventosService.difundir)
+    
+    @staticmethod
+    def consulta_cambios(evento: dict) -> Select:
+        """Filas de PlanResumen (equipos activos) de los planes o equipos del evento"""
+        columna = PlanLubricacion.id if evento["t"] == "planes" else PlanLubricacion.equipo_id
+        return LubricacionService.consulta_resumen_planes(datetime.utcnow()).where(columna.in_(evento["ids"]))
+    
+    @staticmethod
+    def difundir(evento: dict):
+        destinos = hub_eventos.plantas_conectadas()
+        if evento["p"] is not None:
+            destinos &= {evento["p"], None}
+        if not destinos:
+            return
+        
+        if evento["t"] == "recarga":
+            if not evento.get("periodica"):
+                for planta in destinos:
+                    hub_eventos.publicar(planta, "recarga", b"{}")
+            return
+        
+        with SessionLocal() as db:
+            filas = db.execute(EventosService.consulta_cambios(evento)).all()
+        
+        for planta in destinos:
+            cambio = _cambio.validate_python({
+                "tipo": evento["t"],
+                "planta": planta,
+                "ids": evento["ids"] if evento["t"] == "planes" else [],
+                "equipos": evento["ids"] if evento["t"] == "equipos" else [],
+                "planes": [f for f in filas if planta is None or _planta(f.equipo_planta) == planta],
+            }, from_attributes=True)
+            hub_eventos.publicar(planta, "cambio", _cambio.dump_json(cambio))
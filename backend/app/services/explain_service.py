@@ -0,0 +1,139 @@
+"""
+Servicio de diagnóstico de planes de consulta (EXPLAIN)
+"""
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import json
+import logging
+import re
+from backend.app.core.pagination import codificar_cursor
+from backend.app.services.equipo_service import EquipoService
+from backend.app.services.lubricacion_service import LubricacionService
+from backend.app.services.dashboard_service import DashboardService
+from backend.app.services.exportacion_service import ExportacionService
+from backend.app.services.consumo_service import ConsumoService
+from backend.app.services.sync_service import SyncService
+from backend.app.services.pronostico_service import PronosticoService
+from backend.app.services.vencimientos_service import consulta_planes_indexables
+from backend.app.services.eventos_service import EventosService
+from backend.app.models.plan_lubricacion import PlanLubricacion
+
+logger = logging.getLogger(__name__)
+
+TABLAS_CRITICAS = {"equipos", "planes_lubricacion", "historial_lubricacion", "consumo_diario"}
+
+# Recorridos completos buscados, que no cuentan como regresión: {consulta: tablas}
+SEQ_SCANS_PERMITIDOS = {
+    # Conteos de toda la flota sin filtro de planta: se leen todos los equipos
+    "dashboard": {"equipos"},
+}
+
+# Las particiones mensuales (historial_lubricacion_AAAAMM) cuentan como su tabla padre
+_SUFIJO_PARTICION = re.compile(r"_\d{6}$")
+
+class ExplainService:
+    
+    @staticmethod
+    def consultas() -> dict:
+        """Las consultas de lectura de los servicios, con parámetros representativos"""
+        ahora = datetime.utcnow()
+        planta = "TREN_1"
+        return {
+            "equipos": EquipoService.consulta_equipos(50),
+            "equipos_planta": EquipoService.consulta_equipos(50, planta),
+            "equipos_planta_cursor": EquipoService.consulta_equipos(
+                50, planta, codificar_cursor("M", 1)
+            ),
+            "planes_todos_planta": LubricacionService.consulta_todos_planes(planta),
+            "planes_todos_pagina": LubricacionService.consulta_todos_planes(
+                planta, limit=100, cursor=codificar_cursor("M", 1)
+            ),
+            "planes_resumen_busqueda": LubricacionService.consulta_resumen_planes(
+                ahora, planta=planta, search="BOMBA", fecha_limite=ahora + timedelta(days=7)
+            ),
+            "planes_proximos": LubricacionService.consulta_planes_proximos(7),
+            "planes_proximos_planta": LubricacionService.consulta_planes_proximos(7, planta),
+            "historial": LubricacionService.consulta_historial(limit=50),
+            "historial_plan": LubricacionService.consulta_historial(plan_id=1, limit=50),
+            "historial_planta": LubricacionService.consulta_historial(planta=planta, limit=50),
+            "historial_equipo": LubricacionService.consulta_historial_equipo(
+                1, 50, codificar_cursor(ahora, 1), desde=ahora - timedelta(days=365)
+            ),
+            "dashboard": DashboardService.consulta_resumen(ahora),
+            "dashboard_planta": DashboardService.consulta_resumen(ahora, planta),
+            "exportacion_planta": ExportacionService.consulta_historial(
+                planta, ahora - timedelta(days=30), ahora
+            ),
+            "consumo_mensual": ConsumoService.consulta_series(
+                (ahora - timedelta(days=364)).date(), ahora.date(), "mes"
+            ),
+            "consumo_equipos_planta": ConsumoService.consulta_equipos(
+                (ahora - timedelta(days=90)).date(), ahora.date(), planta
+            ),
+            "sync_equipos": SyncService.consulta_equipos((ahora - timedelta(hours=1), 0)),
+            "sync_planes_planta": SyncService.consulta_planes((ahora - timedelta(hours=1), 0), planta),
+            "sync_historial_planta": SyncService.consulta_historial((ahora - timedelta(hours=1), 0), ahora, planta),
+            "pronostico": PronosticoService.consulta_planes(),
+            "pronostico_planta": PronosticoService.consulta_planes(planta),
+            "vencimientos_carga": consulta_planes_indexables(),
+            "vencimientos_refresco": consulta_planes_indexables().where(PlanLubricacion.id.in_([1, 2])),
+            "vencimientos_equipos": consulta_planes_indexables().where(PlanLubricacion.equipo_id.in_([1, 2])),
+            "eventos_planes": EventosService.consulta_cambios({"t": "planes", "ids": [1, 2]}),
+            "eventos_equipos": EventosService.consulta_cambios({"t": "equipos", "ids": [1, 2]}),
+        }
+    
+    @staticmethod
+    def explicar(db: Session, query: Select, analyze: bool = False) -> dict:
+        """Ejecuta EXPLAIN (FORMAT JSON) y retorna el nodo raíz del plan"""
+        sql = str(query.compile(bind=db.get_bind(), compile_kwargs={"literal_binds": True}))
+        opciones = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+        resultado = db.connection().exec_driver_sql(f"EXPLAIN ({opciones}) {sql}").scalar()
+        if isinstance(resultado, str):
+            resultado = json.loads(resultado)
+        return resultado[0]["Plan"]
+    
+    @staticmethod
+    def _nodos(plan: dict):
+        yield plan
+        for hijo in plan.get("Plans", []):
+            yield from ExplainService._nodos(hijo)
+    
+    @staticmethod
+    def revisar(db: Session, analyze: bool = False, forzar_indices: bool = True) -> list:
+        """
+        Reporta el plan de cada consulta y marca los Seq Scan sobre tablas críticas
+        (los de SEQ_SCANS_PERMITIDOS van aparte, en seq_scans_permitidos).
+        Con forzar_indices se desactiva enable_seqscan para la transacción: en una base
+        pequeña el planificador preferiría Seq Scan, así que un Seq Scan restante
+        significa que ningún índice sirve a esa consulta.
+        """
+        reporte = []
+        try:
+            if forzar_indices:
+                db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for nombre, query in ExplainService.consultas().items():
+                plan = ExplainService.explicar(db, query, analyze)
+                nodos = list(ExplainService._nodos(plan))
+                criticas = {
+                    n["Relation Name"] for n in nodos
+                    if n["Node Type"] == "Seq Scan"
+                    and _SUFIJO_PARTICION.sub("", n.get("Relation Name", "")) in TABLAS_CRITICAS
+                }
+                permitidas = SEQ_SCANS_PERMITIDOS.get(nombre, set())
+                reporte.append({
+                    "consulta": nombre,
+                    "costo_total": plan.get("Total Cost"),
+                    "tiempo_ms": plan.get("Actual Total Time"),
+                    "nodos": [
+                        f"{n['Node Type']}"
+                        + (f" on {n['Relation Name']}" if n.get("Relation Name") else "")
+                        + (f" using {n['Index Name']}" if n.get("Index Name") else "")
+                        for n in nodos
+                    ],
+                    "seq_scans": sorted(criticas - permitidas),
+                    "seq_scans_permitidos": sorted(criticas & permitidas),
+                })
+        finally:
+            db.rollback()
+        return reporte
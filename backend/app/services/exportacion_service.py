@@ -0,0 +1,116 @@
+"""
+Servicio de Exportación de historial
+"""
+from sqlalchemy import Select, select
+from datetime import datetime
+from enum import Enum
+from typing import Iterator
+import csv
+import io
+import json
+import logging
+import zlib
+from backend.app.core.database import SessionLocal
+from backend.app.models.equipo import Equipo
+from backend.app.models.plan_lubricacion import PlanLubricacion
+from backend.app.models.historial import Historial
+
+logger = logging.getLogger(__name__)
+
+FILAS_POR_BLOQUE = 2000
+
+COLUMNAS = (
+    Historial.id.label("historial_id"),
+    Historial.fecha_ejecucion,
+    Historial.cantidad_aplicada,
+    Historial.tecnico,
+    Historial.observaciones,
+    PlanLubricacion.id.label("plan_id"),
+    PlanLubricacion.tipo_lubricante,
+    PlanLubricacion.cantidad_gramos.label("cantidad_planificada"),
+    PlanLubricacion.frecuencia_dias,
+    Equipo.id.label("equipo_id"),
+    Equipo.nombre.label("equipo_nombre"),
+    Equipo.planta,
+    Equipo.componente,
+    Equipo.criticidad,
+    Equipo.ubicacion,
+)
+ENCABEZADOS = [c.key for c in COLUMNAS]
+
+def _valor(v):
+    if isinstance(v, Enum):
+        return v.value
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return v
+
+class ExportacionService:
+    
+    @staticmethod
+    def consulta_historial(planta: str = None, desde: datetime = None, hasta: datetime = None) -> Select:
+        """Historial con columnas de plan y equipo, en orden cronológico"""
+        query = (
+            select(*COLUMNAS)
+            .join(PlanLubricacion, Historial.plan_id == PlanLubricacion.id)
+            .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+        )
+        if planta:
+            query = query.where(Equipo.planta == planta)
+        if desde:
+            query = query.where(Historial.fecha_ejecucion >= desde)
+        if hasta:
+            query = query.where(Historial.fecha_ejecucion < hasta)
+        return query.order_by(Historial.fecha_ejecucion, Historial.id)
+    
+    @staticmethod
+    def exportar_historial(
+        planta: str = None,
+        desde: datetime = None,
+        hasta: datetime = None,
+        formato: str = "csv",
+        comprimir: bool = False,
+        sesiones=SessionLocal,
+    ) -> Iterator[bytes]:
+        """
+        Genera el export por bloques leyendo con un cursor del lado del servidor,
+        de modo que la memoria no depende del número de filas.
+        Usa su propia sesión de `sesiones` (el primario o una réplica): el generador vive
+        más que la dependencia get_db.
+        """
+        gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None
+        
+        def salida(texto: str) -> bytes:
+            datos = texto.encode("utf-8")
+            return gzip.compress(datos) if gzip else datos
+        
+        # El encabezado sale antes de ejecutar la consulta: primer byte inmediato
+        if formato == "csv":
+            yield salida(",".join(ENCABEZADOS) + "\r\n")
+        
+        db = sesiones()
+        try:
+            query = ExportacionService.consulta_historial(planta, desde, hasta)
+            resultado = db.execute(query.execution_options(yield_per=FILAS_POR_BLOQUE))
+            total = 0
+            for bloque in resultado.partitions():
+                total += len(bloque)
+                if formato == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows([_valor(v) for v in fila] for fila in bloque)
+                    yield salida(buffer.getvalue())
+                else:
+                    yield salida("".join(
+                        json.dumps(
+                            {k: _valor(v) for k, v in zip(ENCABEZADOS, fila)},
+                            ensure_ascii=False,
+                        ) + "\n"
+                        for fila in bloque
+                    ))
+            logger.info(f"Export de historial: {total} filas ({formato})")
+        finally:
+            db.close()
+        
+        if gzip:
+            yield gzip.flush()
@@ -0,0 +1,91 @@
+"""
+Servicio de Salud: liveness, readiness y ping cacheado a la base de datos
+
+Los balanceadores sondean cada pocos segundos en cada instancia. El ping a la base se hace
+como mucho una vez cada HEALTH_PING_TTL_SEGUNDOS (una conexión del pool durante un SELECT 1)
+y las demás sondas reutilizan ese resultado; mientras un ping está en curso no esperan.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+
+from backend.app.core.config import settings
+from backend.app.core.database import engine
+from backend.app.core.metricas import colector_pool
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PingBaseDatos:
+    
+    def __init__(self, ttl_segundos: float):
+        self.ttl_segundos = ttl_segundos
+        self._resultado: Optional[dict] = None
+        self._momento = float("-inf")
+        self._lock = threading.Lock()
+    
+    def _vigente(self) -> bool:
+        return time.monotonic() - self._momento < self.ttl_segundos
+    
+    def obtener(self) -> dict:
+        """{"conectada", "latencia_ms", "error"} del último ping, y su antigüedad en segundos"""
+        if not self._vigente():
+            # Un solo ping a la vez; si ya hay un resultado anterior, se responde con él
+            if self._lock.acquire(blocking=self._resultado is None):
+                try:
+                    if not self._vigente():
+                        self._resultado = self._ping()
+                        self._momento = time.monotonic()
+                finally:
+                    self._lock.release()
+        return {**self._resultado, "hace_segundos": round(time.monotonic() - self._momento, 3)}
+    
+    @staticmethod
+    def _ping() -> dict:
+        inicio = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning(f"Ping a la base de datos fallido: {str(e)}")
+            return {"conectada": False, "latencia_ms": None, "error": str(e)}
+        return {"conectada": True, "latencia_ms": round((time.perf_counter() - inicio) * 1000, 2), "error": None}
+
+ping_base_datos = PingBaseDatos(ttl_segundos=settings.HEALTH_PING_TTL_SEGUNDOS)
+
+class HealthService:
+    
+    @staticmethod
+    def vivo() -> dict:
+        """Liveness: el proceso responde; no toca la base de datos"""
+        return {"status": "alive", "timestamp": datetime.utcnow()}
+    
+    @staticmethod
+    def listo() -> dict:
+        """Readiness: ping cacheado a la base y ocupación de los pools"""
+        ping = ping_base_datos.obtener()
+        return {
+            "status": "ready" if ping["conectada"] else "not_ready",
+            "timestamp": datetime.utcnow(),
+            "database": "connected" if ping["conectada"] else "disconnected",
+            "latencia_ms": ping["latencia_ms"],
+            "ping_hace_segundos": ping["hace_segundos"],
+            "error": ping["error"],
+            "pools": colector_pool.estado(),
+        }
+    
+    @staticmethod
+    def resumen() -> dict:
+        """Formato de /api/health (HealthResponse) a partir del mismo ping cacheado"""
+        ping = ping_base_datos.obtener()
+        resultado = {
+            "status": "healthy" if ping["conectada"] else "unhealthy",
+            "timestamp": datetime.utcnow(),
+            "database": "connected" if ping["conectada"] else "disconnected",
+        }
+        if ping["error"]:
+            resultado["error"] = ping["error"]
+        return resultado
@@ -0,0 +1,107 @@
+"""
+Servicio de Idempotencia: repite la respuesta original de una escritura reintentada
+
+La escritura reclama (clave, ruta) con un INSERT ... ON CONFLICT dentro de su propia
+transacción y guarda su respuesta antes de confirmar. Un reintento simultáneo queda
+esperando en ese INSERT hasta que la primera transacción termina: si confirmó, recibe
+la respuesta guardada; si se revirtió, la clave queda libre y la escritura se hace.
+Una clave vencida (IDEMPOTENCIA_TTL_HORAS) se reutiliza como nueva.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.models.idempotencia import ClaveIdempotencia
+import logging
+
+logger = logging.getLogger(__name__)
+
+CABECERA = "Idempotency-Key"
+CABECERA_REPETIDA = "Idempotent-Replayed"
+MAX_LARGO_CLAVE = 200
+
+@dataclass(frozen=True)
+class SolicitudIdempotente:
+    clave: str
+    ruta: str
+    huella: str
+    
+    @classmethod
+    def crear(cls, clave: str, ruta: str, cuerpo: bytes) -> "SolicitudIdempotente":
+        if not clave or len(clave) > MAX_LARGO_CLAVE:
+            raise ValueError(f"{CABECERA} debe tener entre 1 y {MAX_LARGO_CLAVE} caracteres")
+        return cls(clave, ruta, hashlib.sha256(cuerpo).hexdigest())
+
+class SolicitudRepetida(Exception):
+    """La clave ya tiene respuesta: se devuelve la original sin volver a escribir"""
+    
+    def __init__(self, estado_http: int, respuesta: bytes):
+        self.estado_http = estado_http
+        self.respuesta = respuesta
+        super().__init__("Solicitud repetida")
+
+class ClaveReutilizada(Exception):
+    """La misma Idempotency-Key llegó con otro cuerpo"""
+
+class IdempotenciaService:
+    
+    @staticmethod
+    def reclamar(db: Session, solicitud: SolicitudIdempotente):
+        """
+        Reserva la clave en la transacción de `db`. Lanza SolicitudRepetida con la respuesta
+        guardada si ya se procesó, o ClaveReutilizada si el cuerpo no coincide.
+        """
+        ahora = datetime.utcnow()
+        tabla = ClaveIdempotencia.__table__
+        sentencia = pg_insert(ClaveIdempotencia).values(
+            clave=solicitud.clave,
+            ruta=solicitud.ruta,
+            huella=solicitud.huella,
+            created_at=ahora,
+            expira_en=ahora + timedelta(hours=settings.IDEMPOTENCIA_TTL_HORAS),
+        )
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=[tabla.c.clave, tabla.c.ruta],
+            set_={
+                "huella": sentencia.excluded.huella,
+                "estado_http": None,
+                "respuesta": None,
+                "created_at": sentencia.excluded.created_at,
+                "expira_en": sentencia.excluded.expira_en,
+            },
+            # Solo se pisa una clave vencida; si no, no hay fila en RETURNING
+            where=tabla.c.expira_en < ahora,
+        ).returning(tabla.c.clave)
+        if db.execute(sentencia).first() is not None:
+            return
+        
+        previa = db.execute(
+            select(ClaveIdempotencia.huella, ClaveIdempotencia.estado_http, ClaveIdempotencia.respuesta)
+            .where(ClaveIdempotencia.clave == solicitud.clave, ClaveIdempotencia.ruta == solicitud.ruta)
+        ).first()
+        if previa.huella != solicitud.huella:
+            raise ClaveReutilizada(f"{CABECERA} ya usada con otro cuerpo de solicitud")
+        raise SolicitudRepetida(previa.estado_http, previa.respuesta)
+    
+    @staticmethod
+    def guardar(db: Session, solicitud: SolicitudIdempotente, estado_http: int, respuesta: bytes):
+        """Guarda la respuesta en la misma transacción que la escritura"""
+        db.execute(
+            ClaveIdempotencia.__table__.update()
+            .where(ClaveIdempotencia.clave == solicitud.clave, ClaveIdempotencia.ruta == solicitud.ruta)
+            .values(estado_http=estado_http, respuesta=respuesta)
+        )
+    
+    @staticmethod
+    def purgar(db: Session) -> int:
+        """Elimina las claves vencidas"""
+        borradas = db.execute(
+            delete(ClaveIdempotencia).where(ClaveIdempotencia.expira_en < datetime.utcnow())
+        ).rowcount
+        db.commit()
+        logger.info(f"Claves de idempotencia vencidas eliminadas: {borradas}")
+        return borradas
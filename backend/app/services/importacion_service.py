@@ -0,0 +1,224 @@
+"""
+Servicio de Importación masiva de equipos y planes
+"""
+from sqlalchemy import Float, Integer, String, cast, column, literal_column, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+import codecs
+import csv
+import logging
+from backend.app.core.cache import cache_respuestas
+from backend.app.core.notificaciones import notificar
+from backend.app.core.presupuesto import contar_bloque
+from backend.app.models.equipo import Equipo
+from backend.app.models.plan_lubricacion import PlanLubricacion
+from backend.app.schemas.equipo import EquipoCreate
+
+logger = logging.getLogger(__name__)
+
+MAX_ERRORES_REPORTADOS = 1000
+COLUMNAS_PLAN = ("tipo_lubricante", "cantidad_gramos", "frecuencia_dias")
+# Campos de texto de EquipoCreate: en un XLSX pueden llegar como número (6205)
+CAMPOS_TEXTO = ("nombre", "componente", "ubicacion", "modelo_rodamiento", "tipo_lubricante")
+
+def _texto(valor) -> str:
+    """Celda numérica como texto, sin el ".0" de los enteros guardados como float"""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+class ImportacionService:
+    
+    @staticmethod
+    def leer_filas(archivo, nombre_archivo: str) -> Iterator[dict]:
+        """Lee un CSV o XLSX fila a fila como diccionarios (encabezados = campos de EquipoCreate)"""
+        if nombre_archivo.lower().endswith(".xlsx"):
+            yield from ImportacionService._leer_xlsx(archivo)
+        else:
+            yield from csv.DictReader(codecs.getreader("utf-8-sig")(archivo))
+    
+    @staticmethod
+    def _leer_xlsx(archivo) -> Iterator[dict]:
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("La importación de XLSX requiere el paquete openpyxl")
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezados = [str(c).strip() if c is not None else "" for c in next(filas, [])]
+            for fila in filas:
+                yield dict(zip(encabezados, fila))
+        finally:
+            libro.close()
+    
+    @staticmethod
+    def importar(db: Session, filas: Iterable[dict], upsert: bool = False, chunk: int = 1000) -> dict:
+        """
+        Valida filas contra EquipoCreate y escribe equipos y planes por bloques.
+        Con upsert=True los equipos existentes (por nombre) se actualizan; si no, se reportan como error.
+        Cada bloque se confirma en su propia transacción.
+        """
+        resultado = {"procesadas": 0, "creados": 0, "actualizados": 0, "total_errores": 0, "errores": []}
+        vistos = set()
+        bloque = []
+        
+        for numero, fila in enumerate(filas, start=2):  # fila 1 = encabezados
+            resultado["procesadas"] += 1
+            datos = {k.strip(): v for k, v in fila.items() if k and v not in (None, "")}
+            for campo in CAMPOS_TEXTO:
+                if campo in datos and not isinstance(datos[campo], str):
+                    datos[campo] = _texto(datos[campo])
+            try:
+                equipo = EquipoCreate(**datos)
+            except ValidationError as e:
+                detalle = e.errors()[0]
+                campo = ".".join(str(c) for c in detalle["loc"])
+                ImportacionService._error(resultado, numero, datos.get("nombre"), f"{campo}: {detalle['msg']}")
+                continue
+            if equipo.nombre in vistos:
+                ImportacionService._error(resultado, numero, equipo.nombre, "Nombre duplicado en el archivo")
+                continue
+            vistos.add(equipo.nombre)
+            bloque.append((numero, equipo))
+            
+            if len(bloque) >= chunk:
+                ImportacionService._escribir_bloque(db, bloque, upsert, resultado)
+                bloque = []
+        
+        if bloque:
+            ImportacionService._escribir_bloque(db, bloque, upsert, resultado)
+        
+        logger.info(
+            f"Importación: {resultado['creados']} creados, {resultado['actualizados']} actualizados, "
+            f"{resultado['total_errores']} errores"
+        )
+        return resultado
+    
+    @staticmethod
+    def _error(resultado: dict, fila: int, nombre: str, mensaje: str):
+        resultado["total_errores"] += 1
+        if len(resultado["errores"]) < MAX_ERRORES_REPORTADOS:
+            resultado["errores"].append({"fila": fila, "nombre": nombre, "error": mensaje})
+    
+    @staticmethod
+    def _consulta_bloque(equipos: list, upsert: bool, ahora: datetime):
+        """
+        INSERT multi-fila ... RETURNING de equipos. Con upsert, el SET solo lleva los campos
+        que traían las filas (celdas no vacías, model_fields_set): nunca estado, y una
+        columna ausente del archivo no pisa el valor guardado con NULL o el default.
+        """
+        filas = [
+            {**equipo.dict(), "estado": "ACTIVO", "created_at": ahora, "updated_at": ahora}
+            for equipo in equipos
+        ]
+        stmt = insert(Equipo).values(filas)
+        if upsert:
+            campos = (equipos[0].model_fields_set - {"nombre"}) | {"updated_at"}
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Equipo.nombre], set_={k: stmt.excluded[k] for k in sorted(campos)}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Equipo.nombre])
+        # xmax = 0 distingue filas insertadas de filas actualizadas por el upsert
+        return stmt.returning(Equipo.id, Equipo.nombre, literal_column("xmax = 0").label("insertado"))
+    
+    @staticmethod
+    def _escribir_bloque(db: Session, bloque: list, upsert: bool, resultado: dict):
+        """Equipos del bloque (un INSERT por combinación de campos presentes) y luego sus planes"""
+        ahora = datetime.utcnow()
+        grupos = {}
+        for _, equipo in bloque:
+            clave = frozenset(equipo.model_fields_set) if upsert else None
+            grupos.setdefault(clave, []).append(equipo)
+        # Cada combinación de campos suma su INSERT (y su UPDATE de planes): cuenta como un bloque
+        contar_bloque(len(grupos))
+        
+        try:
+            escritos = {}
+            for equipos in grupos.values():
+                stmt = ImportacionService._consulta_bloque(equipos, upsert, ahora)
+                escritos.update((r.nombre, r) for r in db.execute(stmt))
+            
+            por_nombre = {equipo.nombre: equipo for _, equipo in bloque}
+            nuevos = [r for r in escritos.values() if r.insertado]
+            actualizados = [r for r in escritos.values() if not r.insertado]
+            
+            if nuevos:
+                # render_nulls: sin él el bulk INSERT omite las claves en None y parte el
+                # bloque en un INSERT por fila cada vez que cambia qué columnas vienen vacías
+                db.execute(insert(PlanLubricacion).execution_options(render_nulls=True), [
+                    {
+                        "equipo_id": r.id,
+                        **{k: getattr(por_nombre[r.nombre], k) for k in COLUMNAS_PLAN},
+                        "ultima_fecha_lubricacion": ahora,
+                        "proxima_fecha_lubricacion": ahora + timedelta(
+                            days=por_nombre[r.nombre].frecuencia_dias
+                        ),
+                        "created_at": ahora,
+                        "updated_at": ahora,
+                    }
+                    for r in nuevos
+                ])
+            if actualizados:
+                ImportacionService._actualizar_planes(
+                    db, [(r.id, por_nombre[r.nombre]) for r in actualizados], ahora
+                )
+            plantas = [None] if actualizados else {equipo.planta for _, equipo in bloque}
+            for planta in plantas:
+                notificar(db, "recarga", planta)
+            db.commit()
+            if actualizados:
+                # Un upsert puede mover equipos de planta: invalida todas
+                cache_respuestas.invalidar()
+            else:
+                cache_respuestas.invalidar(*{equipo.planta for _, equipo in bloque})
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error al importar bloque: {str(e)}")
+            for numero, equipo in bloque:
+                ImportacionService._error(resultado, numero, equipo.nombre, str(e))
+            return
+        
+        resultado["creados"] += len(nuevos)
+        resultado["actualizados"] += len(actualizados)
+        for numero, equipo in bloque:
+            if equipo.nombre not in escritos:
+                ImportacionService._error(resultado, numero, equipo.nombre, "El equipo ya existe")
+    
+    @staticmethod
+    def _actualizar_planes(db: Session, equipos: list, ahora: datetime):
+        """
+        Propaga a los planes de equipos actualizados el lubricante, la cantidad y la
+        frecuencia que traía el archivo (solo esas columnas). Un cambio de planta sin
+        ninguna de ellas solo toca updated_at, para que /api/sync vea el plan moverse.
+        """
+        tipos = {"tipo_lubricante": String, "cantidad_gramos": Float, "frecuencia_dias": Integer}
+        grupos = {}
+        for equipo_id, e in equipos:
+            presentes = tuple(k for k in COLUMNAS_PLAN if k in e.model_fields_set)
+            if presentes or "planta" in e.model_fields_set:
+                grupos.setdefault(presentes, []).append((equipo_id, e))
+        
+        for presentes, grupo in grupos.items():
+            datos = values(
+                column("equipo_id", Integer),
+                *(column(k, tipos[k]) for k in presentes),
+                name="importados",
+            ).data([
+                (equipo_id, *(getattr(e, k) for k in presentes))
+                for equipo_id, e in grupo
+            ])
+            db.execute(
+                update(PlanLubricacion)
+                .where(PlanLubricacion.equipo_id == datos.c.equipo_id)
+                .values(
+                    **{k: cast(datos.c[k], tipos[k]) for k in presentes},
+                    version=PlanLubricacion.version + 1,
+                    updated_at=ahora,
+                )
+                .execution_options(synchronize_session=False)
+            )
@@ -1,89 +1,544 @@
 """
 Servicio de Lubricación
 """
+from sqlalchemy import (
+    DateTime, Integer, Select, case, cast, column, extract, func, select, tuple_, update, values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+import uuid
+from backend.app.core.config import settings
 from backend.app.models.plan_lubricacion import PlanLubricacion
 from backend.app.models.historial import Historial
 from backend.app.models.equipo import Equipo
-from backend.app.schemas.historial import HistorialCreate
+from backend.app.schemas.historial import EjecucionLoteResponse, HistorialCreate, HistorialResponse
+from backend.app.core.cache import cache_respuestas
+from backend.app.core.notificaciones import notificar
+from backend.app.core.pagination import decodificar_cursor, recortar_pagina
+from backend.app.services.consumo_service import ConsumoService
+from backend.app.services.idempotencia_service import IdempotenciaService, SolicitudIdempotente, SolicitudRepetida
+from backend.app.services.particion_service import ParticionService, corte_retencion
 import logging
 
 logger = logging.getLogger(__name__)
 
+_historial = TypeAdapter(HistorialResponse)
+_lote = TypeAdapter(EjecucionLoteResponse)
+
+ESTADO_VENCIDO = "🔴 VENCIDO"
+ESTADO_HOY = "🟡 HOY/MAÑANA"
+ESTADO_AL_DIA = "🟢 AL DÍA"
+ESTADO_PROXIMO = "🟢 PRÓXIMOS"
+
+def escapar_like(texto: str) -> str:
+    """Escapa los comodines de LIKE (% y _) para buscar el texto literal"""
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def clave_plan_por_nombre(plan) -> tuple:
+    return plan.equipo_nombre, plan.id
+
+def clave_plan_por_fecha(plan) -> tuple:
+    return plan.proxima_fecha, plan.id
+
+def clave_historial(historial) -> tuple:
+    return historial.fecha_ejecucion, historial.id
+
 class LubricacionService:
     
     @staticmethod
-    def obtener_todos_planes(db: Session, planta: str = None) -> list:
-        """Obtener todos los planes de lubricación"""
-        query = db.query(PlanLubricacion).filter(
-            PlanLubricacion.equipo.has(estado="ACTIVO")
+    def consulta_resumen_planes(
+        ahora: datetime,
+        etiqueta_al_dia: str = ESTADO_AL_DIA,
+        planta: str = None,
+        search: str = None,
+        fecha_limite: datetime = None,
+    ) -> Select:
+        """
+        Construye la proyección plana plan + equipo de equipos activos.
+        dias_restantes, estado y orden se calculan en SQL (un solo JOIN).
+        """
+        dias_restantes = cast(
+            func.floor(
+                extract("epoch", PlanLubricacion.proxima_fecha_lubricacion - ahora) / 86400
+            ),
+            Integer,
+        )
+        estado = case(
+            (dias_restantes < 0, ESTADO_VENCIDO),
+            (dias_restantes <= 1, ESTADO_HOY),
+            else_=etiqueta_al_dia,
+        )
+        query = (
+            select(
+                PlanLubricacion.id,
+                PlanLubricacion.equipo_id,
+                Equipo.nombre.label("equipo_nombre"),
+                Equipo.planta.label("equipo_planta"),
+                Equipo.criticidad,
+                PlanLubricacion.tipo_lubricante,
+                PlanLubricacion.cantidad_gramos,
+                PlanLubricacion.frecuencia_dias,
+                PlanLubricacion.proxima_fecha_lubricacion.label("proxima_fecha"),
+                PlanLubricacion.ultima_fecha_lubricacion.label("ultima_fecha"),
+                dias_restantes.label("dias_restantes"),
+                estado.label("estado"),
+            )
+            .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+            .where(Equipo.estado == "ACTIVO")
         )
         if planta:
-            query = query.filter(PlanLubricacion.equipo.has(Equipo.planta == planta))
-        return query.all()
-
+            query = query.where(Equipo.planta == planta)
+        if search:
+            query = query.where(Equipo.nombre.ilike(f"%{escapar_like(search)}%", escape="\\"))
+        if fecha_limite:
+            query = query.where(PlanLubricacion.proxima_fecha_lubricacion <= fecha_limite)
+        return query
+    
     @staticmethod
-    def obtener_planes_proximos(db: Session, dias: int = 7, planta: str = None) -> list:
-        """Obtener planes de lubricación próximos o vencidos"""
-        fecha_limite = datetime.utcnow() + timedelta(days=dias)
-        
-        query = db.query(PlanLubricacion).filter(
-            PlanLubricacion.proxima_fecha_lubricacion <= fecha_limite,
-            PlanLubricacion.equipo.has(estado="ACTIVO")
+    def consulta_todos_planes(
+        planta: str = None, search: str = None, limit: int = None, cursor: str = None
+    ) -> Select:
+        """Planes ordenados por (equipo, id); con limit pide limit + 1 filas para detectar más páginas"""
+        query = LubricacionService.consulta_resumen_planes(
+            datetime.utcnow(), planta=planta, search=search
+        )
+        if cursor:
+            nombre, plan_id = decodificar_cursor(cursor, 2)
+            try:
+                plan_id = int(plan_id)
+            except (TypeError, ValueError):
+                raise ValueError("Cursor inválido")
+            query = query.where(
+                tuple_(Equipo.nombre, PlanLubricacion.id) > tuple_(str(nombre), plan_id)
+            )
+        query = query.order_by(Equipo.nombre, PlanLubricacion.id)
+        return query if limit is None else query.limit(limit + 1)
+    
+    @staticmethod
+    def obtener_todos_planes(
+        db: Session,
+        planta: str = None,
+        search: str = None,
+        limit: int = None,
+        cursor: str = None,
+    ) -> tuple:
+        """
+        Obtener planes de lubricación ordenados por (equipo, id).
+        Sin limit retorna todos. Retorna (planes, cursor_siguiente).
+        """
+        query = LubricacionService.consulta_todos_planes(planta, search, limit, cursor)
+        return recortar_pagina(db.execute(query).all(), limit, clave_plan_por_nombre)
+    
+    @staticmethod
+    def consulta_planes_proximos(
+        dias: int = 7, planta: str = None, limit: int = None, cursor: str = None
+    ) -> Select:
+        """Planes que vencen en los próximos `dias`, ordenados por (fecha, id)"""
+        ahora = datetime.utcnow()
+        query = LubricacionService.consulta_resumen_planes(
+            ahora,
+            etiqueta_al_dia=ESTADO_PROXIMO,
+            planta=planta,
+            fecha_limite=ahora + timedelta(days=dias),
+        )
+        if cursor:
+            fecha, plan_id = decodificar_cursor(cursor, 2)
+            try:
+                fecha, plan_id = datetime.fromisoformat(str(fecha)), int(plan_id)
+            except (TypeError, ValueError):
+                raise ValueError("Cursor inválido")
+            query = query.where(
+                tuple_(PlanLubricacion.proxima_fecha_lubricacion, PlanLubricacion.id) > tuple_(fecha, plan_id)
+            )
+        query = query.order_by(PlanLubricacion.proxima_fecha_lubricacion, PlanLubricacion.id)
+        return query if limit is None else query.limit(limit + 1)
+    
+    @staticmethod
+    def obtener_planes_proximos(
+        db: Session,
+        dias: int = 7,
+        planta: str = None,
+        limit: int = None,
+        cursor: str = None,
+    ) -> tuple:
+        """
+        Obtener planes próximos o vencidos ordenados por (fecha, id).
+        Sin limit retorna todos. Retorna (planes, cursor_siguiente).
+        """
+        query = LubricacionService.consulta_planes_proximos(dias, planta, limit, cursor)
+        return recortar_pagina(db.execute(query).all(), limit, clave_plan_por_fecha)
+    
+    @staticmethod
+    def avanzar_plan(plan_id: int, fecha: datetime, ahora: datetime):
+        """
+        UPDATE atómico del plan por una ejecución: lee y escribe la fila bajo su propio
+        bloqueo, así dos ejecuciones simultáneas no se pisan con una lectura vieja. Una
+        ejecución más antigua que la última no lo hace retroceder. Sube version.
+        """
+        return (
+            update(PlanLubricacion)
+            .where(PlanLubricacion.id == plan_id)
+            .where(PlanLubricacion.equipo_id == Equipo.id)
+            .values(
+                ultima_fecha_lubricacion=func.greatest(PlanLubricacion.ultima_fecha_lubricacion, fecha),
+                proxima_fecha_lubricacion=case(
+                    (
+                        PlanLubricacion.ultima_fecha_lubricacion <= fecha,
+                        fecha + func.make_interval(0, 0, 0, PlanLubricacion.frecuencia_dias),
+                    ),
+                    else_=PlanLubricacion.proxima_fecha_lubricacion,
+                ),
+                version=PlanLubricacion.version + 1,
+                updated_at=ahora,
+            )
+            .returning(PlanLubricacion.equipo_id, PlanLubricacion.tipo_lubricante, Equipo.planta)
+            .execution_options(synchronize_session=False)
         )
-        if planta:
-            query = query.filter(PlanLubricacion.equipo.has(Equipo.planta == planta))
-        
-        planes = query.all()
-        
-        return planes
     
     @staticmethod
-    def registrar_ejecucion(db: Session, historial_data: HistorialCreate) -> Historial:
-        """Registrar ejecución de lubricación y actualizar plan"""
+    def registrar_ejecucion(
+        db: Session, historial_data: HistorialCreate, idempotencia: SolicitudIdempotente = None
+    ) -> Historial:
+        """
+        Registrar ejecución de lubricación y avanzar el plan.
+        Con `idempotencia`, un reintento de la misma clave lanza SolicitudRepetida con la
+        respuesta original (ver services/idempotencia_service.py) sin volver a escribir.
+        """
         try:
-            # Obtener plan
-            plan = db.query(PlanLubricacion).filter(
-                PlanLubricacion.id == historial_data.plan_id
-            ).first()
+            ahora = datetime.utcnow()
+            datos = historial_data.dict()
+            datos["fecha_ejecucion"] = datos["fecha_ejecucion"] or ahora
+            # Partición del mes antes de tomar cualquier bloqueo: su DDL (que bloquea el
+            # historial) corre en otra conexión, y esperarla con la fila del plan tomada
+            # cerraría un ciclo entre dos conexiones que Postgres no detecta
+            ParticionService.asegurar_meses([datos["fecha_ejecucion"]])
             
+            if idempotencia is not None:
+                IdempotenciaService.reclamar(db, idempotencia)
+            
+            # Avanzar el plan primero: su bloqueo de fila ordena las ejecuciones simultáneas
+            plan = db.execute(
+                LubricacionService.avanzar_plan(historial_data.plan_id, datos["fecha_ejecucion"], ahora)
+            ).first()
             if not plan:
                 raise ValueError(f"Plan {historial_data.plan_id} no existe")
             
-            # Crear registro en historial
-            historial = Historial(**historial_data.dict())
+            # Crear registro en historial (en la partición mensual de su fecha)
+            historial = Historial(**datos)
             db.add(historial)
             db.flush()
             
-            # Actualizar plan
-            plan.ultima_fecha_lubricacion = historial_data.fecha_ejecucion or datetime.utcnow()
-            plan.proxima_fecha_lubricacion = plan.ultima_fecha_lubricacion + timedelta(
-                days=plan.frecuencia_dias
-            )
+            # Consumo diario en la misma transacción
+            ConsumoService.acumular(db, [(
+                plan.planta, historial.fecha_ejecucion, plan.equipo_id, plan.tipo_lubricante, historial.cantidad_aplicada,
+            )])
+            notificar(db, "planes", plan.planta, [historial_data.plan_id])
             
+            if idempotencia is not None:
+                respuesta = _historial.dump_json(_historial.validate_python(historial, from_attributes=True))
+                IdempotenciaService.guardar(db, idempotencia, 200, respuesta)
+            
+            # Ya tiene id y created_at: fuera de la sesión no se expira ni se recarga al confirmar
+            db.expunge(historial)
             db.commit()
-            db.refresh(historial)
+            cache_respuestas.invalidar(plan.planta)
             
-            logger.info(f"Lubricación registrada: Plan {plan.id}")
+            logger.info(f"Lubricación registrada: Plan {historial_data.plan_id}")
             return historial
+        except SolicitudRepetida:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             logger.error(f"Error al registrar ejecución: {str(e)}")
             raise
     
     @staticmethod
-    def obtener_historial(db: Session, plan_id: int = None, planta: str = None, limit: int = 50) -> list:
-        """Obtener historial de lubricaciones"""
-        query = db.query(Historial)
+    def registrar_ejecuciones_lote(
+        db: Session, ejecuciones: list, idempotencia: SolicitudIdempotente = None
+    ) -> dict:
+        """
+        Registrar muchas ejecuciones en una sola transacción (formato EjecucionLoteResponse).
+        Inserta el historial en bloque y avanza cada plan afectado con un único UPDATE.
+        Cada ejecución se deduplica por (id_cliente, fecha_ejecucion) con ON CONFLICT DO NOTHING:
+        la que ya estaba registrada vuelve como repetida con su historial_id original y no
+        suma consumo ni avanza el plan otra vez. Un resultado por ejecución, en el orden recibido.
+        Con `idempotencia`, un reintento del lote lanza SolicitudRepetida con la respuesta original.
+        """
+        if not ejecuciones:
+            raise ValueError("El lote está vacío")
+        if len(ejecuciones) > settings.LOTE_MAX_EJECUCIONES:
+            raise ValueError(f"El lote supera el máximo de {settings.LOTE_MAX_EJECUCIONES} ejecuciones")
+        try:
+            ahora = datetime.utcnow()
+            fechas = [e.fecha_ejecucion or ahora for e in ejecuciones]
+            # Las anteriores al corte de retención se rechazan una por una (su mes ya se resumió)
+            corte = datetime.combine(corte_retencion(), time.min)
+            # Particiones primero, sin conexión tomada ni bloqueos (ver registrar_ejecucion)
+            ParticionService.asegurar_meses(f for f in fechas if f >= corte)
+            
+            if idempotencia is not None:
+                IdempotenciaService.reclamar(db, idempotencia)
+            
+            plan_ids = {e.plan_id for e in ejecuciones}
+            # Bloquea los planes en orden de id: dos lotes simultáneos con los mismos planes en
+            # otro orden esperan uno al otro en vez de trabarse (deadlock). También ordena este
+            # lote respecto de las ejecuciones sueltas, que bloquean su plan al avanzarlo
+            existentes = {
+                f.id: f for f in db.execute(
+                    select(PlanLubricacion.id, Equipo.planta, PlanLubricacion.equipo_id, PlanLubricacion.tipo_lubricante)
+                    .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+                    .where(PlanLubricacion.id.in_(plan_ids))
+                    .order_by(PlanLubricacion.id)
+                    .with_for_update(of=PlanLubricacion)
+                ).all()
+            }
+            
+            validas = []
+            resultados = []
+            # id_cliente -> índice de su primera aparición, y las que la repiten en el mismo lote
+            primeras = {}
+            repetidas_en_lote = []
+            for indice, ejecucion in enumerate(ejecuciones):
+                if ejecucion.plan_id not in existentes:
+                    resultados.append({
+                        "indice": indice,
+                        "plan_id": ejecucion.plan_id,
+                        "ok": False,
+                        "error": f"Plan {ejecucion.plan_id} no existe",
+                    })
+                    continue
+                if fechas[indice] < corte:
+                    resultados.append({
+                        "indice": indice,
+                        "plan_id": ejecucion.plan_id,
+                        "ok": False,
+                        "error": f"Fecha de ejecución anterior al corte de retención ({corte:%Y-%m})",
+                    })
+                    continue
+                fila = ejecucion.dict()
+                fila["fecha_ejecucion"] = fechas[indice]
+                fila["id_cliente"] = fila.get("id_cliente") or uuid.uuid4()
+                resultados.append({"indice": indice, "plan_id": ejecucion.plan_id, "ok": True, "repetida": False})
+                if fila["id_cliente"] in primeras:
+                    resultados[indice]["repetida"] = True
+                    repetidas_en_lote.append((indice, primeras[fila["id_cliente"]]))
+                    continue
+                primeras[fila["id_cliente"]] = indice
+                validas.append((indice, fila))
+            
+            nuevas = []
+            if validas:
+                insertadas = dict(db.execute(
+                    pg_insert(Historial)
+                    .on_conflict_do_nothing(index_elements=[Historial.id_cliente, Historial.fecha_ejecucion])
+                    .returning(Historial.id_cliente, Historial.id),
+                    [fila for _, fila in validas],
+                ).all())
+                # Las que chocaron ya estaban registradas (reenvío): se informa la fila con la que
+                # chocaron, buscada por la misma clave (id_cliente, fecha_ejecucion) del índice único
+                previas = {}
+                chocaron = [(f["id_cliente"], f["fecha_ejecucion"]) for _, f in validas if f["id_cliente"] not in insertadas]
+                if chocaron:
+                    fechas_choque = [fecha for _, fecha in chocaron]
+                    previas = {
+                        (f.id_cliente, f.fecha_ejecucion): f.id for f in db.execute(
+                            select(Historial.id_cliente, Historial.fecha_ejecucion, Historial.id)
+                            .where(tuple_(Historial.id_cliente, Historial.fecha_ejecucion).in_(chocaron))
+                            # Rango explícito: poda las particiones de otros meses
+                            .where(Historial.fecha_ejecucion.between(min(fechas_choque), max(fechas_choque)))
+                        )
+                    }
+                for indice, fila in validas:
+                    if fila["id_cliente"] in insertadas:
+                        resultados[indice]["historial_id"] = insertadas[fila["id_cliente"]]
+                        nuevas.append(fila)
+                    else:
+                        resultados[indice]["historial_id"] = previas.get((fila["id_cliente"], fila["fecha_ejecucion"]))
+                        resultados[indice]["repetida"] = True
+                for indice, primera in repetidas_en_lote:
+                    resultados[indice]["historial_id"] = resultados[primera]["historial_id"]
+            
+            if nuevas:
+                # Última ejecución por plan; el plan avanza desde esa fecha
+                ultimas = {}
+                for fila in nuevas:
+                    fecha = fila["fecha_ejecucion"]
+                    if fila["plan_id"] not in ultimas or fecha > ultimas[fila["plan_id"]]:
+                        ultimas[fila["plan_id"]] = fecha
+                LubricacionService._avanzar_planes(db, ultimas, ahora)
+                
+                # Consumo diario en la misma transacción
+                consumos = []
+                for fila in nuevas:
+                    plan = existentes[fila["plan_id"]]
+                    consumos.append((
+                        plan.planta, fila["fecha_ejecucion"], plan.equipo_id, plan.tipo_lubricante, fila["cantidad_aplicada"],
+                    ))
+                ConsumoService.acumular(db, consumos)
+                
+                por_planta = {}
+                for fila in nuevas:
+                    plan = existentes[fila["plan_id"]]
+                    por_planta.setdefault(plan.planta, set()).add(plan.id)
+                for planta, ids in por_planta.items():
+                    notificar(db, "planes", planta, ids)
+            
+            repetidos = sum(1 for r in resultados if r.get("repetida"))
+            respuesta = {
+                "registrados": len(nuevas),
+                "repetidos": repetidos,
+                "errores": sum(1 for r in resultados if not r["ok"]),
+                "resultados": resultados,
+            }
+            if idempotencia is not None:
+                IdempotenciaService.guardar(db, idempotencia, 200, _lote.dump_json(_lote.validate_python(respuesta)))
+            
+            db.commit()
+            if nuevas:
+                cache_respuestas.invalidar(*{existentes[f["plan_id"]].planta for f in nuevas})
+            logger.info(
+                f"Lote registrado: {len(nuevas)} de {len(ejecuciones)} ejecuciones ({repetidos} repetidas)"
+            )
+            return respuesta
+        except SolicitudRepetida:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error al registrar lote de ejecuciones: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _avanzar_planes(db: Session, ultimas: dict, ahora: datetime):
+        """
+        UPDATE ... FROM (VALUES ...) que avanza ultima/proxima fecha de varios planes a la vez.
+        Una ejecución más antigua que la última registrada (p. ej. subida tarde desde un
+        dispositivo sin conexión) no hace retroceder el plan.
+        """
+        fechas = values(
+            column("plan_id", Integer), column("fecha", DateTime), name="ejecuciones"
+        ).data(sorted(ultimas.items()))
+        db.execute(
+            update(PlanLubricacion)
+            .where(PlanLubricacion.id == fechas.c.plan_id)
+            .values(
+                ultima_fecha_lubricacion=func.greatest(PlanLubricacion.ultima_fecha_lubricacion, fechas.c.fecha),
+                proxima_fecha_lubricacion=case(
+                    (
+                        fechas.c.fecha >= PlanLubricacion.ultima_fecha_lubricacion,
+                        fechas.c.fecha + func.make_interval(0, 0, 0, PlanLubricacion.frecuencia_dias),
+                    ),
+                    else_=PlanLubricacion.proxima_fecha_lubricacion,
+                ),
+                version=PlanLubricacion.version + 1,
+                updated_at=ahora,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    def _paginar_historial(query: Select, limit: int, cursor: str = None) -> Select:
+        """Aplica el orden (fecha_ejecucion, id) descendente y el cursor a una consulta de historial"""
+        if cursor:
+            fecha, historial_id = decodificar_cursor(cursor, 2)
+            try:
+                fecha, historial_id = datetime.fromisoformat(str(fecha)), int(historial_id)
+            except (TypeError, ValueError):
+                raise ValueError("Cursor inválido")
+            query = query.where(
+                tuple_(Historial.fecha_ejecucion, Historial.id) < tuple_(fecha, historial_id),
+                # Redundante con la comparación de tuplas, pero es la que permite descartar
+                # las particiones mensuales posteriores al cursor
+                Historial.fecha_ejecucion <= fecha,
+            )
+        return query.order_by(
+            Historial.fecha_ejecucion.desc(), Historial.id.desc()
+        ).limit(limit + 1)
+    
+    @staticmethod
+    def consulta_historial(
+        plan_id: int = None,
+        planta: str = None,
+        limit: int = 50,
+        cursor: str = None,
+        desde: datetime = None,
+        hasta: datetime = None,
+    ) -> Select:
+        query = select(Historial)
         
         if plan_id:
-            query = query.filter(Historial.plan_id == plan_id)
+            query = query.where(Historial.plan_id == plan_id)
+        
+        # Acotar por fecha limita la consulta a las particiones de esos meses
+        if desde:
+            query = query.where(Historial.fecha_ejecucion >= desde)
+        if hasta:
+            query = query.where(Historial.fecha_ejecucion < hasta)
         
         if planta:
-            query = query.join(Historial.plan).join(PlanLubricacion.equipo).filter(Equipo.planta == planta)
+            query = (
+                query.join(PlanLubricacion, Historial.plan_id == PlanLubricacion.id)
+                .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+                .where(Equipo.planta == planta)
+            )
         
-        return query.order_by(Historial.fecha_ejecucion.desc()).limit(limit).all()
+        return LubricacionService._paginar_historial(query, limit, cursor)
+    
+    @staticmethod
+    def obtener_historial(
+        db: Session,
+        plan_id: int = None,
+        planta: str = None,
+        limit: int = 50,
+        cursor: str = None,
+        desde: datetime = None,
+        hasta: datetime = None,
+    ) -> tuple:
+        """
+        Obtener historial de lubricaciones, del más reciente al más antiguo.
+        Retorna (registros, cursor_siguiente).
+        """
+        query = LubricacionService.consulta_historial(plan_id, planta, limit, cursor, desde, hasta)
+        return recortar_pagina(db.execute(query).scalars().all(), limit, clave_historial)
+    
+    @staticmethod
+    def consulta_historial_equipo(
+        equipo_id: int,
+        limit: int = 50,
+        cursor: str = None,
+        desde: datetime = None,
+        hasta: datetime = None,
+    ) -> Select:
+        query = (
+            select(Historial)
+            .join(PlanLubricacion, Historial.plan_id == PlanLubricacion.id)
+            .where(PlanLubricacion.equipo_id == equipo_id)
+        )
+        if desde:
+            query = query.where(Historial.fecha_ejecucion >= desde)
+        if hasta:
+            query = query.where(Historial.fecha_ejecucion < hasta)
+        return LubricacionService._paginar_historial(query, limit, cursor)
+    
+    @staticmethod
+    def obtener_historial_equipo(
+        db: Session,
+        equipo_id: int,
+        limit: int = 50,
+        cursor: str = None,
+        desde: datetime = None,
+        hasta: datetime = None,
+    ) -> tuple:
+        """
+        Obtener historial de un equipo, del más reciente al más antiguo.
+        Retorna (registros, cursor_siguiente); cursor_siguiente es None en la última página.
+        """
+        query = LubricacionService.consulta_historial_equipo(equipo_id, limit, cursor, desde, hasta)
+        return recortar_pagina(db.execute(query).scalars().all(), limit, clave_historial)
     
     @staticmethod
     def calcular_cantidad_skf(diametro_mm: float, ancho_mm: float) -> float:
@@ -93,4 +548,54 @@ class LubricacionService:
         """
         if diametro_mm and ancho_mm:
             return 0.005 * diametro_mm * ancho_mm
-        return None
\ No newline at end of file
+        return None
+
+class AsyncLubricacionService:
+    """Lecturas de LubricacionService sobre AsyncSession (mismas consultas)"""
+    
+    @staticmethod
+    async def obtener_todos_planes(
+        db: AsyncSession,
+        planta: str = None,
+        search: str = None,
+        limit: int = None,
+        cursor: str = None,
+    ) -> tuple:
+        query = LubricacionService.consulta_todos_planes(planta, search, limit, cursor)
+        return recortar_pagina((await db.execute(query)).all(), limit, clave_plan_por_nombre)
+    
+    @staticmethod
+    async def obtener_planes_proximos(
+        db: AsyncSession,
+        dias: int = 7,
+        planta: str = None,
+        limit: int = None,
+        cursor: str = None,
+    ) -> tuple:
+        query = LubricacionService.consulta_planes_proximos(dias, planta, limit, cursor)
+        return recortar_pagina((await db.execute(query)).all(), limit, clave_plan_por_fecha)
+    
+    @staticmethod
+    async def obtener_historial(
+        db: AsyncSession,
+        plan_id: int = None,
+        planta: str = None,
+        limit: int = 50,
+        cursor: str = None,
+        desde: datetime = None,
+        hasta: datetime = None,
+    ) -> tuple:
+        query = LubricacionService.consulta_historial(plan_id, planta, limit, cursor, desde, hasta)
+        return recortar_pagina((await db.execute(query)).scalars().all(), limit, clave_historial)
+    
+    @staticmethod
+    async def obtener_historial_equipo(
+        db: AsyncSession,
+        equipo_id: int,
+        limit: int = 50,
+        cursor: str = None,
+        desde: datetime = None,
+        hasta: datetime = None,
+    ) -> tuple:
+        query = LubricacionService.consulta_historial_equipo(equipo_id, limit, cursor, desde, hasta)
+        return recortar_pagina((await db.execute(query)).scalars().all(), limit, clave_historial)
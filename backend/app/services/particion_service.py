@@ -0,0 +1,188 @@
+"""
+Servicio de Particiones del historial de lubricación
+
+historial_lubricacion está particionada por rango mensual de fecha_ejecucion
+(historial_lubricacion_AAAAMM). Este servicio crea las particiones por adelantado,
+garantiza la del mes de cada escritura y aplica la retención: resume cada mes
+vencido en historial_resumen_mensual y luego separa, archiva o elimina su partición.
+"""
+import re
+import threading
+from datetime import date, datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from backend.app.core.config import settings
+from backend.app.core.database import engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+TABLA = "historial_lubricacion"
+ESQUEMA_ARCHIVO = "archivo"
+ACCIONES_RETENCION = ("detach", "archivar", "eliminar")
+
+# Advisory lock propio del mantenimiento de particiones (distinto del de migraciones)
+LOCK_PARTICIONES = 7_316_002
+
+_PATRON = re.compile(rf"^{TABLA}_(\d{{4}})(\d{{2}})$")
+
+# Meses con partición conocida en este proceso: evita consultar el catálogo en cada escritura
+_meses_existentes = set()
+_lock = threading.Lock()
+
+def inicio_mes(fecha) -> date:
+    return date(fecha.year, fecha.month, 1)
+
+def sumar_meses(mes: date, n: int) -> date:
+    total = mes.year * 12 + mes.month - 1 + n
+    return date(total // 12, total % 12 + 1, 1)
+
+def nombre_particion(mes: date) -> str:
+    return f"{TABLA}_{mes:%Y%m}"
+
+def corte_retencion() -> date:
+    """Primer mes que conserva el historial; los anteriores se resumen y se retiran"""
+    return sumar_meses(inicio_mes(datetime.utcnow()), -settings.HISTORIAL_RETENCION_MESES)
+
+class FueraDeRetencion(ValueError):
+    """Ejecución de un mes anterior al corte de retención (su partición ya se retiró o se retirará)"""
+
+class ParticionService:
+    
+    @staticmethod
+    def listar(conn: Connection) -> List[dict]:
+        """Particiones actuales con su mes y filas estimadas (pg_class.reltuples)"""
+        filas = conn.execute(text(
+            "SELECT c.relname, greatest(c.reltuples, 0)::bigint AS filas "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:tabla) ORDER BY c.relname"
+        ), {"tabla": TABLA}).all()
+        particiones = []
+        for nombre, estimadas in filas:
+            coincide = _PATRON.match(nombre)
+            if coincide:
+                mes = date(int(coincide.group(1)), int(coincide.group(2)), 1)
+                particiones.append({"nombre": nombre, "mes": mes, "filas_estimadas": estimadas})
+        return particiones
+    
+    @staticmethod
+    def asegurar_particiones(conn: Connection, desde: Optional[date] = None, hasta: Optional[date] = None) -> List[str]:
+        """
+        Crea las particiones que falten entre `desde` y `hasta` (por defecto: del mes actual
+        a HISTORIAL_PARTICIONES_ADELANTE meses adelante). Retorna los nombres creados.
+        Debe correr dentro de una transacción; el advisory lock serializa a los procesos.
+        """
+        actual = inicio_mes(datetime.utcnow())
+        desde = inicio_mes(desde or actual)
+        hasta = inicio_mes(hasta or sumar_meses(actual, settings.HISTORIAL_PARTICIONES_ADELANTE))
+        
+        meses = []
+        mes = desde
+        while mes <= hasta:
+            meses.append(mes)
+            mes = sumar_meses(mes, 1)
+        return ParticionService.crear_meses(conn, meses)
+    
+    @staticmethod
+    def crear_meses(conn: Connection, meses: Iterable[date]) -> List[str]:
+        """Crea las particiones que falten de exactamente esos meses (misma transacción y lock)"""
+        conn.execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": LOCK_PARTICIONES})
+        existentes = {p["mes"] for p in ParticionService.listar(conn)}
+        creadas = []
+        for mes in sorted(set(meses)):
+            if mes not in existentes:
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {nombre_particion(mes)} PARTITION OF {TABLA} "
+                    f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{sumar_meses(mes, 1).isoformat()}')"
+                ))
+                creadas.append(nombre_particion(mes))
+                existentes.add(mes)
+        
+        with _lock:
+            _meses_existentes.update(existentes)
+        if creadas:
+            logger.info(f"Particiones creadas: {', '.join(creadas)}")
+        return creadas
+    
+    @staticmethod
+    def asegurar_meses(fechas: Iterable[datetime]):
+        """
+        Garantiza la partición de cada mes de `fechas` antes de insertar (ejecuciones
+        retroactivas o fuera del rango creado por adelantado). Usa su propia conexión
+        para no retener el lock del DDL en la transacción de la escritura. Solo crea los
+        meses que faltan, nunca el rango entre ellos, y lanza FueraDeRetencion para un mes
+        anterior al corte: recrearlo dejaría filas fuera de su resumen mensual.
+        """
+        meses = {inicio_mes(f) for f in fechas}
+        corte = corte_retencion()
+        if any(mes < corte for mes in meses):
+            raise FueraDeRetencion(f"Fecha de ejecución anterior al corte de retención ({corte:%Y-%m})")
+        with _lock:
+            faltan = meses - _meses_existentes
+        if not faltan:
+            return
+        with engine.begin() as conn:
+            ParticionService.crear_meses(conn, faltan)
+    
+    @staticmethod
+    def aplicar_retencion(meses: Optional[int] = None, accion: Optional[str] = None, simular: bool = False) -> dict:
+        """
+        Retira las particiones anteriores a `meses` meses atrás. Cada una se resume primero
+        en historial_resumen_mensual (una fila por plan) y luego, según `accion`:
+        - detach: queda como tabla independiente fuera del historial
+        - archivar: se separa y se mueve al esquema "archivo"
+        - eliminar: se separa y se borra
+        """
+        meses = settings.HISTORIAL_RETENCION_MESES if meses is None else meses
+        accion = accion or settings.HISTORIAL_RETENCION_ACCION
+        if accion not in ACCIONES_RETENCION:
+            raise ValueError(f"Acción inválida: {accion} (use {', '.join(ACCIONES_RETENCION)})")
+        if meses < 1:
+            raise ValueError("La retención debe ser de al menos un mes")
+        
+        corte = sumar_meses(inicio_mes(datetime.utcnow()), -meses)
+        with engine.connect() as conn:
+            vencidas = [p for p in ParticionService.listar(conn) if p["mes"] < corte]
+        
+        retiradas = []
+        for particion in vencidas:
+            if simular:
+                retiradas.append({**particion, "resumidas": None})
+                continue
+            # Una transacción por partición: un fallo no deshace las ya retiradas
+            with engine.begin() as conn:
+                conn.execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": LOCK_PARTICIONES})
+                resumidas = conn.execute(text(
+                    "INSERT INTO historial_resumen_mensual "
+                    "(mes, plan_id, ejecuciones, cantidad_total, tecnicos, primera_ejecucion, ultima_ejecucion) "
+                    f"SELECT :mes, plan_id, count(*), sum(cantidad_aplicada), count(DISTINCT tecnico), "
+                    f"min(fecha_ejecucion), max(fecha_ejecucion) FROM {particion['nombre']} GROUP BY plan_id "
+                    # Un mes ya resumido (retención anterior con otro corte) suma sus filas: nunca
+                    # se pisa el resumen. Los técnicos distintos no se pueden sumar; queda el mayor
+                    "ON CONFLICT (mes, plan_id) DO UPDATE SET "
+                    "ejecuciones = historial_resumen_mensual.ejecuciones + excluded.ejecuciones, "
+                    "cantidad_total = historial_resumen_mensual.cantidad_total + excluded.cantidad_total, "
+                    "tecnicos = greatest(historial_resumen_mensual.tecnicos, excluded.tecnicos), "
+                    "primera_ejecucion = least(historial_resumen_mensual.primera_ejecucion, excluded.primera_ejecucion), "
+                    "ultima_ejecucion = greatest(historial_resumen_mensual.ultima_ejecucion, excluded.ultima_ejecucion)"
+                ), {"mes": particion["mes"]}).rowcount
+                conn.execute(text(f"ALTER TABLE {TABLA} DETACH PARTITION {particion['nombre']}"))
+                if accion == "archivar":
+                    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ESQUEMA_ARCHIVO}"))
+                    conn.execute(text(f"ALTER TABLE {particion['nombre']} SET SCHEMA {ESQUEMA_ARCHIVO}"))
+                elif accion == "eliminar":
+                    conn.execute(text(f"DROP TABLE {particion['nombre']}"))
+            with _lock:
+                _meses_existentes.discard(particion["mes"])
+            retiradas.append({**particion, "resumidas": resumidas})
+            logger.info(f"Partición {particion['nombre']} retirada ({accion}), {resumidas} planes resumidos")
+        
+        return {
+            "corte": corte,
+            "accion": accion,
+            "simulacion": simular,
+            "particiones": retiradas,
+        }
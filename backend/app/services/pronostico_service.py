@@ -0,0 +1,250 @@
+"""
+Servicio de Pronóstico de carga de trabajo y demanda de grasa
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.app.core.pagination import decodificar_cursor, recortar_pagina
+from backend.app.models.equipo import Equipo
+from backend.app.models.plan_lubricacion import PlanLubricacion
+import logging
+
+logger = logging.getLogger(__name__)
+
+SIN_LUBRICANTE = "Sin especificar"
+
+@dataclass
+class PlanesArreglos:
+    """
+    Planes activos como arreglos columnares. Los textos repetidos (lubricante, planta,
+    criticidad) se guardan como códigos enteros contra su tabla de categorías.
+    """
+    inicio: date
+    plan_id: np.ndarray
+    equipo_id: np.ndarray
+    equipo_nombre: np.ndarray
+    frecuencia: np.ndarray
+    gramos: np.ndarray
+    # Primer vencimiento en días desde `inicio`; los vencidos cuentan para hoy (día 0)
+    primer_dia: np.ndarray
+    lubricante: np.ndarray
+    planta: np.ndarray
+    criticidad: np.ndarray
+    lubricantes: np.ndarray
+    plantas: np.ndarray
+    criticidades: np.ndarray
+    
+    def __len__(self):
+        return len(self.plan_id)
+
+@dataclass
+class Ocurrencias:
+    """Vencimientos proyectados: índice del plan en PlanesArreglos y día desde `inicio`"""
+    indice: np.ndarray
+    dia: np.ndarray
+
+def _codificar(valores: list):
+    """Códigos enteros por valor y la tabla de categorías en orden alfabético"""
+    vistos = {}
+    codigos = np.fromiter((vistos.setdefault(v, len(vistos)) for v in valores), dtype=np.int64, count=len(valores))
+    categorias = sorted(vistos)
+    remapeo = np.empty(len(categorias), dtype=np.int64)
+    remapeo[[vistos[c] for c in categorias]] = np.arange(len(categorias))
+    return np.array(categorias, dtype=object), remapeo[codigos]
+
+class PronosticoService:
+    
+    @staticmethod
+    def consulta_planes(planta: str = None) -> Select:
+        """Columnas de los planes de equipos activos que intervienen en la proyección"""
+        query = (
+            select(
+                PlanLubricacion.id,
+                PlanLubricacion.equipo_id,
+                Equipo.nombre,
+                Equipo.planta,
+                Equipo.criticidad,
+                PlanLubricacion.tipo_lubricante,
+                PlanLubricacion.cantidad_gramos,
+                PlanLubricacion.frecuencia_dias,
+                PlanLubricacion.proxima_fecha_lubricacion,
+            )
+            .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+            .where(Equipo.estado == "ACTIVO")
+        )
+        if planta:
+            query = query.where(Equipo.planta == planta)
+        return query
+    
+    @staticmethod
+    def a_arreglos(filas: list, inicio: date) -> PlanesArreglos:
+        """Convierte las filas de consulta_planes en arreglos NumPy"""
+        if filas:
+            ids, equipo_ids, nombres, plantas, criticidades, lubricantes, gramos, frecuencias, proximas = zip(*filas)
+        else:
+            ids = equipo_ids = nombres = plantas = criticidades = lubricantes = gramos = frecuencias = proximas = ()
+        
+        # timedelta.days redondea hacia abajo, igual que truncar ambas fechas al día
+        base = datetime.combine(inicio, datetime.min.time())
+        primer_dia = np.fromiter(((p - base).days for p in proximas), dtype=np.int64, count=len(proximas))
+        
+        cat_lub, cod_lub = _codificar([l or SIN_LUBRICANTE for l in lubricantes])
+        cat_planta, cod_planta = _codificar([getattr(p, "value", p) for p in plantas])
+        cat_crit, cod_crit = _codificar([getattr(c, "value", c) for c in criticidades])
+        
+        return PlanesArreglos(
+            inicio=inicio,
+            plan_id=np.array(ids, dtype=np.int64),
+            equipo_id=np.array(equipo_ids, dtype=np.int64),
+            equipo_nombre=np.array(nombres, dtype=object),
+            # frecuencia_dias < 1 repetiría el mismo día sin fin
+            frecuencia=np.maximum(np.array(frecuencias, dtype=np.int64), 1),
+            gramos=np.array([g or 0.0 for g in gramos], dtype=np.float64),
+            primer_dia=np.maximum(primer_dia, 0),
+            lubricante=cod_lub,
+            planta=cod_planta,
+            criticidad=cod_crit,
+            lubricantes=cat_lub,
+            plantas=cat_planta,
+            criticidades=cat_crit,
+        )
+    
+    @staticmethod
+    def expandir(planes: PlanesArreglos, dias: int) -> Ocurrencias:
+        """
+        Proyecta las recurrencias de todos los planes en [inicio, inicio + dias) sin bucles
+        por plan: cada plan aporta primer_dia, primer_dia + f, primer_dia + 2f, ...
+        """
+        dentro = planes.primer_dia < dias
+        cantidad = np.where(dentro, (dias - 1 - planes.primer_dia) // planes.frecuencia + 1, 0)
+        total = int(cantidad.sum())
+        
+        indice = np.repeat(np.arange(len(planes), dtype=np.int64), cantidad)
+        # Número de repetición dentro de cada plan: 0, 1, 2, ... reiniciado en cada plan
+        desplazamiento = np.repeat(np.cumsum(cantidad) - cantidad, cantidad)
+        repeticion = np.arange(total, dtype=np.int64) - desplazamiento
+        dia = planes.primer_dia[indice] + repeticion * planes.frecuencia[indice]
+        return Ocurrencias(indice=indice, dia=dia)
+    
+    @staticmethod
+    def agregar(planes: PlanesArreglos, ocurrencias: Ocurrencias, dias: int, agrupacion: str = "semana") -> dict:
+        """
+        Tareas y gramos por periodo (día o semana ISO), lubricante, planta y criticidad.
+        Agrega con un único bincount sobre una clave combinada.
+        """
+        if agrupacion == "semana":
+            # Las semanas empiezan el lunes; la primera puede quedar incompleta
+            ajuste = planes.inicio.weekday()
+            periodo = (ocurrencias.dia + ajuste) // 7
+            n_periodos = (dias - 1 + ajuste) // 7 + 1
+            inicio_periodo = lambda p: planes.inicio + timedelta(days=int(p) * 7 - ajuste)
+        else:
+            periodo = ocurrencias.dia
+            n_periodos = dias
+            inicio_periodo = lambda p: planes.inicio + timedelta(days=int(p))
+        
+        n_lub, n_planta, n_crit = len(planes.lubricantes), len(planes.plantas), len(planes.criticidades)
+        i = ocurrencias.indice
+        clave = ((periodo * n_lub + planes.lubricante[i]) * n_planta + planes.planta[i]) * n_crit + planes.criticidad[i]
+        tamano = n_periodos * n_lub * n_planta * n_crit
+        tareas = np.bincount(clave, minlength=tamano)
+        gramos = np.bincount(clave, weights=planes.gramos[i], minlength=tamano)
+        
+        series = []
+        for k in np.flatnonzero(tareas):
+            resto, c = divmod(int(k), n_crit)
+            resto, p = divmod(resto, n_planta)
+            per, l = divmod(resto, n_lub)
+            series.append({
+                "periodo": inicio_periodo(per),
+                "tipo_lubricante": planes.lubricantes[l],
+                "planta": planes.plantas[p],
+                "criticidad": planes.criticidades[c],
+                "tareas": int(tareas[k]),
+                "gramos": round(float(gramos[k]), 2),
+            })
+        
+        por_lubricante = []
+        tareas_lub = np.bincount(planes.lubricante[i], minlength=n_lub)
+        gramos_lub = np.bincount(planes.lubricante[i], weights=planes.gramos[i], minlength=n_lub)
+        for l in np.flatnonzero(tareas_lub):
+            por_lubricante.append({
+                "tipo_lubricante": planes.lubricantes[l],
+                "tareas": int(tareas_lub[l]),
+                "gramos": round(float(gramos_lub[l]), 2),
+                "kilogramos": round(float(gramos_lub[l]) / 1000, 3),
+            })
+        
+        return {
+            "desde": planes.inicio,
+            "hasta": planes.inicio + timedelta(days=dias - 1),
+            "agrupacion": agrupacion,
+            "total_planes": len(planes),
+            "total_tareas": int(len(i)),
+            "total_gramos": round(float(planes.gramos[i].sum()), 2),
+            "por_lubricante": por_lubricante,
+            "series": series,
+        }
+    
+    @staticmethod
+    def calendario(planes: PlanesArreglos, ocurrencias: Ocurrencias, limit: int = 500, cursor: str = None) -> tuple:
+        """
+        Vencimientos uno por uno ordenados por (fecha, plan_id), paginados por cursor.
+        Retorna (ocurrencias, cursor_siguiente).
+        """
+        plan_id = planes.plan_id[ocurrencias.indice]
+        dia = ocurrencias.dia
+        if cursor:
+            fecha_cursor, plan_cursor = decodificar_cursor(cursor, 2)
+            try:
+                dia_cursor = (date.fromisoformat(str(fecha_cursor)) - planes.inicio).days
+                plan_cursor = int(plan_cursor)
+            except (TypeError, ValueError):
+                raise ValueError("Cursor inválido")
+            siguientes = (dia > dia_cursor) | ((dia == dia_cursor) & (plan_id > plan_cursor))
+            dia, plan_id, indice = dia[siguientes], plan_id[siguientes], ocurrencias.indice[siguientes]
+        else:
+            indice = ocurrencias.indice
+        
+        # Solo se ordena lo necesario para la página: argpartition acota a limit + 1 candidatos
+        clave = dia * (int(planes.plan_id.max(initial=0)) + 1) + plan_id
+        if len(clave) > limit + 1:
+            candidatos = np.argpartition(clave, limit)[:limit + 1]
+        else:
+            candidatos = np.arange(len(clave))
+        orden = candidatos[np.argsort(clave[candidatos], kind="stable")]
+        
+        filas = [
+            {
+                "fecha": planes.inicio + timedelta(days=int(dia[k])),
+                "plan_id": int(plan_id[k]),
+                "equipo_id": int(planes.equipo_id[indice[k]]),
+                "equipo_nombre": planes.equipo_nombre[indice[k]],
+                "planta": planes.plantas[planes.planta[indice[k]]],
+                "criticidad": planes.criticidades[planes.criticidad[indice[k]]],
+                "tipo_lubricante": planes.lubricantes[planes.lubricante[indice[k]]],
+                "cantidad_gramos": float(planes.gramos[indice[k]]),
+            }
+            for k in orden
+        ]
+        return recortar_pagina(filas, limit, lambda f: (f["fecha"].isoformat(), f["plan_id"]))
+    
+    @staticmethod
+    def cargar_planes(db: Session, planta: str = None, inicio: Optional[date] = None) -> PlanesArreglos:
+        inicio = inicio or datetime.utcnow().date()
+        return PronosticoService.a_arreglos(db.execute(PronosticoService.consulta_planes(planta)).all(), inicio)
+
+class AsyncPronosticoService:
+    """Carga de planes de PronosticoService sobre AsyncSession (misma consulta)"""
+    
+    @staticmethod
+    async def cargar_planes(db: AsyncSession, planta: str = None, inicio: Optional[date] = None) -> PlanesArreglos:
+        inicio = inicio or datetime.utcnow().date()
+        filas = (await db.execute(PronosticoService.consulta_planes(planta))).all()
+        return PronosticoService.a_arreglos(filas, inicio)
@@ -0,0 +1,229 @@
+"""
+Servicio de Rodamientos: catálogo de dimensiones y cálculo SKF en lote
+"""
+import csv
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import Float, Integer, column, select, update, values
+from sqlalchemy.orm import Session
+
+from backend.app.core.cache import cache_respuestas
+from backend.app.core.notificaciones import notificar
+from backend.app.core.presupuesto import contar_bloque
+from backend.app.models.equipo import Equipo
+from backend.app.models.plan_lubricacion import PlanLubricacion
+import logging
+
+logger = logging.getLogger(__name__)
+
+RUTA_CATALOGO = os.path.join(os.path.dirname(__file__), "..", "data", "rodamientos.csv")
+
+# Factor de la fórmula SKF de relubricación: G = 0.005 × D × B
+FACTOR_SKF = 0.005
+
+MODOS_RECALCULO = ("completar", "validar", "sobrescribir")
+
+# Prefijos de fabricante que aparecen en el texto libre de modelo_rodamiento, pegados al
+# número ("SKF6205") o separados ("SKF 6205", "SKF-6205")
+_MARCAS = re.compile(r"^(SKF|FAG|INA|NSK|NTN|TIMKEN|KOYO|NACHI|ZWZ)[\s\-./]*")
+# Los dígitos iniciales, hasta el primer separador o sufijo de letras
+_NUMERO = re.compile(r"^(\d{4,5})(?!\d)")
+
+def normalizar_designacion(texto: Optional[str]) -> Optional[str]:
+    """
+    Reduce una designación libre a su número base: "SKF 6205-2RS1/C3" → "6205",
+    "22220 EK" → "22220". Sufijos de sellado, juego o jaula no cambian D ni B.
+    Retorna None si el texto no empieza con un número de rodamiento de 4 o 5 dígitos.
+    Sin separador no se adivina: "62052RS1" queda "62052" y no se recorta a 6205.
+    """
+    if not texto:
+        return None
+    limpio = _MARCAS.sub("", texto.strip().upper())
+    numero = _NUMERO.match(limpio)
+    return numero.group(1) if numero else None
+
+@dataclass
+class CatalogoRodamientos:
+    """Índice compacto designación → fila, con D y B en arreglos contiguos"""
+    indice: Dict[str, int]
+    designacion: np.ndarray
+    diametro: np.ndarray
+    ancho: np.ndarray
+    
+    def buscar(self, texto: Optional[str]) -> int:
+        """Posición en el catálogo o -1"""
+        numero = normalizar_designacion(texto)
+        if numero is None:
+            return -1
+        # Sin recortar a 4 dígitos: 62202 o 63005 no son 6220 ni 6300
+        posicion = self.indice.get(numero)
+        return -1 if posicion is None else posicion
+    
+    def resolver(self, textos: List[Optional[str]]) -> np.ndarray:
+        """Posiciones en el catálogo de muchas designaciones (-1 = desconocida)"""
+        # Las flotas repiten pocos modelos: se normaliza cada texto distinto una sola vez
+        memo = {}
+        return np.fromiter(
+            (memo[t] if t in memo else memo.setdefault(t, self.buscar(t)) for t in textos),
+            dtype=np.int64,
+            count=len(textos),
+        )
+
+@lru_cache(maxsize=1)
+def catalogo() -> CatalogoRodamientos:
+    """Catálogo cargado una vez por proceso desde data/rodamientos.csv"""
+    with open(RUTA_CATALOGO, newline="", encoding="utf-8") as archivo:
+        filas = list(csv.DictReader(archivo))
+    logger.info(f"Catálogo de rodamientos cargado: {len(filas)} designaciones")
+    return CatalogoRodamientos(
+        indice={f["designacion"]: i for i, f in enumerate(filas)},
+        designacion=np.array([f["designacion"] for f in filas], dtype=object),
+        diametro=np.array([float(f["D_mm"]) for f in filas]),
+        ancho=np.array([float(f["B_mm"]) for f in filas]),
+    )
+
+class RodamientoService:
+    
+    @staticmethod
+    def calcular_lote(items: list) -> list:
+        """
+        Calcula G = 0.005 × D × B para muchos rodamientos de una vez.
+        Cada item trae `designacion` o bien `diametro_mm` y `ancho_mm` (explícitos mandan).
+        Retorna un resultado por item, en el orden recibido.
+        """
+        cat = catalogo()
+        posiciones = cat.resolver([i.designacion for i in items])
+        encontrado = posiciones >= 0
+        seguro = np.where(encontrado, posiciones, 0)
+        
+        explicito_d = np.array([i.diametro_mm if i.diametro_mm is not None else np.nan for i in items], dtype=np.float64)
+        explicito_b = np.array([i.ancho_mm if i.ancho_mm is not None else np.nan for i in items], dtype=np.float64)
+        diametro = np.where(np.isnan(explicito_d), np.where(encontrado, cat.diametro[seguro], np.nan), explicito_d)
+        ancho = np.where(np.isnan(explicito_b), np.where(encontrado, cat.ancho[seguro], np.nan), explicito_b)
+        gramos = np.round(FACTOR_SKF * diametro * ancho, 2)
+        
+        resultados = []
+        for k, item in enumerate(items):
+            ok = not np.isnan(gramos[k])
+            resultados.append({
+                "indice": k,
+                "designacion": item.designacion,
+                "designacion_catalogo": cat.designacion[posiciones[k]] if encontrado[k] else None,
+                "diametro_mm": float(diametro[k]) if ok else None,
+                "ancho_mm": float(ancho[k]) if ok else None,
+                "cantidad_gramos": float(gramos[k]) if ok else None,
+                "error": None if ok else "Designación fuera del catálogo y sin D/B explícitos",
+            })
+        return resultados
+    
+    @staticmethod
+    def recalcular_flota(db: Session, modo: str = "completar", tolerancia: float = 0.1,
+                         max_discrepancias: int = 1000) -> dict:
+        """
+        Recalcula cantidad_gramos de todos los equipos y sus planes desde modelo_rodamiento.
+        - completar: solo llena cantidades vacías
+        - sobrescribir: reemplaza toda cantidad que difiera del cálculo
+        - validar: no escribe; reporta diferencias mayores a `tolerancia` (fracción)
+        """
+        if modo not in MODOS_RECALCULO:
+            raise ValueError(f"Modo inválido: {modo} (use {', '.join(MODOS_RECALCULO)})")
+        
+        filas = db.execute(
+            select(Equipo.id, Equipo.nombre, Equipo.planta, Equipo.modelo_rodamiento, Equipo.cantidad_gramos)
+        ).all()
+        cat = catalogo()
+        posiciones = cat.resolver([f.modelo_rodamiento for f in filas])
+        encontrado = posiciones >= 0
+        seguro = np.where(encontrado, posiciones, 0)
+        calculado = np.round(FACTOR_SKF * cat.diametro[seguro] * cat.ancho[seguro], 2)
+        actual = np.array([f.cantidad_gramos if f.cantidad_gramos is not None else np.nan for f in filas], dtype=np.float64)
+        
+        vacio = np.isnan(actual)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            desvio = np.abs(actual - calculado) / calculado
+        discrepa = encontrado & ~vacio & (desvio > tolerancia)
+        
+        if modo == "completar":
+            escribir = encontrado & vacio
+        elif modo == "sobrescribir":
+            escribir = encontrado & (vacio | (actual != calculado))
+        else:
+            escribir = np.zeros(len(filas), dtype=bool)
+        
+        sin_catalogo = sorted({
+            f.modelo_rodamiento for f, ok in zip(filas, encontrado) if not ok and f.modelo_rodamiento
+        })
+        discrepancias = [
+            {
+                "equipo_id": filas[k].id,
+                "equipo_nombre": filas[k].nombre,
+                "modelo_rodamiento": filas[k].modelo_rodamiento,
+                "cantidad_actual": float(actual[k]),
+                "cantidad_calculada": float(calculado[k]),
+            }
+            for k in np.flatnonzero(discrepa)[:max_discrepancias]
+        ]
+        
+        cambios = [(filas[k].id, float(calculado[k])) for k in np.flatnonzero(escribir)]
+        planes_actualizados = 0
+        if cambios:
+            try:
+                planes_actualizados = RodamientoService._escribir_cantidades(db, cambios, datetime.utcnow())
+                por_planta = {}
+                for k in np.flatnonzero(escribir):
+                    por_planta.setdefault(getattr(filas[k].planta, "value", filas[k].planta), []).append(filas[k].id)
+                for planta, ids in por_planta.items():
+                    notificar(db, "equipos", planta, ids)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error al recalcular cantidades: {str(e)}")
+                raise
+            cache_respuestas.invalidar(*{getattr(filas[k].planta, "value", filas[k].planta) for k in np.flatnonzero(escribir)})
+        
+        logger.info(f"Recálculo SKF ({modo}): {len(cambios)} equipos actualizados, {int(discrepa.sum())} discrepancias")
+        return {
+            "modo": modo,
+            "total_equipos": len(filas),
+            "resueltos": int(encontrado.sum()),
+            "sin_modelo": sum(1 for f in filas if not f.modelo_rodamiento),
+            "sin_catalogo": len(sin_catalogo),
+            "modelos_sin_catalogo": sin_catalogo[:max_discrepancias],
+            "equipos_actualizados": len(cambios),
+            "planes_actualizados": planes_actualizados,
+            "total_discrepancias": int(discrepa.sum()),
+            "discrepancias": discrepancias,
+        }
+    
+    @staticmethod
+    def _escribir_cantidades(db: Session, cambios: list, ahora: datetime, bloque: int = 5000) -> int:
+        """UPDATE ... FROM (VALUES ...) de equipos y sus planes, en bloques"""
+        planes = 0
+        for inicio in range(0, len(cambios), bloque):
+            contar_bloque()
+            datos = values(
+                column("equipo_id", Integer), column("cantidad_gramos", Float), name="cantidades"
+            ).data(cambios[inicio:inicio + bloque])
+            db.execute(
+                update(Equipo)
+                .where(Equipo.id == datos.c.equipo_id)
+                .values(cantidad_gramos=datos.c.cantidad_gramos, updated_at=ahora)
+                .execution_options(synchronize_session=False)
+            )
+            planes += db.execute(
+                update(PlanLubricacion)
+                .where(PlanLubricacion.equipo_id == datos.c.equipo_id)
+                .values(
+                    cantidad_gramos=datos.c.cantidad_gramos,
+                    version=PlanLubricacion.version + 1,
+                    updated_at=ahora,
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        return planes
@@ -0,0 +1,147 @@
+"""
+Servicio de Sincronización incremental para dispositivos sin conexión
+
+El token guarda una marca (fecha, id) por tabla: equipos y planes por updated_at,
+historial por created_at (solo se inserta). Cada llamada devuelve las filas posteriores a
+su marca, como mucho SYNC_LIMITE por tabla. La marca siguiente nunca pasa de "inicio de
+la consulta - SYNC_SOLAPAMIENTO_SEGUNDOS", quede la tabla al día o se corte en una página
+que llegó a filas recientes: las fechas las pone la aplicación antes de confirmar, así que
+una transacción que confirma tarde (o un reloj algo atrasado en otro worker) no queda
+fuera. Las filas de esa ventana se reenvían; el cliente aplica por id. Si en la ventana
+cambian más de SYNC_LIMITE filas de una tabla, su marca se queda en la ventana hasta que
+el tiempo la deja atrás.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.core.pagination import codificar_cursor, decodificar_cursor
+from backend.app.models.equipo import Equipo
+from backend.app.models.historial import Historial
+from backend.app.models.plan_lubricacion import PlanLubricacion
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Marca inicial (sin token): todo lo existente
+_ORIGEN = (datetime(1970, 1, 1), 0)
+
+def decodificar_token(token: str = None) -> tuple:
+    """
+    ([(fecha, id) de equipos, de planes, de historial], inicial); inicial indica que la
+    carga de equipos sin token todavía no terminó. ValueError si el token es inválido.
+    """
+    if not token:
+        return [_ORIGEN] * 3, True
+    valores = decodificar_cursor(token, 7)
+    try:
+        marcas = [(datetime.fromisoformat(str(valores[i])), int(valores[i + 1])) for i in (0, 2, 4)]
+    except (TypeError, ValueError):
+        raise ValueError("Token de sincronización inválido")
+    return marcas, bool(valores[6])
+
+def _desde(columna_fecha, columna_id, marca: tuple):
+    return tuple_(columna_fecha, columna_id) > tuple_(*marca)
+
+class SyncService:
+    
+    @staticmethod
+    def consulta_equipos(marca: tuple, planta: str = None, inicial: bool = False) -> Select:
+        """
+        Equipos modificados desde la marca, de cualquier planta y estado: los inactivos o
+        de otra planta son las bajas del cliente. En la carga inicial solo los vigentes.
+        """
+        query = select(Equipo).where(_desde(Equipo.updated_at, Equipo.id, marca))
+        if inicial:
+            query = query.where(Equipo.estado == "ACTIVO")
+            if planta:
+                query = query.where(Equipo.planta == planta)
+        return query.order_by(Equipo.updated_at, Equipo.id).limit(settings.SYNC_LIMITE + 1)
+    
+    @staticmethod
+    def consulta_planes(marca: tuple, planta: str = None) -> Select:
+        query = (
+            select(PlanLubricacion)
+            .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+            .where(Equipo.estado == "ACTIVO")
+            .where(_desde(PlanLubricacion.updated_at, PlanLubricacion.id, marca))
+        )
+        if planta:
+            query = query.where(Equipo.planta == planta)
+        return query.order_by(PlanLubricacion.updated_at, PlanLubricacion.id).limit(settings.SYNC_LIMITE + 1)
+    
+    @staticmethod
+    def consulta_historial(marca: tuple, inicio: datetime, planta: str = None) -> Select:
+        """Historial insertado desde la marca, solo de los últimos SYNC_HISTORIAL_DIAS (poda particiones)"""
+        query = (
+            select(Historial)
+            .join(PlanLubricacion, Historial.plan_id == PlanLubricacion.id)
+            .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+            .where(Equipo.estado == "ACTIVO")
+            .where(Historial.fecha_ejecucion >= inicio - timedelta(days=settings.SYNC_HISTORIAL_DIAS))
+            .where(_desde(Historial.created_at, Historial.id, marca))
+        )
+        if planta:
+            query = query.where(Equipo.planta == planta)
+        return query.order_by(Historial.created_at, Historial.id).limit(settings.SYNC_LIMITE + 1)
+    
+    @staticmethod
+    def consultas(token: str = None, planta: str = None) -> tuple:
+        """(inicio, inicial, [consulta de equipos, de planes, de historial])"""
+        inicio = datetime.utcnow()
+        marcas, inicial = decodificar_token(token)
+        return inicio, inicial, [
+            SyncService.consulta_equipos(marcas[0], planta, inicial=inicial),
+            SyncService.consulta_planes(marcas[1], planta),
+            SyncService.consulta_historial(marcas[2], inicio, planta),
+        ]
+    
+    @staticmethod
+    def armar(
+        inicio: datetime, inicial: bool, equipos: list, planes: list, historial: list, planta: str = None
+    ) -> dict:
+        """Recorta cada tabla a SYNC_LIMITE, separa las bajas y calcula el token siguiente"""
+        al_dia = (inicio - timedelta(seconds=settings.SYNC_SOLAPAMIENTO_SEGUNDOS), 0)
+        marcas = []
+        completo = True
+        recortadas = []
+        equipos_pendientes = len(equipos) > settings.SYNC_LIMITE
+        for filas, columna in ((equipos, "updated_at"), (planes, "updated_at"), (historial, "created_at")):
+            if len(filas) > settings.SYNC_LIMITE:
+                filas = filas[:settings.SYNC_LIMITE]
+                marcas.extend(min((getattr(filas[-1], columna), filas[-1].id), al_dia))
+                completo = False
+            else:
+                marcas.extend(al_dia)
+            recortadas.append(filas)
+        equipos, planes, historial = recortadas
+        
+        def vigente(equipo) -> bool:
+            valor = getattr(equipo.planta, "value", equipo.planta)
+            return equipo.estado == "ACTIVO" and (not planta or valor == planta)
+        
+        return {
+            "token": codificar_cursor(*marcas, int(inicial and equipos_pendientes)),
+            "completo": completo,
+            "equipos": [e for e in equipos if vigente(e)],
+            "planes": planes,
+            "historial": historial,
+            "equipos_eliminados": [e.id for e in equipos if not vigente(e)],
+        }
+    
+    @staticmethod
+    def obtener_cambios(db: Session, token: str = None, planta: str = None) -> dict:
+        inicio, inicial, consultas = SyncService.consultas(token, planta)
+        resultados = [db.execute(q).scalars().all() for q in consultas]
+        return SyncService.armar(inicio, inicial, *resultados, planta=planta)
+
+class AsyncSyncService:
+    """SyncService sobre AsyncSession (mismas consultas)"""
+    
+    @staticmethod
+    async def obtener_cambios(db: AsyncSession, token: str = None, planta: str = None) -> dict:
+        inicio, inicial, consultas = SyncService.consultas(token, planta)
+        resultados = [(await db.execute(q)).scalars().all() for q in consultas]
+        return SyncService.armar(inicio, inicial, *resultados, planta=planta)
@@ -0,0 +1,256 @@
+"""
+Servicio de Vencimientos: índice en memoria de los planes por fecha de vencimiento
+
+Cada proceso mantiene, por planta, la lista ordenada (proxima_fecha, plan_id) de los
+planes de equipos activos con su fila completa, así "qué vence en los próximos N días"
+se responde con una búsqueda binaria sin ir a la base de datos. Se mantiene coherente
+con los eventos de core/notificaciones.py: cada evento recarga solo los planes o equipos
+afectados, y "recarga" reconstruye el índice completo.
+
+Mientras el índice no está cargado, la escucha está caída o hay eventos publicados sin
+aplicar para una planta, disponible() es False y las rutas consultan la base de datos.
+"""
+import math
+import threading
+from bisect import bisect_right, insort
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from heapq import merge
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Select, select
+
+from backend.app.core.database import SessionLocal
+from backend.app.core.notificaciones import despachador
+from backend.app.core.pagination import decodificar_cursor, recortar_pagina
+from backend.app.models.equipo import Equipo
+from backend.app.models.plan_lubricacion import PlanLubricacion
+from backend.app.services.lubricacion_service import (
+    ESTADO_HOY, ESTADO_PROXIMO, ESTADO_VENCIDO,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class PlanIndexado:
+    """Columnas de PlanResumen que no dependen del momento de la consulta"""
+    id: int
+    equipo_id: int
+    equipo_nombre: str
+    equipo_planta: object
+    criticidad: object
+    tipo_lubricante: Optional[str]
+    cantidad_gramos: Optional[float]
+    frecuencia_dias: int
+    proxima_fecha: datetime
+    ultima_fecha: datetime
+    
+    @property
+    def planta(self) -> str:
+        return getattr(self.equipo_planta, "value", self.equipo_planta)
+    
+    @property
+    def clave(self) -> Tuple[datetime, int]:
+        return self.proxima_fecha, self.id
+    
+    def resumen(self, ahora: datetime) -> dict:
+        """Fila de PlanResumen con dias_restantes y estado calculados como en SQL"""
+        dias_restantes = math.floor((self.proxima_fecha - ahora).total_seconds() / 86400)
+        if dias_restantes < 0:
+            estado = ESTADO_VENCIDO
+        elif dias_restantes <= 1:
+            estado = ESTADO_HOY
+        else:
+            estado = ESTADO_PROXIMO
+        return {
+            "id": self.id,
+            "equipo_id": self.equipo_id,
+            "equipo_nombre": self.equipo_nombre,
+            "equipo_planta": self.equipo_planta,
+            "criticidad": self.criticidad,
+            "tipo_lubricante": self.tipo_lubricante,
+            "cantidad_gramos": self.cantidad_gramos,
+            "frecuencia_dias": self.frecuencia_dias,
+            "proxima_fecha": self.proxima_fecha,
+            "ultima_fecha": self.ultima_fecha,
+            "dias_restantes": dias_restantes,
+            "estado": estado,
+        }
+
+def consulta_planes_indexables() -> Select:
+    return (
+        select(
+            PlanLubricacion.id,
+            PlanLubricacion.equipo_id,
+            Equipo.nombre,
+            Equipo.planta,
+            Equipo.criticidad,
+            PlanLubricacion.tipo_lubricante,
+            PlanLubricacion.cantidad_gramos,
+            PlanLubricacion.frecuencia_dias,
+            PlanLubricacion.proxima_fecha_lubricacion,
+            PlanLubricacion.ultima_fecha_lubricacion,
+        )
+        .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+        .where(Equipo.estado == "ACTIVO")
+    )
+
+def _a_plan(fila) -> PlanIndexado:
+    return PlanIndexado(
+        id=fila[0],
+        equipo_id=fila[1],
+        equipo_nombre=fila[2],
+        # Se guardan tal como los devuelve la BD: PlanResumen los valida igual que en SQL
+        equipo_planta=fila[3],
+        criticidad=fila[4],
+        tipo_lubricante=fila[5],
+        cantidad_gramos=fila[6],
+        frecuencia_dias=fila[7],
+        proxima_fecha=fila[8],
+        ultima_fecha=fila[9],
+    )
+
+class IndiceVencimientos:
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._claves: Dict[str, List[Tuple[datetime, int]]] = defaultdict(list)
+        self._planes: Dict[int, PlanIndexado] = {}
+        self._por_equipo: Dict[int, Set[int]] = defaultdict(set)
+        # Eventos publicados y todavía no aplicados, por planta (None = todas)
+        self._pendientes: Dict[Optional[str], int] = defaultdict(int)
+        self.cargado = False
+        self.cargado_en: Optional[datetime] = None
+    
+    # ---- coherencia -------------------------------------------------------
+    
+    def registrar(self):
+        """Se suscribe a los eventos de cambios (llamar una vez, antes de iniciar el despachador)"""
+        despachador.suscribir(self.aplicar, al_publicar=self._marcar_pendiente)
+    
+    def _marcar_pendiente(self, evento: dict):
+        with self._lock:
+            self._pendientes[evento["p"]] += 1
+    
+    def disponible(self, planta: str = None) -> bool:
+        """True si el índice puede responder por la planta sin riesgo de estar atrasado"""
+        with self._lock:
+            if not self.cargado or not despachador.conectado or self._pendientes[None]:
+                return False
+            if planta is None:
+                return not any(self._pendientes.values())
+            return not self._pendientes[planta]
+    
+    def aplicar(self, evento: dict):
+        """Aplica un evento (hilo del despachador); ante cualquier error recarga todo"""
+        try:
+            if evento["t"] == "recarga" or not self.cargado:
+                self.recargar()
+            elif evento["t"] == "planes":
+                self._refrescar(PlanLubricacion.id.in_(evento["ids"]), planes=evento["ids"])
+            elif evento["t"] == "equipos":
+                self._refrescar(PlanLubricacion.equipo_id.in_(evento["ids"]), equipos=evento["ids"])
+        except Exception:
+            logger.exception("Error al aplicar evento al índice de vencimientos; se recarga completo")
+            try:
+                self.recargar()
+            except Exception:
+                logger.exception("No se pudo recargar el índice de vencimientos")
+                with self._lock:
+                    self.cargado = False
+        finally:
+            with self._lock:
+                self._pendientes[evento["p"]] -= 1
+    
+    def recargar(self):
+        with SessionLocal() as db:
+            planes = [_a_plan(f) for f in db.execute(consulta_planes_indexables()).all()]
+        claves = defaultdict(list)
+        por_equipo = defaultdict(set)
+        for plan in planes:
+            claves[plan.planta].append(plan.clave)
+            por_equipo[plan.equipo_id].add(plan.id)
+        for lista in claves.values():
+            lista.sort()
+        with self._lock:
+            self._claves = claves
+            self._planes = {p.id: p for p in planes}
+            self._por_equipo = por_equipo
+            self.cargado = True
+            self.cargado_en = datetime.utcnow()
+        logger.info(f"Índice de vencimientos cargado: {len(planes)} planes")
+    
+    def _refrescar(self, condicion, planes: Iterable[int] = (), equipos: Iterable[int] = ()):
+        """Relee de la BD los planes afectados y reemplaza sus entradas"""
+        with SessionLocal() as db:
+            nuevos = [_a_plan(f) for f in db.execute(consulta_planes_indexables().where(condicion)).all()]
+        with self._lock:
+            afectados = set(planes)
+            for equipo_id in equipos:
+                afectados |= self._por_equipo.get(equipo_id, set())
+            for plan_id in afectados:
+                self._quitar(plan_id)
+            for plan in nuevos:
+                self._quitar(plan.id)
+                insort(self._claves[plan.planta], plan.clave)
+                self._planes[plan.id] = plan
+                self._por_equipo[plan.equipo_id].add(plan.id)
+    
+    def _quitar(self, plan_id: int):
+        plan = self._planes.pop(plan_id, None)
+        if plan is None:
+            return
+        claves = self._claves[plan.planta]
+        posicion = bisect_right(claves, plan.clave) - 1
+        if posicion >= 0 and claves[posicion] == plan.clave:
+            del claves[posicion]
+        self._por_equipo[plan.equipo_id].discard(plan_id)
+    
+    # ---- consultas --------------------------------------------------------
+    
+    def proximos(self, dias: int = 7, planta: str = None, limit: int = None, cursor: str = None) -> tuple:
+        """
+        Misma respuesta que LubricacionService.obtener_planes_proximos: planes con
+        proxima_fecha <= ahora + dias, ordenados por (fecha, id). Retorna (filas, cursor).
+        """
+        ahora = datetime.utcnow()
+        limite = ahora + timedelta(days=dias)
+        desde = None
+        if cursor:
+            fecha, plan_id = decodificar_cursor(cursor, 2)
+            try:
+                desde = (datetime.fromisoformat(str(fecha)), int(plan_id))
+            except (TypeError, ValueError):
+                raise ValueError("Cursor inválido")
+        
+        with self._lock:
+            plantas = [planta] if planta else list(self._claves)
+            tramos = []
+            for p in plantas:
+                claves = self._claves.get(p, [])
+                inicio = bisect_right(claves, desde) if desde else 0
+                # Límite exclusivo: la primera clave con fecha > limite
+                fin = bisect_right(claves, (limite, math.inf))
+                tramos.append(claves[inicio:fin])
+            maximo = None if limit is None else limit + 1
+            filas = []
+            for clave in merge(*tramos):
+                if maximo is not None and len(filas) >= maximo:
+                    break
+                filas.append(self._planes[clave[1]].resumen(ahora))
+        
+        return recortar_pagina(filas, limit, lambda f: (f["proxima_fecha"], f["id"]))
+    
+    def estado(self) -> dict:
+        with self._lock:
+            return {
+                "cargado": self.cargado,
+                "cargado_en": self.cargado_en,
+                "escuchando": despachador.conectado,
+                "planes": len(self._planes),
+                "por_planta": {p: len(c) for p, c in self._claves.items()},
+            }
+
+indice_vencimientos = IndiceVencimientos()
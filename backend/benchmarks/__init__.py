@@ -0,0 +1,5 @@
+"""
+Benchmarks de la API sobre un dataset sintético de planta
+
+Uso: python -m backend.benchmarks <generar|ejecutar> [opciones]
+"""
@@ -0,0 +1,124 @@
+"""
+Uso:
+    python -m backend.benchmarks generar [--equipos 100000] [--dias 730] [--limpiar]
+    python -m backend.benchmarks ejecutar [--iteraciones 50] [--salida archivo.json] [--comparar base.json]
+    python -m backend.benchmarks concurrencia [--escritores 100] [--peticiones 2000] [--url http://...]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+
+def generar(args) -> int:
+    from backend.app.core.database import engine
+    from backend.app.core.migraciones import aplicar_migraciones
+    from backend.benchmarks import generador
+    
+    aplicar_migraciones(engine)
+    if args.limpiar:
+        generador.limpiar(engine)
+    conteo = generador.generar(engine, equipos=args.equipos, dias_historial=args.dias, semilla=args.semilla)
+    print(json.dumps(conteo, indent=2))
+    return 0
+
+def ejecutar(args) -> int:
+    from backend.benchmarks import runner
+    from backend.benchmarks.escenarios import ESCENARIOS
+    
+    escenarios = [e for e in ESCENARIOS if not args.filtro or args.filtro in e.nombre]
+    reporte = runner.ejecutar(
+        escenarios,
+        iteraciones=args.iteraciones,
+        calentamiento=args.calentamiento,
+        con_cache=args.con_cache,
+        incluir_escrituras=not args.solo_lectura,
+        semilla=args.semilla,
+    )
+    
+    salida = args.salida
+    if salida is None:
+        os.makedirs(RESULTADOS, exist_ok=True)
+        salida = os.path.join(RESULTADOS, f"bench-{datetime.utcnow():%Y%m%d-%H%M%S}.json")
+    runner.guardar(reporte, salida)
+    
+    print(f"{'escenario':<32} {'p50':>9} {'p95':>9} {'p99':>9} {'consultas':>9} {'mem KB':>9}")
+    for r in reporte["resultados"]:
+        print(
+            f"{r['escenario']:<32} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+            f" {r['consultas_media']:>9} {r['memoria_pico_kb']:>9}"
+        )
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        print(f"\nComparación con {args.comparar}:")
+        for linea in runner.comparar(reporte, base):
+            print(linea)
+    print(f"\nResultados guardados en {salida}")
+    
+    # Un endpoint que emite más consultas que su @presupuesto_consultas es una regresión (N+1)
+    fuera = runner.excedidos(reporte)
+    for r in fuera:
+        print(f"PRESUPUESTO EXCEDIDO {r['escenario']}: {r['consultas_max']} consultas (máximo {r['presupuesto_consultas']})")
+    return 1 if fuera and not args.sin_presupuestos else 0
+
+def concurrencia(args) -> int:
+    from backend.benchmarks import concurrencia as prueba
+    
+    reporte = prueba.ejecutar(
+        url=args.url,
+        escritores=args.escritores,
+        peticiones=args.peticiones,
+        planes=args.planes,
+        reintentos=args.reintentos,
+        semilla=args.semilla,
+    )
+    print(json.dumps(reporte, ensure_ascii=False, indent=2))
+    # Filas duplicadas o actualizaciones perdidas hacen fallar la corrida
+    return 1 if reporte["violaciones"] else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    
+    p = comandos.add_parser("generar", help="Cargar el dataset sintético")
+    p.add_argument("--equipos", type=int, default=10_000)
+    p.add_argument("--dias", type=int, default=730, help="Días de historial hacia atrás")
+    p.add_argument("--semilla", type=int, default=42)
+    p.add_argument("--limpiar", action="store_true", help="Vaciar equipos, planes e historial antes")
+    p.set_defaults(func=generar)
+    
+    p = comandos.add_parser("ejecutar", help="Medir los escenarios y guardar el JSON")
+    p.add_argument("--iteraciones", type=int, default=50)
+    p.add_argument("--calentamiento", type=int, default=5)
+    p.add_argument("--semilla", type=int, default=42)
+    p.add_argument("--filtro", help="Solo escenarios cuyo nombre contenga este texto")
+    p.add_argument("--con-cache", action="store_true", help="No invalidar el caché de respuestas")
+    p.add_argument("--solo-lectura", action="store_true", help="Omitir escenarios que escriben")
+    p.add_argument("--salida", help="Archivo JSON de salida (por defecto benchmarks/resultados/)")
+    p.add_argument("--comparar", help="JSON de una corrida anterior para comparar")
+    p.add_argument("--sin-presupuestos", action="store_true", help="No fallar si se excede un presupuesto de consultas")
+    p.set_defaults(func=ejecutar)
+    
+    p = comandos.add_parser("concurrencia", help="Escritores en paralelo sobre ejecutar/{plan_id} con reintentos")
+    p.add_argument("--escritores", type=int, default=100)
+    p.add_argument("--peticiones", type=int, default=2000, help="Ejecuciones distintas (sin contar reintentos)")
+    p.add_argument("--planes", type=int, default=5, help="Planes sobre los que se concentran las escrituras")
+    p.add_argument("--reintentos", type=float, default=0.2, help="Fracción reenviada con la misma Idempotency-Key")
+    p.add_argument("--semilla", type=int, default=42)
+    p.add_argument("--url", help="Servidor a probar (por defecto la app en el proceso)")
+    p.set_defaults(func=concurrencia)
+    
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Prueba de concurrencia de POST /api/lubricacion/ejecutar/{plan_id}
+
+Muchos escritores en paralelo registran ejecuciones sobre unos pocos planes (máxima
+contención por fila) y una fracción de las peticiones se reenvía con la misma
+Idempotency-Key, a veces al mismo tiempo que la original. Al final compara la base con
+lo enviado: una fila de historial y un incremento de version por clave aceptada, la
+última fecha del plan igual a la mayor ejecución y los reintentos con la respuesta
+original. Sin --url usa la app en el proceso (TestClient); con --url, un servidor real.
+"""
+import random
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import func, select
+
+from backend.app.models.equipo import Equipo, EstadoEnum
+from backend.app.models.historial import Historial
+from backend.app.models.plan_lubricacion import PlanLubricacion
+from backend.app.services.idempotencia_service import CABECERA, CABECERA_REPETIDA
+from backend.benchmarks.runner import percentil
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _estado_planes(db, plan_ids: List[int]) -> dict:
+    planes = {
+        p.id: {
+            "version": p.version,
+            "ultima": p.ultima_fecha_lubricacion,
+            "proxima": p.proxima_fecha_lubricacion,
+            "frecuencia": p.frecuencia_dias,
+            "historial": 0,
+        }
+        for p in db.execute(select(PlanLubricacion).where(PlanLubricacion.id.in_(plan_ids))).scalars()
+    }
+    for plan_id, total in db.execute(
+        select(Historial.plan_id, func.count()).where(Historial.plan_id.in_(plan_ids)).group_by(Historial.plan_id)
+    ):
+        planes[plan_id]["historial"] = total
+    return planes
+
+def _elegir_planes(db, cantidad: int, rng: random.Random) -> List[int]:
+    ids = db.execute(
+        select(PlanLubricacion.id)
+        .join(Equipo, PlanLubricacion.equipo_id == Equipo.id)
+        .where(Equipo.estado == EstadoEnum.ACTIVO)
+        .order_by(PlanLubricacion.id)
+        .limit(10_000)
+    ).scalars().all()
+    if not ids:
+        raise RuntimeError("La base no tiene planes activos: ejecute primero 'generar'")
+    return rng.sample(ids, min(cantidad, len(ids)))
+
+def _peticiones(plan_ids: List[int], total: int, reintentos: float, rng: random.Random) -> list:
+    """(clave, plan_id, cuerpo); las repetidas comparten clave y cuerpo con su original"""
+    ahora = datetime.utcnow()
+    originales = []
+    for _ in range(total):
+        plan_id = rng.choice(plan_ids)
+        fecha = ahora - timedelta(seconds=rng.uniform(0, 3600))
+        cuerpo = {
+            "plan_id": plan_id,
+            "cantidad_aplicada": 10.0,
+            "tecnico": "Concurrencia",
+            "fecha_ejecucion": fecha.isoformat(),
+        }
+        originales.append((uuid.uuid4().hex, plan_id, cuerpo))
+    repetidas = [p for p in originales if rng.random() < reintentos]
+    todas = originales + repetidas
+    rng.shuffle(todas)
+    return todas
+
+def ejecutar(url: Optional[str] = None, escritores: int = 100, peticiones: int = 2000,
+             planes: int = 5, reintentos: float = 0.2, semilla: int = 42, cliente=None) -> dict:
+    """`cliente`: un TestClient ya iniciado (p. ej. el de las pruebas); no se cierra al terminar"""
+    from backend.app.core.database import SessionLocal
+    
+    rng = random.Random(semilla)
+    db = SessionLocal()
+    try:
+        plan_ids = _elegir_planes(db, planes, rng)
+        antes = _estado_planes(db, plan_ids)
+    finally:
+        db.close()
+    trabajo = _peticiones(plan_ids, peticiones, reintentos, rng)
+    
+    propio = cliente is None
+    if propio and url:
+        import httpx
+        cliente = httpx.Client(base_url=url, timeout=60, limits=httpx.Limits(max_connections=escritores))
+    elif propio:
+        from fastapi.testclient import TestClient
+        from backend.app.main import app
+        cliente = TestClient(app)
+        cliente.__enter__()
+    
+    resultados = []
+    lock = threading.Lock()
+    
+    def enviar(item):
+        clave, plan_id, cuerpo = item
+        inicio = time.perf_counter()
+        r = cliente.post(f"/api/lubricacion/ejecutar/{plan_id}", json=cuerpo, headers={CABECERA: clave})
+        duracion = (time.perf_counter() - inicio) * 1000
+        with lock:
+            resultados.append({
+                "clave": clave,
+                "plan_id": plan_id,
+                "fecha": cuerpo["fecha_ejecucion"],
+                "estado": r.status_code,
+                "repetida": r.headers.get(CABECERA_REPETIDA) == "true",
+                "historial_id": r.json().get("id") if r.status_code == 200 else None,
+                "ms": duracion,
+            })
+    
+    inicio = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=escritores) as pool:
+            list(pool.map(enviar, trabajo))
+    finally:
+        if propio and url:
+            cliente.close()
+        elif propio:
+            cliente.__exit__(None, None, None)
+    total_s = time.perf_counter() - inicio
+    
+    db = SessionLocal()
+    try:
+        despues = _estado_planes(db, plan_ids)
+    finally:
+        db.close()
+    
+    return {
+        "escritores": escritores,
+        "peticiones": len(trabajo),
+        "planes": len(plan_ids),
+        "segundos": round(total_s, 3),
+        "peticiones_por_segundo": round(len(trabajo) / total_s, 1),
+        "p50_ms": round(percentil(sorted(r["ms"] for r in resultados), 50), 2),
+        "p95_ms": round(percentil(sorted(r["ms"] for r in resultados), 95), 2),
+        "p99_ms": round(percentil(sorted(r["ms"] for r in resultados), 99), 2),
+        "estados": {str(k): v for k, v in sorted(Counter(r["estado"] for r in resultados).items())},
+        "repetidas": sum(1 for r in resultados if r["repetida"]),
+        "violaciones": verificar(resultados, antes, despues),
+    }
+
+def verificar(resultados: list, antes: dict, despues: dict) -> List[str]:
+    """Inconsistencias entre lo aceptado por la API y el estado final de los planes"""
+    violaciones = []
+    por_clave = defaultdict(list)
+    for r in resultados:
+        por_clave[r["clave"]].append(r)
+    
+    aceptadas = defaultdict(list)
+    for clave, respuestas in por_clave.items():
+        ok = [r for r in respuestas if r["estado"] == 200]
+        if not ok:
+            continue
+        ids = {r["historial_id"] for r in ok}
+        if len(ids) > 1:
+            violaciones.append(f"Clave {clave}: respuestas distintas {sorted(ids)} (ejecución duplicada)")
+        if len(ok) - sum(1 for r in ok if r["repetida"]) > 1:
+            violaciones.append(f"Clave {clave}: registrada {len(ok)} veces")
+        aceptadas[ok[0]["plan_id"]].append(datetime.fromisoformat(ok[0]["fecha"]))
+    
+    for plan_id, previo in antes.items():
+        final = despues[plan_id]
+        fechas = aceptadas.get(plan_id, [])
+        nuevas_filas = final["historial"] - previo["historial"]
+        if nuevas_filas != len(fechas):
+            violaciones.append(f"Plan {plan_id}: {nuevas_filas} filas de historial para {len(fechas)} claves aceptadas")
+        if final["version"] - previo["version"] != len(fechas):
+            violaciones.append(
+                f"Plan {plan_id}: version +{final['version'] - previo['version']} para {len(fechas)} ejecuciones"
+                " (actualización perdida)"
+            )
+        esperada = max([previo["ultima"], *fechas])
+        if final["ultima"] != esperada:
+            violaciones.append(f"Plan {plan_id}: última {final['ultima']} en lugar de {esperada}")
+        if fechas and esperada > previo["ultima"]:
+            proxima = esperada + timedelta(days=final["frecuencia"])
+            if final["proxima"] != proxima:
+                violaciones.append(f"Plan {plan_id}: próxima {final['proxima']} en lugar de {proxima}")
+    return violaciones
@@ -0,0 +1,179 @@
+"""
+Escenarios de benchmark: una o más peticiones representativas por ruta de
+routes/equipos.py y routes/lubricacion.py
+"""
+import io
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+
+from sqlalchemy import func, select
+
+from backend.app.models.equipo import Equipo, EstadoEnum
+from backend.app.core.pagination import codificar_cursor
+from backend.app.models.plan_lubricacion import PlanLubricacion
+
+@dataclass
+class Muestra:
+    """Ids reales del dataset sobre los que se arman las peticiones"""
+    equipos: List[Tuple[int, str]]
+    planes: List[int]
+    rng: random.Random = field(default_factory=lambda: random.Random(42))
+    
+    @classmethod
+    def cargar(cls, db, tamano: int = 500, semilla: int = 42) -> "Muestra":
+        # setseed hace que la misma semilla elija los mismos equipos en cada corrida
+        db.execute(select(func.setseed((semilla % 1000) / 1000)))
+        ids = db.execute(
+            select(Equipo.id)
+            .where(Equipo.estado == EstadoEnum.ACTIVO)
+            .order_by(func.random())
+            .limit(tamano)
+        ).scalars().all()
+        filas = db.execute(
+            select(Equipo.id, Equipo.planta, PlanLubricacion.id)
+            .join(PlanLubricacion, PlanLubricacion.equipo_id == Equipo.id)
+            .where(Equipo.id.in_(ids))
+            .order_by(Equipo.id)
+        ).all()
+        if not filas:
+            raise RuntimeError("La base no tiene equipos activos: ejecute primero 'generar'")
+        return cls(
+            equipos=[(e, p.value) for e, p, _ in filas],
+            planes=[plan for _, _, plan in filas],
+            rng=random.Random(semilla),
+        )
+    
+    def equipo(self) -> Tuple[int, str]:
+        return self.rng.choice(self.equipos)
+    
+    def plan(self) -> int:
+        return self.rng.choice(self.planes)
+    
+    def planta(self) -> str:
+        return self.rng.choice(["TREN_1", "TREN_2"])
+
+@dataclass
+class Escenario:
+    nombre: str
+    metodo: str
+    ruta: str
+    # Arma los argumentos de TestClient.request (url, params, json, files);
+    # lo que haga aquí (p. ej. crear un equipo para borrarlo) queda fuera de la medición
+    peticion: Callable[[Muestra], dict]
+    escritura: bool = False
+
+def _equipo_nuevo(m: Muestra) -> dict:
+    return {
+        "nombre": f"BENCH-NUEVO-{uuid.uuid4().hex[:12]}",
+        "planta": m.planta(),
+        "criticidad": m.rng.choice(["A", "B", "C"]),
+        "tipo_lubricante": "SKF LGMT 2",
+        "cantidad_gramos": 12.5,
+        "frecuencia_dias": m.rng.choice([15, 30, 60]),
+    }
+
+def _ejecucion(m: Muestra, plan_id: int) -> dict:
+    return {"plan_id": plan_id, "cantidad_aplicada": 12.5, "tecnico": "Benchmark"}
+
+def _csv_importacion(m: Muestra, filas: int = 100) -> dict:
+    lote = uuid.uuid4().hex[:8]
+    lineas = ["nombre,planta,criticidad,tipo_lubricante,cantidad_gramos,frecuencia_dias"]
+    lineas += [f"BENCH-IMP-{lote}-{i},{m.planta()},B,SKF LGMT 2,10,30" for i in range(filas)]
+    archivo = io.BytesIO("\n".join(lineas).encode())
+    return {"url": "/api/equipos/importar", "files": {"archivo": ("equipos.csv", archivo, "text/csv")}}
+
+def _eliminar(m: Muestra) -> dict:
+    from backend.app.core.database import SessionLocal
+    from backend.app.schemas.equipo import EquipoCreate
+    from backend.app.services.equipo_service import EquipoService
+    
+    db = SessionLocal()
+    try:
+        equipo = EquipoService.crear_equipo(db, EquipoCreate(**_equipo_nuevo(m)))
+        return {"url": f"/api/equipos/{equipo.id}"}
+    finally:
+        db.close()
+
+def _hace(dias: int) -> str:
+    return (datetime.utcnow() - timedelta(days=dias)).isoformat()
+
+def _token_sync(horas: int) -> str:
+    """Token de /api/sync de una sincronización hecha hace `horas`"""
+    marca = datetime.utcnow() - timedelta(hours=horas)
+    return codificar_cursor(marca, 0, marca, 0, marca, 0, 0)
+
+ESCENARIOS = [
+    # routes/equipos.py
+    Escenario("equipos.listar", "GET", "/api/equipos",
+              lambda m: {"url": "/api/equipos", "params": {"limit": 50}}),
+    Escenario("equipos.listar_planta_1000", "GET", "/api/equipos",
+              lambda m: {"url": "/api/equipos", "params": {"limit": 1000, "planta": m.planta()}}),
+    Escenario("equipos.obtener", "GET", "/api/equipos/{equipo_id}",
+              lambda m: {"url": f"/api/equipos/{m.equipo()[0]}"}),
+    Escenario("equipos.historial", "GET", "/api/equipos/{equipo_id}/historial",
+              lambda m: {"url": f"/api/equipos/{m.equipo()[0]}/historial", "params": {"limit": 50}}),
+    Escenario("equipos.historial_rango", "GET", "/api/equipos/{equipo_id}/historial",
+              lambda m: {"url": f"/api/equipos/{m.equipo()[0]}/historial",
+                         "params": {"limit": 500, "desde": _hace(365)}}),
+    Escenario("equipos.crear", "POST", "/api/equipos",
+              lambda m: {"url": "/api/equipos", "json": _equipo_nuevo(m)}, escritura=True),
+    Escenario("equipos.actualizar", "PUT", "/api/equipos/{equipo_id}",
+              lambda m: {"url": f"/api/equipos/{m.equipo()[0]}",
+                         "json": {"ubicacion": f"Área {m.rng.randint(1, 40)}"}}, escritura=True),
+    Escenario("equipos.eliminar", "DELETE", "/api/equipos/{equipo_id}", _eliminar, escritura=True),
+    Escenario("equipos.importar_100", "POST", "/api/equipos/importar", _csv_importacion, escritura=True),
+    
+    # routes/lubricacion.py
+    Escenario("planes.todos_planta", "GET", "/api/lubricacion/planes/todos",
+              lambda m: {"url": "/api/lubricacion/planes/todos", "params": {"planta": m.planta(), "limit": 500}}),
+    Escenario("planes.todos_busqueda", "GET", "/api/lubricacion/planes/todos",
+              lambda m: {"url": "/api/lubricacion/planes/todos",
+                         "params": {"search": f"{m.rng.randint(0, 999):03d}", "limit": 500}}),
+    Escenario("planes.proximos", "GET", "/api/lubricacion/planes/proximos",
+              lambda m: {"url": "/api/lubricacion/planes/proximos", "params": {"dias": 7, "limit": 500}}),
+    Escenario("planes.proximos_planta", "GET", "/api/lubricacion/planes/proximos",
+              lambda m: {"url": "/api/lubricacion/planes/proximos",
+                         "params": {"dias": 30, "planta": m.planta(), "limit": 500}}),
+    Escenario("lubricacion.ejecutar", "POST", "/api/lubricacion/ejecutar/{plan_id}",
+              lambda m: (lambda p: {"url": f"/api/lubricacion/ejecutar/{p}", "json": _ejecucion(m, p)})(m.plan()),
+              escritura=True),
+    Escenario("lubricacion.ejecutar_lote_100", "POST", "/api/lubricacion/ejecutar/lote",
+              lambda m: {"url": "/api/lubricacion/ejecutar/lote",
+                         "json": [_ejecucion(m, m.plan()) for _ in range(100)]}, escritura=True),
+    Escenario("historial.global", "GET", "/api/lubricacion/historial",
+              lambda m: {"url": "/api/lubricacion/historial", "params": {"limit": 50}}),
+    Escenario("historial.planta_1000", "GET", "/api/lubricacion/historial",
+              lambda m: {"url": "/api/lubricacion/historial", "params": {"planta": m.planta(), "limit": 1000}}),
+    Escenario("historial.plan", "GET", "/api/lubricacion/historial",
+              lambda m: {"url": "/api/lubricacion/historial", "params": {"plan_id": m.plan()}}),
+    Escenario("historial.exportar_7d", "GET", "/api/lubricacion/historial/exportar",
+              lambda m: {"url": "/api/lubricacion/historial/exportar",
+                         "params": {"planta": m.planta(), "desde": _hace(7)}}),
+    Escenario("historial.exportar_7d_gzip", "GET", "/api/lubricacion/historial/exportar",
+              lambda m: {"url": "/api/lubricacion/historial/exportar",
+                         "params": {"desde": _hace(7), "formato": "ndjson", "gzip": True}}),
+    Escenario("skf.calcular", "GET", "/api/lubricacion/calcular-skf",
+              lambda m: {"url": "/api/lubricacion/calcular-skf",
+                         "params": {"diametro_mm": m.rng.choice([52, 62, 80, 90]), "ancho_mm": 20}}),
+    
+    # routes/consumo.py
+    Escenario("consumo.mensual_anio", "GET", "/api/consumo",
+              lambda m: {"url": "/api/consumo", "params": {"agrupacion": "mes"}}),
+    Escenario("consumo.semanal_planta", "GET", "/api/consumo",
+              lambda m: {"url": "/api/consumo", "params": {"agrupacion": "semana", "planta": m.planta()}}),
+    Escenario("consumo.equipos_planta", "GET", "/api/consumo/equipos",
+              lambda m: {"url": "/api/consumo/equipos", "params": {"planta": m.planta(), "desde": _hace(90)[:10]}}),
+    
+    # routes/sync.py (reconexión tras una hora sin conexión)
+    Escenario("sync.incremental_1h_planta", "GET", "/api/sync",
+              lambda m: {"url": "/api/sync", "params": {"since": _token_sync(1), "planta": m.planta()}}),
+    
+    # routes/pronostico.py
+    Escenario("pronostico.demanda_365_semana", "GET", "/api/pronostico/demanda",
+              lambda m: {"url": "/api/pronostico/demanda", "params": {"dias": 365, "agrupacion": "semana"}}),
+    Escenario("pronostico.calendario_30", "GET", "/api/pronostico/calendario",
+              lambda m: {"url": "/api/pronostico/calendario", "params": {"dias": 30, "planta": m.planta()}}),
+]
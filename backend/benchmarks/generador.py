@@ -0,0 +1,191 @@
+"""
+Generador de un dataset sintético de planta (TREN_1 / TREN_2)
+
+Carga equipos, planes e historial con COPY en bloques. Con la misma semilla y los
+mismos parámetros produce siempre los mismos datos, así que dos corridas de
+benchmarks sobre bases regeneradas son comparables.
+"""
+import io
+import logging
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.app.services.consumo_service import ConsumoService
+from backend.app.services.particion_service import ParticionService
+
+logger = logging.getLogger(__name__)
+
+# Distribuciones aproximadas de una planta real (pesos relativos)
+CRITICIDADES = {"CRITICA": 15, "MEDIA": 35, "BAJA": 50}
+ESTADOS = {"ACTIVO": 90, "MANTENIMIENTO": 6, "INACTIVO": 4}
+PLANTAS = {"TREN_1": 60, "TREN_2": 40}
+
+# Los equipos críticos se lubrican más seguido
+FRECUENCIAS = {
+    "CRITICA": [7, 15, 30],
+    "MEDIA": [15, 30, 60],
+    "BAJA": [30, 60, 90, 180],
+}
+
+COMPONENTES = ["Motor", "Bomba", "Reductor", "Ventilador", "Transportador", "Molino", "Compresor", "Agitador"]
+RODAMIENTOS = ["6205", "6206", "6208", "6210", "6305", "6308", "6310", "22210", "22216", "22312"]
+LUBRICANTES = ["Mobilux EP 2", "SKF LGMT 2", "SKF LGHP 2", "Shell Gadus S2 V220", "Mobil Polyrex EM"]
+TECNICOS = ["J. Pérez", "M. Gómez", "A. Rodríguez", "L. Martínez", "C. Ramírez", "D. Torres"]
+
+COLUMNAS_EQUIPOS = (
+    "id", "nombre", "planta", "componente", "criticidad", "ubicacion", "modelo_rodamiento",
+    "tipo_lubricante", "cantidad_gramos", "frecuencia_dias", "estado", "created_at", "updated_at",
+)
+COLUMNAS_PLANES = (
+    "id", "equipo_id", "tipo_lubricante", "cantidad_gramos", "frecuencia_dias",
+    "ultima_fecha_lubricacion", "proxima_fecha_lubricacion", "created_at", "updated_at",
+)
+COLUMNAS_HISTORIAL = (
+    "id", "plan_id", "fecha_ejecucion", "cantidad_aplicada", "tecnico", "observaciones", "created_at",
+)
+
+def _elegir(rng: random.Random, pesos: dict) -> str:
+    return rng.choices(list(pesos), weights=list(pesos.values()))[0]
+
+def _fila(valores) -> str:
+    """Serializa una fila en formato texto de COPY (NULL = \\N)"""
+    return "\t".join("\\N" if v is None else str(v) for v in valores) + "\n"
+
+class _Copiador:
+    """Acumula filas de una tabla y las envía con un COPY al vaciar"""
+    
+    def __init__(self, cursor, tabla: str, columnas: tuple):
+        self.cursor = cursor
+        self.sql = f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN"
+        self.buffer = io.StringIO()
+        self.pendientes = 0
+        self.total = 0
+    
+    def agregar(self, valores):
+        self.buffer.write(_fila(valores))
+        self.pendientes += 1
+    
+    def vaciar(self):
+        if self.pendientes:
+            self.buffer.seek(0)
+            self.cursor.copy_expert(self.sql, self.buffer)
+            self.total += self.pendientes
+            self.buffer = io.StringIO()
+            self.pendientes = 0
+
+def _siguiente_id(conn, tabla: str) -> int:
+    return conn.execute(text(f"SELECT coalesce(max(id), 0) + 1 FROM {tabla}")).scalar()
+
+def limpiar(engine: Engine):
+    """Vacía las tablas de datos (no toca usuarios ni schema_version)"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "TRUNCATE historial_lubricacion, planes_lubricacion, equipos RESTART IDENTITY CASCADE"
+        ))
+
+def generar(engine: Engine, equipos: int = 10_000, dias_historial: int = 730,
+            semilla: int = 42, bloque: int = 50_000) -> dict:
+    """
+    Genera `equipos` equipos con un plan cada uno y su historial de `dias_historial` días.
+    Cada plan se ejecutó cada frecuencia_dias con ±20% de desvío; con las frecuencias por
+    defecto 100k equipos y 730 días producen del orden de 2.7M ejecuciones.
+    Retorna el conteo de filas insertadas por tabla.
+    """
+    rng = random.Random(semilla)
+    ahora = datetime.utcnow().replace(microsecond=0)
+    inicio = ahora - timedelta(days=dias_historial)
+    
+    with engine.begin() as conn:
+        id_equipo = _siguiente_id(conn, "equipos")
+        id_plan = _siguiente_id(conn, "planes_lubricacion")
+        id_historial = _siguiente_id(conn, "historial_lubricacion")
+        # COPY no crea particiones: se preparan todos los meses de la ventana
+        ParticionService.asegurar_particiones(conn, desde=inicio.date())
+    
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        copia_equipos = _Copiador(cursor, "equipos", COLUMNAS_EQUIPOS)
+        copia_planes = _Copiador(cursor, "planes_lubricacion", COLUMNAS_PLANES)
+        copia_historial = _Copiador(cursor, "historial_lubricacion", COLUMNAS_HISTORIAL)
+        
+        for i in range(equipos):
+            criticidad = _elegir(rng, CRITICIDADES)
+            planta = _elegir(rng, PLANTAS)
+            frecuencia = rng.choice(FRECUENCIAS[criticidad])
+            lubricante = rng.choice(LUBRICANTES)
+            gramos = round(rng.uniform(5, 120), 1)
+            creado = inicio - timedelta(days=rng.randint(0, 365))
+            
+            copia_equipos.agregar((
+                id_equipo, f"BENCH-{planta}-{id_equipo:07d}", planta, rng.choice(COMPONENTES),
+                criticidad, f"Área {rng.randint(1, 40)}", rng.choice(RODAMIENTOS), lubricante,
+                gramos, frecuencia, _elegir(rng, ESTADOS), creado, creado,
+            ))
+            
+            # Ejecuciones desde el inicio de la ventana hasta hoy
+            fecha = inicio + timedelta(days=rng.uniform(0, frecuencia))
+            ultima = creado
+            while fecha <= ahora:
+                copia_historial.agregar((
+                    id_historial, id_plan, fecha.replace(microsecond=0),
+                    round(gramos * rng.uniform(0.8, 1.2), 1), rng.choice(TECNICOS), None, fecha.replace(microsecond=0),
+                ))
+                id_historial += 1
+                ultima = fecha.replace(microsecond=0)
+                fecha += timedelta(days=frecuencia * rng.uniform(0.8, 1.2))
+            
+            # Algunos planes quedan vencidos: la última ejecución no siempre se registró
+            if rng.random() < 0.1:
+                ultima -= timedelta(days=frecuencia)
+            copia_planes.agregar((
+                id_plan, id_equipo, lubricante, gramos, frecuencia,
+                ultima, ultima + timedelta(days=frecuencia), creado, ultima,
+            ))
+            id_equipo += 1
+            id_plan += 1
+            
+            # Se vacía siempre en orden equipos → planes → historial por las FK
+            if max(copia_equipos.pendientes, copia_historial.pendientes) >= bloque:
+                copia_equipos.vaciar()
+                copia_planes.vaciar()
+                copia_historial.vaciar()
+                raw.commit()
+                logger.info(f"{i + 1}/{equipos} equipos, {copia_historial.total} ejecuciones")
+        
+        copia_equipos.vaciar()
+        copia_planes.vaciar()
+        copia_historial.vaciar()
+        
+        for tabla in ("equipos", "planes_lubricacion", "historial_lubricacion"):
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), (SELECT max(id) FROM {tabla}))")
+        raw.commit()
+    finally:
+        raw.close()
+    
+    # COPY no pasa por registrar_ejecucion: el agregado de consumo se recalcula entero
+    with Session(engine) as db:
+        consumo = ConsumoService.reconstruir(db)
+    
+    # Estadísticas frescas para que el planner vea el tamaño real
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE equipos, planes_lubricacion, historial_lubricacion, consumo_diario"))
+    
+    return {
+        "equipos": copia_equipos.total,
+        "planes_lubricacion": copia_planes.total,
+        "historial_lubricacion": copia_historial.total,
+        "consumo_diario": consumo,
+    }
+
+def contar(engine: Engine) -> dict:
+    """Filas actuales por tabla (se guarda junto a los resultados)"""
+    with engine.connect() as conn:
+        return {
+            tabla: conn.execute(text(f"SELECT count(*) FROM {tabla}")).scalar()
+            for tabla in ("equipos", "planes_lubricacion", "historial_lubricacion")
+        }
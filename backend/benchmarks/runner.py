@@ -0,0 +1,198 @@
+"""
+Ejecución de los escenarios contra la aplicación en proceso
+
+Cada escenario se mide con TestClient sobre la app real (middleware, dependencias,
+serialización y base de datos incluidos). Por petición se registran la latencia y las
+consultas SQL emitidas por los engines sync y async; la memoria pico se mide en una
+pasada aparte con tracemalloc para no inflar las latencias.
+"""
+import json
+import logging
+import math
+import platform
+import subprocess
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Iterable, List
+
+from sqlalchemy import event
+
+from backend.benchmarks.escenarios import ESCENARIOS, Escenario, Muestra
+
+logger = logging.getLogger(__name__)
+
+class ContadorConsultas:
+    """Cuenta las sentencias ejecutadas en los engines mientras está activo"""
+    
+    def __init__(self, *engines):
+        self.engines = engines
+        self.total = 0
+        self._lock = threading.Lock()
+    
+    def _contar(self, *args):
+        with self._lock:
+            self.total += 1
+    
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._contar)
+        return self
+    
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._contar)
+    
+    def reiniciar(self) -> int:
+        with self._lock:
+            total, self.total = self.total, 0
+        return total
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+def _commit_actual() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def presupuesto_escenario(app, escenario: Escenario):
+    """Presupuesto declarado con @presupuesto_consultas en el endpoint del escenario (o None)"""
+    from backend.app.core.presupuesto import presupuesto_de
+    
+    for ruta in app.routes:
+        if getattr(ruta, "path", None) == escenario.ruta and escenario.metodo in getattr(ruta, "methods", ()):
+            return presupuesto_de(ruta.endpoint)
+    return None
+
+def medir(client, escenario: Escenario, muestra: Muestra, contador: ContadorConsultas,
+          iteraciones: int, calentamiento: int, con_cache: bool) -> dict:
+    """Ejecuta un escenario y retorna sus estadísticas"""
+    from backend.app.core.cache import cache_respuestas
+    
+    def una_peticion():
+        argumentos = escenario.peticion(muestra)
+        if not con_cache:
+            cache_respuestas.invalidar()
+        contador.reiniciar()
+        inicio = time.perf_counter()
+        respuesta = client.request(escenario.metodo, **argumentos)
+        duracion = (time.perf_counter() - inicio) * 1000
+        return respuesta, duracion, contador.reiniciar()
+    
+    for _ in range(calentamiento):
+        una_peticion()
+    
+    latencias, consultas, estados, bytes_respuesta = [], [], {}, 0
+    for _ in range(iteraciones):
+        respuesta, duracion, n = una_peticion()
+        latencias.append(duracion)
+        consultas.append(n)
+        estados[respuesta.status_code] = estados.get(respuesta.status_code, 0) + 1
+        bytes_respuesta += len(respuesta.content)
+    
+    tracemalloc.start()
+    try:
+        una_peticion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    latencias.sort()
+    presupuesto = presupuesto_escenario(client.app, escenario)
+    return {
+        "escenario": escenario.nombre,
+        "metodo": escenario.metodo,
+        "ruta": escenario.ruta,
+        "iteraciones": iteraciones,
+        "p50_ms": round(percentil(latencias, 50), 3),
+        "p95_ms": round(percentil(latencias, 95), 3),
+        "p99_ms": round(percentil(latencias, 99), 3),
+        "media_ms": round(sum(latencias) / len(latencias), 3),
+        "consultas_media": round(sum(consultas) / len(consultas), 2),
+        "consultas_max": max(consultas),
+        "presupuesto_consultas": presupuesto,
+        "excede_presupuesto": presupuesto is not None and max(consultas) > presupuesto,
+        "memoria_pico_kb": round(pico / 1024, 1),
+        "bytes_respuesta_media": bytes_respuesta // iteraciones,
+        "estados": {str(k): v for k, v in sorted(estados.items())},
+    }
+
+def ejecutar(escenarios: Iterable[Escenario] = ESCENARIOS, iteraciones: int = 50,
+             calentamiento: int = 5, con_cache: bool = False, incluir_escrituras: bool = True,
+             semilla: int = 42) -> dict:
+    """
+    Corre los escenarios y retorna el reporte completo.
+    Por defecto invalida el caché de respuestas antes de cada petición para medir
+    el servicio y la base de datos; con_cache=True mide el camino cacheado.
+    """
+    from fastapi.testclient import TestClient
+    from backend.app.core.config import settings
+    
+    # Registra en el log las cargas perezosas y las sentencias de cada presupuesto excedido
+    if settings.PRESUPUESTO_CONSULTAS_MODO == "off":
+        settings.PRESUPUESTO_CONSULTAS_MODO = "log"
+    
+    from backend.app.core.database import SessionLocal, async_engine, engine
+    from backend.app.main import app
+    from backend.benchmarks.generador import contar
+    
+    db = SessionLocal()
+    try:
+        muestra = Muestra.cargar(db, semilla=semilla)
+    finally:
+        db.close()
+    
+    resultados = []
+    with TestClient(app) as client, ContadorConsultas(engine, async_engine.sync_engine) as contador:
+        for escenario in escenarios:
+            if escenario.escritura and not incluir_escrituras:
+                continue
+            logger.info(f"Midiendo {escenario.nombre}")
+            resultados.append(medir(client, escenario, muestra, contador, iteraciones, calentamiento, con_cache))
+    
+    return {
+        "fecha": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "dataset": contar(engine),
+        "parametros": {
+            "iteraciones": iteraciones,
+            "calentamiento": calentamiento,
+            "con_cache": con_cache,
+            "semilla": semilla,
+        },
+        "resultados": resultados,
+    }
+
+def excedidos(reporte: dict) -> List[dict]:
+    """Escenarios cuyo máximo de consultas supera el presupuesto de su endpoint"""
+    return [r for r in reporte["resultados"] if r["excede_presupuesto"]]
+
+def comparar(actual: dict, base: dict) -> List[str]:
+    """Líneas de texto con la variación de p50/p95 y consultas respecto de una corrida base"""
+    previos = {r["escenario"]: r for r in base["resultados"]}
+    lineas = []
+    for r in actual["resultados"]:
+        b = previos.get(r["escenario"])
+        if b is None:
+            lineas.append(f"{r['escenario']:<32} (nuevo)")
+            continue
+        variacion = lambda k: (r[k] - b[k]) / b[k] * 100 if b[k] else 0.0
+        lineas.append(
+            f"{r['escenario']:<32} p50 {variacion('p50_ms'):+6.1f}%  p95 {variacion('p95_ms'):+6.1f}%"
+            f"  consultas {b['consultas_media']} → {r['consultas_media']}"
+        )
+    return lineas
+
+def guardar(reporte: dict, ruta: str):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
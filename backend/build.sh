@@ -1,4 +1,4 @@
 #!/bin/bash
 pip install --upgrade pip
 pip install -r requirements.txt
-python -c "from app.core.database import init_db; init_db()"
\ No newline at end of file
+(cd .. && python -m backend.app.cli migrar)
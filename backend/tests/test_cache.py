@@ -0,0 +1,55 @@
+"""
+Caché de respuestas: invalidación por planta y de todas las plantas (sin base de datos)
+"""
+import pytest
+
+from backend.app.core.cache import ResponseCache
+from backend.app.core.notificaciones import crear_evento
+
+class _Despachador:
+    """Entrega los eventos publicados directo a los suscriptores"""
+    
+    def __init__(self):
+        self.suscriptores = []
+    
+    def suscribir(self, callback, al_publicar=None):
+        self.suscriptores.append(callback)
+    
+    def publicar(self, evento: dict):
+        for callback in self.suscriptores:
+            callback(evento)
+
+def _cache_con_entrada(planta: str) -> ResponseCache:
+    cache = ResponseCache(ttl_seconds=60)
+    cache.set("clave", cache.version(planta), b"[]")
+    assert cache.get("clave", planta) is not None
+    return cache
+
+def test_invalidar_una_planta_no_toca_las_demas():
+    cache = _cache_con_entrada("TREN_2")
+    cache.set("otra", cache.version("TREN_1"), b"[]")
+    
+    cache.invalidar("TREN_1")
+    
+    assert cache.get("otra", "TREN_1") is None
+    assert cache.get("clave", "TREN_2") is not None
+
+def test_invalidar_todo_alcanza_plantas_nunca_invalidadas():
+    cache = _cache_con_entrada("TREN_2")
+    
+    cache.invalidar()
+    
+    assert cache.get("clave", "TREN_2") is None
+    assert cache.invalidada_hace("TREN_2") < 60
+
+# Eventos sin planta: la recarga (demasiados ids o reconexión del LISTEN) y los cambios de
+# equipos de otro worker
+@pytest.mark.parametrize("evento", [crear_evento("recarga"), crear_evento("equipos", None, [1])])
+def test_evento_sin_planta_descarta_plantas_nunca_invalidadas(evento):
+    cache = _cache_con_entrada("TREN_2")
+    despachador = _Despachador()
+    cache.suscribir_cambios(despachador)
+    
+    despachador.publicar(evento)
+    
+    assert cache.get("clave", "TREN_2") is None
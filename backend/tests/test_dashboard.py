@@ -0,0 +1,35 @@
+"""
+Dashboard: ejecuciones y grasa salen de consumo_diario y coinciden con el historial
+"""
+from datetime import datetime, time, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from backend.app.core.config import settings
+
+def test_resumen_suma_el_agregado_de_consumo(cliente, base_datos):
+    from backend.app.services.dashboard_service import _cache_resumen
+    
+    _cache_resumen.clear()
+    dias = 60
+    respuesta = cliente.get("/api/dashboard/resumen", params={"dias_historial": dias})
+    
+    assert respuesta.status_code == 200, respuesta.text
+    resumen = respuesta.json()
+    # consumo_diario cuenta días completos: el primero desde su medianoche
+    desde = datetime.combine((datetime.fromisoformat(resumen["generado_en"]) - timedelta(days=dias)).date(), time.min)
+    with base_datos.connect() as conn:
+        ejecuciones, grasa = conn.execute(text(
+            "SELECT count(*), coalesce(sum(cantidad_aplicada), 0) FROM historial_lubricacion "
+            "WHERE fecha_ejecucion >= :desde"
+        ), {"desde": desde}).one()
+    assert resumen["total_ejecuciones"] == ejecuciones
+    assert resumen["total_grasa_aplicada"] == pytest.approx(grasa, abs=0.01)
+    assert resumen["dias_tecnicos"] == min(dias, settings.DASHBOARD_TECNICOS_DIAS)
+
+def test_tecnicos_acotados_en_ventanas_largas(cliente):
+    respuesta = cliente.get("/api/dashboard/resumen", params={"dias_historial": 3650})
+    
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["dias_tecnicos"] == settings.DASHBOARD_TECNICOS_DIAS
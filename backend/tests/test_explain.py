@@ -0,0 +1,20 @@
+"""
+Planes de consulta: ninguna consulta de los servicios recorre entera una tabla crítica
+
+Usa ExplainService.revisar (el mismo chequeo que `python -m backend.app.cli explicar`)
+con enable_seqscan desactivado, así que un Seq Scan que queda es una consulta sin índice.
+Los recorridos completos buscados están en SEQ_SCANS_PERMITIDOS.
+"""
+from backend.app.services.explain_service import SEQ_SCANS_PERMITIDOS, ExplainService
+
+def test_consultas_de_servicios_usan_indices(base_datos):
+    from backend.app.core.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        reporte = ExplainService.revisar(db)
+    finally:
+        db.close()
+    
+    assert {r["consulta"] for r in reporte} >= set(SEQ_SCANS_PERMITIDOS)
+    assert {r["consulta"]: r["nodos"] for r in reporte if r["seq_scans"]} == {}
@@ -0,0 +1,18 @@
+"""
+Historial por fecha: desde/hasta con zona horaria se comparan en UTC
+"""
+import pytest
+
+@pytest.mark.parametrize("ruta", ["/api/lubricacion/historial", "/api/equipos/{equipo_id}/historial"])
+def test_desde_hasta_con_zona_equivalen_a_utc(cliente, muestra, ruta):
+    url = ruta.format(equipo_id=muestra.equipo()[0])
+    sin_zona = {"desde": "2026-01-01T03:00:00", "hasta": "2026-12-31T00:00:00", "limit": 500}
+    
+    esperado = cliente.get(url, params=sin_zona)
+    con_z = cliente.get(url, params={**sin_zona, "desde": "2026-01-01T03:00:00Z", "hasta": "2026-12-31T00:00:00Z"})
+    con_offset = cliente.get(url, params={**sin_zona, "desde": "2026-01-01T00:00:00-03:00", "hasta": "2026-12-31T00:00:00+00:00"})
+    
+    assert esperado.status_code == 200, esperado.text
+    assert con_z.status_code == 200, con_z.text
+    assert con_offset.status_code == 200, con_offset.text
+    assert con_z.json() == con_offset.json() == esperado.json()
@@ -0,0 +1,66 @@
+"""
+Particiones del historial: escrituras fuera de la retención y resúmenes mensuales
+"""
+import uuid
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import text
+
+from backend.app.services.particion_service import ParticionService, corte_retencion, nombre_particion, sumar_meses
+
+def _existe(engine, mes) -> bool:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT to_regclass(:nombre) IS NOT NULL"), {"nombre": nombre_particion(mes)}).scalar()
+
+def test_ejecucion_anterior_a_la_retencion_se_rechaza_sola(cliente, muestra, base_datos):
+    vieja = datetime.combine(corte_retencion(), time.min) - timedelta(days=10)
+    lote = [
+        {"plan_id": muestra.plan(), "cantidad_aplicada": 5.0, "tecnico": "Retencion",
+         "id_cliente": str(uuid.uuid4()), "fecha_ejecucion": fecha.isoformat()}
+        for fecha in (vieja, datetime.utcnow())
+    ]
+    
+    respuesta = cliente.post("/api/sync/ejecuciones", json=lote)
+    
+    assert respuesta.status_code == 200, respuesta.text
+    vieja_resultado, nueva_resultado = respuesta.json()["resultados"]
+    assert not vieja_resultado["ok"] and "retención" in vieja_resultado["error"]
+    assert nueva_resultado["ok"]
+    assert not _existe(base_datos, sumar_meses(corte_retencion(), -1))
+
+def test_ejecucion_suelta_anterior_a_la_retencion_es_422(cliente, muestra):
+    vieja = datetime.combine(corte_retencion(), time.min) - timedelta(days=1)
+    respuesta = cliente.post(
+        f"/api/lubricacion/ejecutar/{muestra.plan()}",
+        json={"plan_id": 0, "cantidad_aplicada": 5.0, "tecnico": "Retencion", "fecha_ejecucion": vieja.isoformat()},
+    )
+    
+    assert respuesta.status_code == 422
+
+def test_retencion_suma_al_resumen_existente(base_datos, muestra):
+    mes = sumar_meses(corte_retencion(), -1)
+    inicio = datetime.combine(mes, time.min)
+    plan_id = muestra.plan()
+    with base_datos.begin() as conn:
+        # Un mes ya resumido que reaparece (p. ej. retención anterior con otro corte)
+        ParticionService.crear_meses(conn, [mes])
+        conn.execute(text(
+            "INSERT INTO historial_lubricacion (plan_id, fecha_ejecucion, cantidad_aplicada, tecnico, created_at) "
+            "VALUES (:plan, :fecha, 4.0, 'Tardia', now())"
+        ), {"plan": plan_id, "fecha": inicio + timedelta(days=1)})
+        conn.execute(text(
+            "INSERT INTO historial_resumen_mensual "
+            "(mes, plan_id, ejecuciones, cantidad_total, tecnicos, primera_ejecucion, ultima_ejecucion) "
+            "VALUES (:mes, :plan, 5, 50.0, 2, :primera, :ultima)"
+        ), {"mes": mes, "plan": plan_id, "primera": inicio + timedelta(days=2), "ultima": inicio + timedelta(days=20)})
+    
+    resultado = ParticionService.aplicar_retencion(accion="eliminar")
+    
+    assert [p["mes"] for p in resultado["particiones"]] == [mes]
+    with base_datos.connect() as conn:
+        resumen = conn.execute(text(
+            "SELECT ejecuciones, cantidad_total, tecnicos, primera_ejecucion, ultima_ejecucion "
+            "FROM historial_resumen_mensual WHERE mes = :mes AND plan_id = :plan"
+        ), {"mes": mes, "plan": plan_id}).one()
+    assert tuple(resumen) == (6, 54.0, 2, inicio + timedelta(days=1), inicio + timedelta(days=20))
+    assert not _existe(base_datos, mes)
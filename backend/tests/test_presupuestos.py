@@ -0,0 +1,106 @@
+"""
+Presupuesto de consultas de cada endpoint (@presupuesto_consultas)
+
+Cada escenario de backend/benchmarks/escenarios.py, más los de las rutas que los
+benchmarks no miden, se ejecuta con las cachés vacías y las consultas que emitió la
+petición se comparan con el presupuesto declarado por su endpoint (con los bloques que
+escribió, si es por bloque). Un N+1 nuevo o una consulta de más hace fallar la prueba con
+las sentencias y las cargas perezosas; una ruta nueva sin @presupuesto_consultas también.
+"""
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.routing import APIRoute
+
+from backend.app.core.presupuesto import presupuesto_de
+from backend.benchmarks.escenarios import ESCENARIOS, Escenario, _csv_importacion
+
+# Rutas con presupuesto que los benchmarks no cubren
+ESCENARIOS_EXTRA = [
+    Escenario("raiz", "GET", "/", lambda m: {"url": "/"}),
+    Escenario("health", "GET", "/api/health", lambda m: {"url": "/api/health"}),
+    Escenario("health.live", "GET", "/api/health/live", lambda m: {"url": "/api/health/live"}),
+    Escenario("health.ready", "GET", "/api/health/ready", lambda m: {"url": "/api/health/ready"}),
+    Escenario("dashboard.resumen_planta", "GET", "/api/dashboard/resumen",
+              lambda m: {"url": "/api/dashboard/resumen", "params": {"planta": m.planta()}}),
+    Escenario("skf.calcular_lote", "POST", "/api/lubricacion/calcular-skf/lote",
+              lambda m: {"url": "/api/lubricacion/calcular-skf/lote",
+                         "json": [{"designacion": "6205"}, {"diametro_mm": 62, "ancho_mm": 16}]}),
+    Escenario("sync.subir_ejecuciones", "POST", "/api/sync/ejecuciones",
+              lambda m: {"url": "/api/sync/ejecuciones", "json": [
+                  {"plan_id": m.plan(), "cantidad_aplicada": 10.0, "tecnico": "Prueba",
+                   "id_cliente": str(uuid.uuid4()), "fecha_ejecucion": datetime.utcnow().isoformat()}
+                  for _ in range(20)
+              ], "headers": {"Idempotency-Key": str(uuid.uuid4())}}, escritura=True),
+    # Tres bloques de 1000: el presupuesto por bloque tiene que escalar
+    Escenario("equipos.importar_2500", "POST", "/api/equipos/importar",
+              lambda m: _csv_importacion(m, 2500), escritura=True),
+    # Un bloque de escritura (la flota de prueba es menor que el bloque de 5000)
+    Escenario("skf.recalcular_flota", "POST", "/api/lubricacion/recalcular-cantidades",
+              lambda m: {"url": "/api/lubricacion/recalcular-cantidades", "params": {"modo": "sobrescribir"}},
+              escritura=True),
+]
+
+# Flujo SSE sin fin: no termina dentro de una petición de TestClient
+SIN_ESCENARIO = {("GET", "/api/eventos")}
+
+# Rutas de la API sin @presupuesto_consultas, con el motivo
+SIN_PRESUPUESTO = {
+    # Lee el registro de Prometheus en memoria, nunca la base de datos
+    ("GET", "/metrics"),
+}
+
+def _rutas_api() -> dict:
+    """{(método, ruta): presupuesto o None} de las rutas de la API (sin /docs ni openapi)"""
+    from backend.app.main import app
+    
+    rutas = {}
+    for ruta in app.routes:
+        if not isinstance(ruta, APIRoute):
+            continue
+        for metodo in ruta.methods - {"HEAD"}:
+            rutas[(metodo, ruta.path)] = presupuesto_de(ruta.endpoint)
+    return rutas
+
+def _rutas_con_presupuesto() -> dict:
+    return {clave: maximo for clave, maximo in _rutas_api().items() if maximo is not None}
+
+def test_todas_las_rutas_tienen_presupuesto():
+    sin_presupuesto = {clave for clave, maximo in _rutas_api().items() if maximo is None}
+    assert sin_presupuesto == SIN_PRESUPUESTO, (
+        f"Rutas sin @presupuesto_consultas: {sorted(sin_presupuesto - SIN_PRESUPUESTO)}; "
+        f"exentas que ya no hace falta listar: {sorted(SIN_PRESUPUESTO - sin_presupuesto)}"
+    )
+
+def test_todas_las_rutas_con_presupuesto_tienen_escenario():
+    cubiertas = {(e.metodo, e.ruta) for e in ESCENARIOS + ESCENARIOS_EXTRA}
+    faltantes = set(_rutas_con_presupuesto()) - cubiertas - SIN_ESCENARIO
+    assert not faltantes, f"Rutas con @presupuesto_consultas sin escenario: {sorted(faltantes)}"
+
+@pytest.mark.parametrize(
+    "escenario",
+    [e for e in ESCENARIOS + ESCENARIOS_EXTRA if (e.metodo, e.ruta) in _rutas_con_presupuesto()],
+    ids=lambda e: e.nombre,
+)
+def test_presupuesto_de_consultas(cliente, muestra, escenario):
+    from backend.app.core.cache import cache_respuestas
+    from backend.app.services.dashboard_service import _cache_resumen
+    
+    argumentos = escenario.peticion(muestra)
+    # Sin caché: se mide el camino que llega a la base de datos
+    cache_respuestas.invalidar()
+    _cache_resumen.clear()
+    respuesta = cliente.request(escenario.metodo, **argumentos)
+    
+    assert respuesta.status_code < 500, respuesta.text
+    registro = cliente.registro
+    actividad = registro.actividad
+    maximo = presupuesto_de(registro.endpoint, actividad.bloques)
+    assert maximo is not None
+    sentencias = "\n".join(" ".join(sql.split()) for _, sql in actividad.sentencias)
+    assert actividad.consultas <= maximo, (
+        f"{escenario.metodo} {escenario.ruta}: {actividad.consultas} consultas "
+        f"(presupuesto {maximo}, {actividad.bloques} bloques)"
+        f"; cargas perezosas: {actividad.cargas_perezosas}\n{sentencias}"
+    )
@@ -0,0 +1,160 @@
+"""
+Reintentos y escrituras concurrentes de ejecuciones
+
+Un reintento (misma Idempotency-Key o mismo id_cliente) no registra otra ejecución, y
+las escrituras simultáneas sobre los mismos planes no pierden incrementos de version.
+Corren contra TEST_DATABASE_URL como el resto de las pruebas con base de datos.
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.app.services.idempotencia_service import CABECERA, CABECERA_REPETIDA
+
+RUTAS_LOTE = ["/api/lubricacion/ejecutar/lote", "/api/sync/ejecuciones"]
+
+def _estado(plan_ids) -> dict:
+    """{plan_id: (version, filas de historial)}"""
+    from backend.app.core.database import SessionLocal
+    from backend.app.models.historial import Historial
+    from backend.app.models.plan_lubricacion import PlanLubricacion
+    
+    db = SessionLocal()
+    try:
+        versiones = dict(db.execute(
+            select(PlanLubricacion.id, PlanLubricacion.version).where(PlanLubricacion.id.in_(plan_ids))
+        ).all())
+        filas = dict(db.execute(
+            select(Historial.plan_id, func.count()).where(Historial.plan_id.in_(plan_ids)).group_by(Historial.plan_id)
+        ).all())
+    finally:
+        db.close()
+    return {p: (versiones[p], filas.get(p, 0)) for p in plan_ids}
+
+def _lote(muestra, cantidad: int) -> list:
+    """Ejecuciones con id_cliente y fecha real, una por plan distinto"""
+    ahora = datetime.utcnow()
+    planes = sorted({muestra.plan() for _ in range(cantidad * 3)})[:cantidad]
+    return [
+        {
+            "plan_id": plan_id,
+            "cantidad_aplicada": 5.0,
+            "tecnico": "Reintento",
+            "fecha_ejecucion": (ahora - timedelta(minutes=i)).isoformat(),
+            "id_cliente": str(uuid.uuid4()),
+        }
+        for i, plan_id in enumerate(planes)
+    ]
+
+def _sumar(antes: dict, despues: dict) -> dict:
+    return {p: (despues[p][0] - antes[p][0], despues[p][1] - antes[p][1]) for p in antes}
+
+def test_concurrencia_ejecutar_sin_duplicados_ni_versiones_perdidas(cliente):
+    from backend.benchmarks.concurrencia import ejecutar
+    
+    resultado = ejecutar(escritores=16, peticiones=150, planes=3, reintentos=0.3, cliente=cliente)
+    
+    assert resultado["violaciones"] == []
+    assert set(resultado["estados"]) == {"200"}, resultado["estados"]
+    assert resultado["repetidas"] > 0
+
+@pytest.mark.parametrize("ruta", RUTAS_LOTE)
+def test_lote_con_idempotency_key_repite_la_respuesta(cliente, muestra, ruta):
+    lote = _lote(muestra, 5)
+    plan_ids = [e["plan_id"] for e in lote]
+    cabeceras = {CABECERA: str(uuid.uuid4())}
+    antes = _estado(plan_ids)
+    
+    original = cliente.post(ruta, json=lote, headers=cabeceras)
+    assert original.status_code == 200, original.text
+    assert original.json()["registrados"] == len(lote)
+    
+    reintento = cliente.post(ruta, json=lote, headers=cabeceras)
+    assert reintento.status_code == 200
+    assert reintento.headers.get(CABECERA_REPETIDA) == "true"
+    assert reintento.json() == original.json()
+    assert _sumar(antes, _estado(plan_ids)) == {p: (1, 1) for p in plan_ids}
+    
+    otro_cuerpo = cliente.post(ruta, json=lote[:-1], headers=cabeceras)
+    assert otro_cuerpo.status_code == 422
+
+@pytest.mark.parametrize("ruta", RUTAS_LOTE)
+def test_reenvio_sin_clave_no_duplica(cliente, muestra, ruta):
+    lote = _lote(muestra, 5)
+    plan_ids = [e["plan_id"] for e in lote]
+    antes = _estado(plan_ids)
+    
+    original = cliente.post(ruta, json=lote).json()
+    reenvio = cliente.post(ruta, json=lote).json()
+    
+    assert (original["registrados"], original["repetidos"]) == (len(lote), 0)
+    assert (reenvio["registrados"], reenvio["repetidos"]) == (0, len(lote))
+    assert all(r["repetida"] for r in reenvio["resultados"])
+    assert [r["historial_id"] for r in reenvio["resultados"]] == [r["historial_id"] for r in original["resultados"]]
+    assert _sumar(antes, _estado(plan_ids)) == {p: (1, 1) for p in plan_ids}
+
+def test_sync_sin_id_cliente_se_rechaza(cliente, muestra):
+    lote = _lote(muestra, 1)
+    del lote[0]["id_cliente"]
+    
+    assert cliente.post("/api/sync/ejecuciones", json=lote).status_code == 422
+
+def test_sync_reenvios_simultaneos_registran_una_vez(cliente, muestra):
+    lote = _lote(muestra, 5)
+    plan_ids = [e["plan_id"] for e in lote]
+    antes = _estado(plan_ids)
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        respuestas = list(pool.map(lambda _: cliente.post("/api/sync/ejecuciones", json=lote), range(8)))
+    
+    assert all(r.status_code == 200 for r in respuestas), [r.text for r in respuestas if r.status_code != 200]
+    assert sum(r.json()["registrados"] for r in respuestas) == len(lote)
+    assert len({tuple(i["historial_id"] for i in r.json()["resultados"]) for r in respuestas}) == 1
+    assert _sumar(antes, _estado(plan_ids)) == {p: (1, 1) for p in plan_ids}
+
+@pytest.fixture
+def planes_por_indice(base_datos):
+    """
+    Con pocos planes Postgres avanza un lote con un hash join sobre toda la tabla y bloquea
+    las filas en su orden físico; con la flota real recorre el índice en el orden del lote.
+    Se fuerza ese plan para que el orden de bloqueo dependa del lote, como en producción.
+    """
+    from sqlalchemy import event
+    
+    def sin_hash_join(dbapi_conn, registro):
+        with dbapi_conn.cursor() as cursor:
+            cursor.execute("SET enable_hashjoin = off; SET enable_mergejoin = off")
+        dbapi_conn.commit()
+    
+    base_datos.dispose()
+    event.listen(base_datos, "connect", sin_hash_join)
+    yield
+    event.remove(base_datos, "connect", sin_hash_join)
+    base_datos.dispose()
+
+def test_lotes_simultaneos_en_orden_inverso_no_se_traban(cliente, muestra, planes_por_indice):
+    # Mismos planes (y mismo día de consumo por equipo) en órdenes opuestos
+    plan_ids = sorted(set(muestra.planes))[:40]
+    antes = _estado(plan_ids)
+    lotes = []
+    for i in range(64):
+        lote = []
+        for orden, plan_id in enumerate(plan_ids if i % 2 else reversed(plan_ids)):
+            lote.append({
+                "plan_id": plan_id,
+                "cantidad_aplicada": 5.0,
+                "tecnico": "Orden",
+                "fecha_ejecucion": (datetime.utcnow() - timedelta(seconds=orden)).isoformat(),
+                "id_cliente": str(uuid.uuid4()),
+            })
+        lotes.append(lote)
+    
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        respuestas = list(pool.map(lambda lote: cliente.post("/api/sync/ejecuciones", json=lote), lotes))
+    
+    assert all(r.status_code == 200 for r in respuestas), [r.text for r in respuestas if r.status_code != 200]
+    assert all(r.json()["registrados"] == len(plan_ids) for r in respuestas)
+    assert _sumar(antes, _estado(plan_ids)) == {p: (len(lotes), len(lotes)) for p in plan_ids}
@@ -0,0 +1,42 @@
+"""
+Designaciones de rodamientos: número base y búsqueda en el catálogo (sin base de datos)
+"""
+import pytest
+
+from backend.app.services.rodamiento_service import catalogo, normalizar_designacion
+
+@pytest.mark.parametrize("texto, numero", [
+    ("6205", "6205"),
+    ("SKF 6205-2RS1/C3", "6205"),
+    ("SKF6205", "6205"),
+    ("skf-6205-2z", "6205"),
+    ("FAG 6308.2RSR", "6308"),
+    ("6205 2RS", "6205"),
+    ("22220 EK", "22220"),
+    ("22220EK/C3", "22220"),
+    ("62202-2RS1", "62202"),
+    ("63005", "63005"),
+    ("62052RS1", "62052"),
+    ("NU 206", None),
+    ("620", None),
+    ("620520", None),
+    ("", None),
+    (None, None),
+])
+def test_normalizar_designacion(texto, numero):
+    assert normalizar_designacion(texto) == numero
+
+@pytest.mark.parametrize("texto, designacion", [
+    ("SKF 6205-2RS1/C3", "6205"),
+    ("SKF6205", "6205"),
+    ("22220 EK", "22220"),
+    # Cinco dígitos fuera del catálogo: desconocidos, nunca el de 4 dígitos que los empieza
+    ("62202-2RS1", None),
+    ("63005", None),
+    ("62052RS1", None),
+])
+def test_buscar_no_recorta_designaciones_de_cinco_digitos(texto, designacion):
+    cat = catalogo()
+    posicion = cat.buscar(texto)
+    
+    assert (cat.designacion[posicion] if posicion >= 0 else None) == designacion
@@ -0,0 +1,34 @@
+"""
+Validación de las ejecuciones recibidas (sin base de datos)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from backend.app.schemas.historial import EjecucionLoteCreate, EjecucionOfflineCreate, HistorialCreate
+
+EJECUCION = {"plan_id": 1, "cantidad_aplicada": 10.0, "tecnico": "Prueba"}
+
+def test_fecha_con_zona_se_guarda_en_utc_sin_zona():
+    con_z = HistorialCreate(**EJECUCION, fecha_ejecucion="2026-01-01T02:00:00Z")
+    con_offset = EjecucionOfflineCreate(
+        **EJECUCION, id_cliente="6f1c1b9e-8a53-4a51-9f53-0d7b6b1f0a11", fecha_ejecucion="2025-12-31T23:30:00-03:00"
+    )
+    
+    assert con_z.fecha_ejecucion == datetime(2026, 1, 1, 2, 0)
+    # Día UTC, no el local: cae en el mismo día de consumo que su fila de historial
+    assert con_offset.fecha_ejecucion == datetime(2026, 1, 1, 2, 30)
+    assert con_z.fecha_ejecucion < datetime.utcnow()
+
+def test_fecha_futura_se_rechaza():
+    with pytest.raises(ValidationError):
+        HistorialCreate(**EJECUCION, fecha_ejecucion=datetime.utcnow() + timedelta(days=2))
+    
+    assert HistorialCreate(**EJECUCION, fecha_ejecucion=datetime.utcnow() + timedelta(hours=2)).fecha_ejecucion
+
+def test_id_cliente_sin_fecha_se_rechaza():
+    with pytest.raises(ValidationError):
+        EjecucionLoteCreate(**EJECUCION, id_cliente="6f1c1b9e-8a53-4a51-9f53-0d7b6b1f0a11")
+    
+    assert EjecucionLoteCreate(**EJECUCION).id_cliente is None
@@ -0,0 +1,53 @@
+"""
+Sincronización incremental: el token no deja atrás filas confirmadas tarde
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from backend.app.core.config import settings
+from backend.app.core.pagination import codificar_cursor
+
+def _tocar_planes(engine, cantidad: int, desde: datetime, fecha: datetime) -> list:
+    """
+    Marca `cantidad` planes de equipos activos como modificados en `fecha` y devuelve sus
+    ids más el de otro plan, que queda modificado antes de `desde`.
+    """
+    with engine.begin() as conn:
+        ids = conn.execute(text(
+            "SELECT p.id FROM planes_lubricacion p JOIN equipos e ON e.id = p.equipo_id "
+            "WHERE e.estado = 'ACTIVO' ORDER BY p.id LIMIT :cantidad"
+        ), {"cantidad": cantidad + 1}).scalars().all()
+        for plan_ids, valor in ((ids[:cantidad], fecha), (ids[cantidad:], desde - timedelta(days=1))):
+            conn.execute(
+                text("UPDATE planes_lubricacion SET updated_at = :fecha WHERE id = ANY(:ids)"),
+                {"fecha": valor, "ids": plan_ids},
+            )
+    return ids
+
+def test_pagina_reciente_no_salta_commits_tardios(cliente, base_datos, monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_LIMITE", 3)
+    ahora = datetime.utcnow()
+    desde = ahora - timedelta(seconds=60)
+    ids = _tocar_planes(base_datos, settings.SYNC_LIMITE + 1, desde, ahora - timedelta(seconds=30))
+    token = codificar_cursor(ahora, 0, desde, 0, ahora, 0, 0)
+    
+    pagina = cliente.get("/api/sync", params={"since": token})
+    assert pagina.status_code == 200, pagina.text
+    cuerpo = pagina.json()
+    assert not cuerpo["completo"]
+    ultima = datetime.fromisoformat(cuerpo["planes"][-1]["updated_at"])
+    
+    # Una transacción que tomó su updated_at antes que la última fila de la página pero
+    # confirmó después de la lectura
+    tardio = ids[-1]
+    with base_datos.begin() as conn:
+        conn.execute(
+            text("UPDATE planes_lubricacion SET updated_at = :fecha WHERE id = :id"),
+            {"fecha": ultima - timedelta(milliseconds=1), "id": tardio},
+        )
+    monkeypatch.setattr(settings, "SYNC_LIMITE", 5000)
+    siguiente = cliente.get("/api/sync", params={"since": cuerpo["token"]})
+    
+    assert siguiente.status_code == 200, siguiente.text
+    assert tardio in {p["id"] for p in siguiente.json()["planes"]}
@@ -6,8 +6,8 @@ import { GlassCard } from '@/components/ui/GlassCard'
 import { GlassPanel } from '@/components/ui/GlassPanel'
 import { AnimatedCounter } from '@/components/ui/AnimatedCounter'
 import { StatusBadge } from '@/components/ui/StatusBadge'
-import { Equipo, PlanProximo, Historial, Planta, PLANTA_LABELS } from '@/types'
-import { getEquipos, getPlanesProximos, getHistorial } from '@/lib/api'
+import { DashboardResumen, PlanProximo, Planta, PLANTA_LABELS } from '@/types'
+import { getDashboardResumen, getPlanesProximos } from '@/lib/api'
 import {
   LayoutDashboard,
   Settings,
@@ -27,9 +27,8 @@ interface DashboardTabProps {
 }
 
 export function DashboardTab({ planta }: DashboardTabProps) {
-  const [equipos, setEquipos] = useState<Equipo[]>([])
+  const [resumen, setResumen] = useState<DashboardResumen | null>(null)
   const [planes, setPlanes] = useState<PlanProximo[]>([])
-  const [historial, setHistorial] = useState<Historial[]>([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
 
@@ -37,14 +36,12 @@ export function DashboardTab({ planta }: DashboardTabProps) {
     setLoading(true)
     setError(null)
     try {
-      const [eqs, pls, hist] = await Promise.all([
-        getEquipos(0, 100, planta),
-        getPlanesProximos(30, planta),
-        getHistorial(undefined, 100, planta),
+      const [res, pls] = await Promise.all([
+        getDashboardResumen(planta),
+        getPlanesProximos(30, planta, 15),
       ])
-      setEquipos(eqs)
+      setResumen(res)
       setPlanes(pls)
-      setHistorial(hist)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Error al cargar datos')
     } finally {
@@ -54,13 +51,20 @@ export function DashboardTab({ planta }: DashboardTabProps) {
 
   useEffect(() => { fetchAll() }, [fetchAll])
 
-  const activos = equipos.filter(e => e.estado === 'ACTIVO').length
-  const enMantenimiento = equipos.filter(e => e.estado === 'MANTENIMIENTO').length
-  const vencidos = planes.filter(p => p.dias_restantes < 0).length
-  const proximosHoy = planes.filter(p => p.dias_restantes >= 0 && p.dias_restantes <= 1).length
-  const criticosA = equipos.filter(e => e.criticidad === 'A').length
-  const totalGrasaAplicada = Math.round(historial.reduce((s, h) => s + h.cantidad_aplicada, 0))
-  const tecnicosUnicos = new Set(historial.map(h => h.tecnico)).size
+  const totalEquipos = resumen?.total_equipos ?? 0
+  const activos = resumen?.equipos_activos ?? 0
+  const enMantenimiento = resumen?.equipos_mantenimiento ?? 0
+  const vencidos = resumen?.planes_vencidos ?? 0
+  const proximosHoy = resumen?.planes_hoy ?? 0
+  const criticosA = resumen?.criticidad_a ?? 0
+  const totalGrasaAplicada = Math.round(resumen?.total_grasa_aplicada ?? 0)
+  const tecnicosUnicos = resumen?.tecnicos_unicos ?? 0
+  const totalEjecuciones = resumen?.total_ejecuciones ?? 0
+  const porCriticidad = {
+    A: resumen?.criticidad_a ?? 0,
+    B: resumen?.criticidad_b ?? 0,
+    C: resumen?.criticidad_c ?? 0,
+  }
 
   if (loading) {
     return (
@@ -111,7 +115,7 @@ export function DashboardTab({ planta }: DashboardTabProps) {
             <Settings className="w-5 h-5 text-orange-400" />
             <span className="text-xs text-gray-500">equipos</span>
           </div>
-          <AnimatedCounter value={equipos.length} className="text-3xl font-bold text-white" />
+          <AnimatedCounter value={totalEquipos} className="text-3xl font-bold text-white" />
           <p className="text-sm text-gray-400 mt-1">Total Equipos</p>
         </GlassCard>
 
@@ -182,7 +186,7 @@ export function DashboardTab({ planta }: DashboardTabProps) {
                   <TrendingUp className="w-4 h-4 text-green-400" />
                   <span className="text-sm text-gray-300">Ejecuciones</span>
                 </div>
-                <span className="text-sm font-bold text-green-400">{historial.length}</span>
+                <span className="text-sm font-bold text-green-400">{totalEjecuciones}</span>
               </div>
             </div>
           </GlassPanel>
@@ -192,8 +196,8 @@ export function DashboardTab({ planta }: DashboardTabProps) {
             <h3 className="text-sm font-semibold text-orange-400 uppercase tracking-wider mb-4">Distribución Criticidad</h3>
             <div className="space-y-3">
               {(['A', 'B', 'C'] as const).map(crit => {
-                const count = equipos.filter(e => e.criticidad === crit).length
-                const pct = equipos.length ? Math.round((count / equipos.length) * 100) : 0
+                const count = porCriticidad[crit]
+                const pct = totalEquipos ? Math.round((count / totalEquipos) * 100) : 0
                 const color = crit === 'A' ? 'bg-red-500' : crit === 'B' ? 'bg-yellow-500' : 'bg-blue-500'
                 const textColor = crit === 'A' ? 'text-red-400' : crit === 'B' ? 'text-yellow-400' : 'text-blue-400'
                 return (
@@ -222,7 +226,7 @@ export function DashboardTab({ planta }: DashboardTabProps) {
           <GlassPanel>
             <div className="p-6 border-b border-white/10">
               <h3 className="text-sm font-semibold text-orange-400 uppercase tracking-wider">
-                Planes Próximos ({planes.length})
+                Planes Próximos ({resumen?.planes_proximos ?? planes.length})
               </h3>
             </div>
             <div className="max-h-[500px] overflow-y-auto custom-scrollbar">
@@ -233,7 +237,7 @@ export function DashboardTab({ planta }: DashboardTabProps) {
                 </div>
               ) : (
                 <div className="divide-y divide-white/5">
-                  {planes.slice(0, 15).map((plan, idx) => (
+                  {planes.map((plan, idx) => (
                     <motion.div
                       key={plan.id}
                       initial={{ opacity: 0, x: -10 }}
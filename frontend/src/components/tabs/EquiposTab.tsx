@@ -7,7 +7,7 @@ import { GlassPanel } from '@/components/ui/GlassPanel'
 import { StatusBadge } from '@/components/ui/StatusBadge'
 import { AnimatedCounter } from '@/components/ui/AnimatedCounter'
 import { Equipo, EquipoCreate, EquipoUpdate, Criticidad, EstadoEquipo, Planta } from '@/types'
-import { getEquipos, createEquipo, updateEquipo, deleteEquipo } from '@/lib/api'
+import { getAllEquipos, createEquipo, updateEquipo, deleteEquipo } from '@/lib/api'
 import { formatDate } from '@/lib/utils'
 import {
   Settings,
@@ -60,7 +60,7 @@ export function EquiposTab({ planta }: EquiposTabProps) {
     setLoading(true)
     setError(null)
     try {
-      const data = await getEquipos(0, 100, planta)
+      const data = await getAllEquipos(planta)
       setEquipos(data)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Error al cargar equipos')
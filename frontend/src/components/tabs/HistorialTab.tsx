@@ -6,7 +6,7 @@ import { GlassCard } from '@/components/ui/GlassCard'
 import { GlassPanel } from '@/components/ui/GlassPanel'
 import { AnimatedCounter } from '@/components/ui/AnimatedCounter'
 import { Historial, Planta } from '@/types'
-import { getHistorial } from '@/lib/api'
+import { getConsumo, getHistorial } from '@/lib/api'
 import { formatDate } from '@/lib/utils'
 import {
   History,
@@ -27,6 +27,7 @@ interface HistorialTabProps {
 
 export function HistorialTab({ planta }: HistorialTabProps) {
   const [historial, setHistorial] = useState<Historial[]>([])
+  const [gramosTotales, setGramosTotales] = useState(0)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [searchQuery, setSearchQuery] = useState('')
@@ -36,8 +37,13 @@ export function HistorialTab({ planta }: HistorialTabProps) {
     setLoading(true)
     setError(null)
     try {
-      const data = await getHistorial(undefined, limit, planta)
+      // El total de grasa viene del agregado de consumo (últimos 12 meses), no de la página visible
+      const [data, consumo] = await Promise.all([
+        getHistorial(undefined, limit, planta),
+        getConsumo(planta),
+      ])
       setHistorial(data)
+      setGramosTotales(consumo.total_gramos)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Error al cargar historial')
     } finally {
@@ -90,9 +96,9 @@ export function HistorialTab({ planta }: HistorialTabProps) {
         <GlassCard hover={false} className="p-6">
           <div className="flex items-center justify-between">
             <div>
-              <p className="text-sm text-gray-400">Grasa Total Aplicada</p>
+              <p className="text-sm text-gray-400">Grasa Aplicada (12 meses)</p>
               <AnimatedCounter
-                value={Math.round(historial.reduce((sum, h) => sum + h.cantidad_aplicada, 0))}
+                value={Math.round(gramosTotales)}
                 suffix="g"
                 className="text-3xl font-bold text-green-400"
               />
@@ -7,7 +7,13 @@ import { GlassPanel } from '@/components/ui/GlassPanel'
 import { StatusBadge } from '@/components/ui/StatusBadge'
 import { AnimatedCounter } from '@/components/ui/AnimatedCounter'
 import { PlanProximo, Planta } from '@/types'
-import { getPlanesProximos, getTodosPlanes, ejecutarLubricacion } from '@/lib/api'
+import {
+  getPlanesProximos,
+  getTodosPlanes,
+  ejecutarLubricacion,
+  suscribirCambios,
+  aplicarCambioPlanes,
+} from '@/lib/api'
 import { formatDate } from '@/lib/utils'
 import {
   Droplets,
@@ -60,6 +66,15 @@ export function PlanesTab({ planta }: PlanesTabProps) {
     fetchPlanes()
   }, [fetchPlanes])
 
+  // Las ejecuciones y cambios de equipos de otros usuarios llegan como deltas por SSE
+  useEffect(() => {
+    return suscribirCambios(
+      planta,
+      (cambio) => setPlanes(prev => aplicarCambioPlanes(prev, cambio, diasFiltro)),
+      fetchPlanes
+    )
+  }, [planta, diasFiltro, fetchPlanes])
+
   const vencidos = planes.filter(p => p.dias_restantes < 0)
   const hoy = planes.filter(p => p.dias_restantes >= 0 && p.dias_restantes <= 1)
   const proximos = planes.filter(p => p.dias_restantes > 1)
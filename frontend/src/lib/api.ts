@@ -6,8 +6,15 @@ import {
   PlanProximo,
   Historial,
   HistorialCreate,
+  EjecucionOffline,
   SKFResult,
   HealthCheck,
+  DashboardResumen,
+  ConsumoResumen,
+  AgrupacionConsumo,
+  CambioPlanes,
+  SyncRespuesta,
+  EjecucionLoteResponse,
 } from '@/types'
 
 // In production, API calls go through Next.js rewrites (same origin, no CORS).
@@ -32,12 +39,43 @@ async function fetchAPI<T>(endpoint: string, options?: RequestInit): Promise<T>
   return res.json()
 }
 
+export interface Page<T> {
+  items: T[]
+  nextCursor: string | null
+}
+
+// Listados paginados por cursor: el token de la siguiente página llega en X-Next-Cursor
+async function fetchPage<T>(endpoint: string): Promise<Page<T>> {
+  const res = await fetch(`${API_URL}${endpoint}`, {
+    headers: { 'Content-Type': 'application/json' },
+  })
+
+  if (!res.ok) {
+    const error = await res.json().catch(() => ({ detail: res.statusText }))
+    throw new Error(error.detail || `Error ${res.status}`)
+  }
+
+  return { items: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') }
+}
+
 // ==================== EQUIPOS ====================
 
-export async function getEquipos(skip = 0, limit = 50, planta?: Planta): Promise<Equipo[]> {
-  const params = new URLSearchParams({ skip: String(skip), limit: String(limit) })
+export async function getEquipos(limit = 50, planta?: Planta, cursor?: string): Promise<Page<Equipo>> {
+  const params = new URLSearchParams({ limit: String(limit) })
   if (planta) params.set('planta', planta)
-  return fetchAPI<Equipo[]>(`/api/equipos?${params}`)
+  if (cursor) params.set('cursor', cursor)
+  return fetchPage<Equipo>(`/api/equipos?${params}`)
+}
+
+export async function getAllEquipos(planta?: Planta): Promise<Equipo[]> {
+  const equipos: Equipo[] = []
+  let cursor: string | undefined
+  do {
+    const page = await getEquipos(1000, planta, cursor)
+    equipos.push(...page.items)
+    cursor = page.nextCursor ?? undefined
+  } while (cursor)
+  return equipos
 }
 
 export async function getEquipo(id: number): Promise<Equipo> {
@@ -68,9 +106,10 @@ export async function getHistorialEquipo(equipoId: number): Promise<Historial[]>
 
 // ==================== PLANES DE LUBRICACIÓN ====================
 
-export async function getPlanesProximos(dias = 7, planta?: Planta): Promise<PlanProximo[]> {
+export async function getPlanesProximos(dias = 7, planta?: Planta, limit?: number): Promise<PlanProximo[]> {
   const params = new URLSearchParams({ dias: String(dias) })
   if (planta) params.set('planta', planta)
+  if (limit) params.set('limit', String(limit))
   return fetchAPI<PlanProximo[]>(`/api/lubricacion/planes/proximos?${params}`)
 }
 
@@ -81,6 +120,36 @@ export async function getTodosPlanes(planta?: Planta, search?: string): Promise<
   return fetchAPI<PlanProximo[]>(`/api/lubricacion/planes/todos?${params}`)
 }
 
+// Cambios de planes en vivo (SSE). onRecarga se llama cuando hay que volver a pedir el
+// listado completo: al reconectar (se pudieron perder eventos) o si el servidor lo indica.
+export function suscribirCambios(
+  planta: Planta | undefined,
+  onCambio: (cambio: CambioPlanes) => void,
+  onRecarga: () => void
+): () => void {
+  const params = new URLSearchParams()
+  if (planta) params.set('planta', planta)
+  const fuente = new EventSource(`${API_URL}/api/eventos?${params}`)
+  let conectado = false
+  fuente.addEventListener('conectado', () => {
+    if (conectado) onRecarga()
+    conectado = true
+  })
+  fuente.addEventListener('cambio', (e) => onCambio(JSON.parse((e as MessageEvent).data)))
+  fuente.addEventListener('recarga', () => onRecarga())
+  return () => fuente.close()
+}
+
+export function aplicarCambioPlanes(planes: PlanProximo[], cambio: CambioPlanes, dias?: number): PlanProximo[] {
+  const quitar = new Set(cambio.ids)
+  const equipos = new Set(cambio.equipos)
+  const nuevos = dias === undefined ? cambio.planes : cambio.planes.filter(p => p.dias_restantes <= dias)
+  nuevos.forEach(p => quitar.add(p.id))
+  return [...planes.filter(p => !quitar.has(p.id) && !equipos.has(p.equipo_id)), ...nuevos].sort(
+    (a, b) => a.proxima_fecha.localeCompare(b.proxima_fecha) || a.id - b.id
+  )
+}
+
 // ==================== EJECUCIÓN / HISTORIAL ====================
 
 export async function ejecutarLubricacion(planId: number, data: Omit<HistorialCreate, 'plan_id'>): Promise<Historial> {
@@ -91,10 +160,20 @@ export async function ejecutarLubricacion(planId: number, data: Omit<HistorialCr
 }
 
 export async function getHistorial(planId?: number, limit = 50, planta?: Planta): Promise<Historial[]> {
+  return (await getHistorialPage(planId, limit, planta)).items
+}
+
+export async function getHistorialPage(
+  planId?: number,
+  limit = 50,
+  planta?: Planta,
+  cursor?: string
+): Promise<Page<Historial>> {
   const params = new URLSearchParams({ limit: String(limit) })
   if (planId) params.set('plan_id', String(planId))
   if (planta) params.set('planta', planta)
-  return fetchAPI<Historial[]>(`/api/lubricacion/historial?${params}`)
+  if (cursor) params.set('cursor', cursor)
+  return fetchPage<Historial>(`/api/lubricacion/historial?${params}`)
 }
 
 // ==================== HERRAMIENTAS ====================
@@ -105,6 +184,48 @@ export async function calcularSKF(diametroMm: number, anchoMm: number): Promise<
   )
 }
 
+// ==================== SINCRONIZACIÓN (SIN CONEXIÓN) ====================
+
+// Cambios desde `since` (sin token: carga inicial). Con completo=false, volver a llamar con el token.
+export async function getSync(since?: string, planta?: Planta): Promise<SyncRespuesta> {
+  const params = new URLSearchParams()
+  if (since) params.set('since', since)
+  if (planta) params.set('planta', planta)
+  return fetchAPI<SyncRespuesta>(`/api/sync?${params}`)
+}
+
+// Ejecuciones encoladas sin conexión, con su id_cliente y su fecha_ejecucion real.
+// Reenviar la cola tras un error de red es seguro: las ya registradas vuelven como repetidas.
+export async function subirEjecuciones(ejecuciones: EjecucionOffline[]): Promise<EjecucionLoteResponse> {
+  return fetchAPI<EjecucionLoteResponse>('/api/sync/ejecuciones', {
+    method: 'POST',
+    body: JSON.stringify(ejecuciones),
+  })
+}
+
+// ==================== DASHBOARD ====================
+
+export async function getDashboardResumen(planta?: Planta): Promise<DashboardResumen> {
+  const params = new URLSearchParams()
+  if (planta) params.set('planta', planta)
+  return fetchAPI<DashboardResumen>(`/api/dashboard/resumen?${params}`)
+}
+
+// ==================== CONSUMO ====================
+
+export async function getConsumo(
+  planta?: Planta,
+  agrupacion: AgrupacionConsumo = 'mes',
+  desde?: string,
+  hasta?: string
+): Promise<ConsumoResumen> {
+  const params = new URLSearchParams({ agrupacion })
+  if (planta) params.set('planta', planta)
+  if (desde) params.set('desde', desde)
+  if (hasta) params.set('hasta', hasta)
+  return fetchAPI<ConsumoResumen>(`/api/consumo?${params}`)
+}
+
 // ==================== HEALTH ====================
 
 export async function getHealth(): Promise<HealthCheck> {
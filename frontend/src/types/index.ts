@@ -81,6 +81,16 @@ export interface PlanProximo {
   estado: string
 }
 
+// Evento "cambio" de /api/eventos - matches backend CambioPlanes schema.
+// Quitar los planes con id en `ids` o equipo_id en `equipos` y luego agregar `planes`.
+export interface CambioPlanes {
+  tipo: 'planes' | 'equipos'
+  planta: Planta | null
+  ids: number[]
+  equipos: number[]
+  planes: PlanProximo[]
+}
+
 // Historial - matches backend Historial model & HistorialResponse schema
 export interface Historial {
   id: number
@@ -90,6 +100,7 @@ export interface Historial {
   fecha_ejecucion: string
   observaciones: string | null
   created_at: string
+  id_cliente: string | null
 }
 
 // Create payload
@@ -101,6 +112,39 @@ export interface HistorialCreate {
   fecha_ejecucion?: string | null
 }
 
+// Ejecución encolada sin conexión: id_cliente (UUID generado al registrarla) y fecha real
+export interface EjecucionOffline extends HistorialCreate {
+  id_cliente: string
+  fecha_ejecucion: string
+}
+
+// /api/sync - matches backend SyncRespuesta schema
+export interface SyncRespuesta {
+  token: string
+  completo: boolean
+  equipos: Equipo[]
+  planes: PlanLubricacion[]
+  historial: Historial[]
+  equipos_eliminados: number[]
+}
+
+// Lote de ejecuciones - matches backend EjecucionLoteResponse schema
+export interface EjecucionLoteResultado {
+  indice: number
+  plan_id: number
+  ok: boolean
+  historial_id: number | null
+  repetida: boolean
+  error: string | null
+}
+
+export interface EjecucionLoteResponse {
+  registrados: number
+  repetidos: number
+  errores: number
+  resultados: EjecucionLoteResultado[]
+}
+
 // SKF Calculation response
 export interface SKFResult {
   diametro_mm: number
@@ -109,6 +153,34 @@ export interface SKFResult {
   formula: string
 }
 
+// Consumption rollup - matches backend ConsumoResumen schema (/api/consumo)
+export type AgrupacionConsumo = 'dia' | 'semana' | 'mes' | 'anio'
+
+export interface ConsumoSerie {
+  periodo: string
+  planta: Planta
+  tipo_lubricante: string
+  ejecuciones: number
+  gramos: number
+}
+
+export interface ConsumoLubricante {
+  tipo_lubricante: string
+  ejecuciones: number
+  gramos: number
+  kilogramos: number
+}
+
+export interface ConsumoResumen {
+  desde: string
+  hasta: string
+  agrupacion: AgrupacionConsumo
+  total_ejecuciones: number
+  total_gramos: number
+  por_lubricante: ConsumoLubricante[]
+  series: ConsumoSerie[]
+}
+
 // Health check response  
 export interface HealthCheck {
   status: 'healthy' | 'unhealthy'
@@ -117,12 +189,22 @@ export interface HealthCheck {
   error?: string
 }
 
-// Dashboard stats (computed from API data)
-export interface DashboardStats {
-  totalEquipos: number
-  equiposActivos: number
-  equiposMantenimiento: number
-  planesVencidos: number
-  planesProximos: number
-  totalEjecuciones: number
+// Dashboard KPIs - matches backend DashboardResumen schema (/api/dashboard/resumen)
+export interface DashboardResumen {
+  planta: Planta | null
+  total_equipos: number
+  equipos_activos: number
+  equipos_mantenimiento: number
+  criticidad_a: number
+  criticidad_b: number
+  criticidad_c: number
+  planes_vencidos: number
+  planes_hoy: number
+  planes_proximos: number
+  dias_historial: number
+  dias_tecnicos: number
+  total_ejecuciones: number
+  total_grasa_aplicada: number
+  tecnicos_unicos: number
+  generado_en: string
 }